@@ -0,0 +1,461 @@
+#! /usr/bin/env python
+#
+"""
+Measure the per-application overhead of `betwixt` infix operators.
+
+For every delimiter class in `betwixt._delimiter_to_class` and every
+operator defined in `betwixt.examples`, compare the cost of the infix
+form ``x |op| y`` with calling the wrapped function ``op._op(x, y)``
+directly, and report (results of operators returning lazy iterators
+are turned into lists in both forms, so that the work is actually
+done):
+
+* time per application, in nanoseconds;
+* memory blocks and bytes allocated per application (via `tracemalloc`);
+* GC-tracked objects created per application;
+* time per application when the expression is compiled with
+  `betwixt.compiler` into a direct call (Python 3.9+ only).
+
+Allocation and GC figures are measured by keeping every intermediate
+partial operation and every result alive, so that temporary objects
+cannot be freed and re-used during the measurement; they are only
+available on CPython.
+
+Results can be compared against a stored baseline (see option
+``--baseline``); the script exits with a non-zero status if any
+benchmark regresses.  The check is on allocation figures, which are
+exact and do not depend on the machine or its load: a regression is
+any increase in memory blocks or GC-tracked objects per application
+beyond ``--alloc-tolerance`` (which only absorbs rounding).  Timings
+are only reported by default: even as the ratio between infix and
+direct call, they vary by 50% or more between runs on a busy machine,
+so a tolerance wide enough to avoid false alarms would hide most real
+regressions.  Option ``--tolerance`` turns on the check of time ratios
+for runs on a quiet, dedicated machine.
+
+Baselines are stored per interpreter and version: the one shipped in
+``benchmarks/baseline.json`` only has CPython 3.11 figures (run it with
+``tox -e py311-bench``).  Allocations are not measured on PyPy, so there
+is nothing to check there unless ``--tolerance`` is given; on other
+interpreters, results are only reported until a baseline is recorded
+with ``--update-baseline``, and option ``--require-baseline`` turns the
+missing baseline into a failure.
+"""
+# Copyright (C) 2016-2020 Riccardo Murri <riccardo.murri@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# make coding more python3-ish, must be the first statement
+from __future__ import (absolute_import, division, print_function)
+
+import argparse
+import fnmatch
+import gc
+import json
+import platform
+import sys
+import timeit
+
+try:
+    import tracemalloc
+except ImportError:
+    # not available on Python 2 and PyPy
+    tracemalloc = None
+
+import betwixt
+import betwixt.examples
+
+
+## benchmark definitions
+
+# How to write ``x OP y`` for each delimiter.
+_EXPRESSION = {
+    '**': 'x **op** y',
+    '*':  'x *op* y',
+    '/':  'x /op/ y',
+    '//': 'x //op// y',
+    '+':  'x +op+ y',
+    '<<': 'x <<op>> y',
+    '^':  'x ^op^ y',
+    '|':  'x |op| y',
+}
+
+# How to split ``x OP y`` in its two stages: the first one creates
+# the partial operation ``p``, the second one computes the result.
+# Note that ``**`` is right-associative so the right operand is bound
+# first.
+_STAGES = {
+    '**': ('op ** y', 'x ** p'),
+    '*':  ('x * op', 'p * y'),
+    '/':  ('x / op', 'p / y'),
+    '//': ('x // op', 'p // y'),
+    '+':  ('x + op', 'p + y'),
+    '<<': ('x << op', 'p >> y'),
+    '^':  ('x ^ op', 'p ^ y'),
+    '|':  ('x | op', 'p | y'),
+}
+
+
+def _second(lhs, rhs):
+    # pylint: disable=unused-argument
+    return rhs
+
+
+# Sample operands for each operator in `betwixt.examples`; the
+# benchmark refuses to run if an example operator is missing here, so
+# that new operators cannot silently escape measurement.
+EXAMPLE_OPERANDS = {
+    'contains': ([1, 2, 3], 2),
+    'contains_indexed': ((1, 2, 3), 2),
+    'joining':  ('_', ['a', 'b', 'c']),
+    'split_at': ('a_b_c', '_'),
+    'isplit_at': (b'a_b_c', b'_'),
+    'then':     (-3, abs),
+    'each':     ([1, -2, 3], abs),
+    'where':    ([1, 0, 2], bool),
+    'batched':  ([1, 2, 3], 2),
+    'matches':  ('foo.txt', '*.txt'),
+    'matching': (['foo.txt', 'bar.png'], '*.txt'),
+    'join':     ('/tmp', 'foo'),
+    'concat':   ('foo', 'bar'),
+}
+
+
+# Operators returning lazy iterators; results are turned into lists.
+LAZY_EXAMPLES = frozenset(['batched', 'each', 'isplit_at', 'where'])
+
+# Operators not measured, and why.
+SKIPPED_EXAMPLES = {
+    # applications hand work to a pool of workers, which takes so much
+    # longer than the operator itself that its overhead is lost in the
+    # noise
+    'pmap': 'worker pool dispatch',
+    'tmap': 'worker pool dispatch',
+}
+
+
+def _delimiter_of(op):
+    for delimiter, cls in betwixt._delimiter_to_class.items():
+        if isinstance(op, cls):
+            return delimiter
+    raise LookupError(
+        "Cannot determine delimiter of operator {0!r}".format(op))
+
+
+def collect_benchmarks():
+    """
+    Return list of ``(name, delimiter, op, operands, lazy)`` tuples to
+    measure.
+
+    Item *operands* is a list of ``(x, y)`` pairs; each measured
+    iteration applies the operator to all of them in turn.  If *lazy*
+    is true, results are turned into lists.
+    """
+    benchmarks = []
+    for delimiter, cls in sorted(betwixt._delimiter_to_class.items()):
+        name = 'class:' + cls.__name__
+        op = cls(_second)
+        benchmarks.append((name, delimiter, op, [(1, 2)], False))
+        op = betwixt.infix_operator(delimiter, _second, specialize=True)
+        benchmarks.append((name + '[specialized]', delimiter, op, [(1, 2)], False))
+    for name in sorted(vars(betwixt.examples)):
+        op = getattr(betwixt.examples, name)
+        if not isinstance(op, betwixt._BaseInfixOperator):
+            continue
+        if name in SKIPPED_EXAMPLES:
+            continue
+        if name not in EXAMPLE_OPERANDS:
+            raise LookupError(
+                "No sample operands defined for operator"
+                " `betwixt.examples.{0}`".format(name))
+        benchmarks.append(
+            ('examples:' + name, _delimiter_of(op), op, [EXAMPLE_OPERANDS[name]],
+             name in LAZY_EXAMPLES))
+    return benchmarks
+
+
+## measurement
+
+def _compile_loop(body, k):
+    src = (
+        "def run(n, op, f, operands, parts, results):\n"
+        + ''.join("    x{0}, y{0} = operands[{0}]\n".format(j) for j in range(k))
+        + "    for i in range(0, {0}*n, {0}):\n".format(k)
+        + ''.join(("        " + line.format(j=j) + "\n")
+                  for j in range(k) for line in body)
+    )
+    namespace = {}
+    exec(compile(src, '<benchmark>', 'exec'), namespace)
+    return namespace['run']
+
+
+def _instantiate(expr, j, lazy=False):
+    expr = expr.replace('x', 'x' + str(j)).replace('y', 'y' + str(j))
+    return 'list({0})'.format(expr) if lazy else expr
+
+
+def _time_per_op(stmts, namespace, number, repeat):
+    """
+    Return best time per execution of each statement in *stmts*.
+
+    Timing runs of the different statements are interleaved, so that
+    fluctuations in CPU speed affect them all alike.
+    """
+    timers = [timeit.Timer(stmt, globals=namespace) for stmt in stmts]
+    best = [float('inf')] * len(timers)
+    for _ in range(repeat):
+        for n, timer in enumerate(timers):
+            best[n] = min(best[n], timer.timeit(number=number))
+    return [1e9 * t / number for t in best]
+
+
+def _count_allocations(run, n, op, f, operands):
+    """
+    Return number of memory blocks, bytes and GC-tracked objects
+    allocated per operator application by *n* iterations of *run*.
+    """
+    k = len(operands)
+    parts = [None] * (k * n)
+    results = [None] * (k * n)
+    # warm up caches (e.g., `fnmatch` compiled patterns)
+    run(2, op, f, operands, parts, results)
+    gc.collect()
+    gc.disable()
+    try:
+        tracemalloc.start()
+        try:
+            before = tracemalloc.take_snapshot()
+            gc_before = len(gc.get_objects())
+            run(n, op, f, operands, parts, results)
+            gc_after = len(gc.get_objects())
+            after = tracemalloc.take_snapshot()
+        finally:
+            tracemalloc.stop()
+    finally:
+        gc.enable()
+    stats = after.compare_to(before, 'traceback')
+    blocks = sum(stat.count_diff for stat in stats)
+    size = sum(stat.size_diff for stat in stats)
+    return (blocks / (k * n), size / (k * n), (gc_after - gc_before) / (k * n))
+
+
+def _compiled_statement(stmt):
+    """
+    Return pair *(setup, stmt)* for timing *stmt* as rewritten by
+    `betwixt.compiler`, or ``None`` if that is not supported.
+    """
+    try:
+        import ast
+        from betwixt.compiler import rewrite
+        unparse = ast.unparse
+    except (ImportError, AttributeError, SyntaxError):
+        return None
+    tree = rewrite(ast.parse(stmt), operators=['op'])
+    setup = [node for node in tree.body if isinstance(node, ast.ImportFrom)]
+    body = [node for node in tree.body if not isinstance(node, ast.ImportFrom)]
+    return ('\n'.join(unparse(node) for node in setup),
+            '; '.join(unparse(node) for node in body))
+
+
+def measure(delimiter, op, operands, lazy, number, repeat, alloc_number):
+    """
+    Return a dictionary of measurements for ``x OP y``.
+
+    If *lazy* is true, measure ``list(x OP y)`` instead.
+    """
+    f = op._op
+    k = len(operands)
+    namespace = {'op': op, 'f': f}
+    for j, (x, y) in enumerate(operands):
+        namespace['x' + str(j)] = x
+        namespace['y' + str(j)] = y
+    infix_ns, direct_ns = _time_per_op(
+        ['; '.join(_instantiate(_EXPRESSION[delimiter], j, lazy) for j in range(k)),
+         '; '.join(_instantiate('f(x, y)', j, lazy) for j in range(k))],
+        namespace, number, repeat)
+    result = {
+        'infix_ns': infix_ns / k,
+        'direct_ns': direct_ns / k,
+        'ratio': infix_ns / direct_ns,
+    }
+    compiled = _compiled_statement(
+        '; '.join(_instantiate(_EXPRESSION[delimiter], j, lazy) for j in range(k)))
+    if compiled is not None:
+        setup, stmt = compiled
+        timer = timeit.Timer(stmt, setup, globals=namespace)
+        result['compiled_ns'] = (
+            1e9 * min(timer.repeat(repeat=repeat, number=number)) / number / k)
+    if tracemalloc is not None and platform.python_implementation() == 'CPython':
+        first, second = _STAGES[delimiter]
+        infix = _compile_loop([
+            'p = ' + _instantiate(first, '{j}'),
+            'parts[i+{j}] = p',
+            'results[i+{j}] = ' + _instantiate(second, '{j}', lazy),
+        ], k)
+        direct = _compile_loop(
+            ['results[i+{j}] = ' + _instantiate('f(x, y)', '{j}', lazy)], k)
+        infix_allocs = _count_allocations(infix, alloc_number, op, f, operands)
+        direct_allocs = _count_allocations(direct, alloc_number, op, f, operands)
+        result.update({
+            'blocks': infix_allocs[0] - direct_allocs[0],
+            'bytes': infix_allocs[1] - direct_allocs[1],
+            'gc_objects': infix_allocs[2] - direct_allocs[2],
+        })
+    return result
+
+
+## baseline handling
+
+def baseline_key():
+    """
+    Return key for looking up baseline values for the running interpreter.
+    """
+    return '{0}-{1}.{2}'.format(
+        platform.python_implementation(), *sys.version_info[:2])
+
+
+def check_regressions(results, baseline, tolerance, alloc_tolerance):
+    """
+    Return list of human-readable regression descriptions.
+    """
+    regressions = []
+    for name, values in sorted(results.items()):
+        if name not in baseline:
+            continue
+        reference = baseline[name]
+        if tolerance is not None and 'ratio' in reference:
+            limit = reference['ratio'] * (1 + tolerance)
+            if values['ratio'] > limit:
+                regressions.append(
+                    "{0}: infix/direct time ratio {1:.2f} exceeds {2:.2f}"
+                    .format(name, values['ratio'], limit))
+        for metric in 'blocks', 'gc_objects':
+            if metric in reference and metric in values:
+                limit = reference[metric] + alloc_tolerance
+                if values[metric] > limit:
+                    regressions.append(
+                        "{0}: {1} per application {2:.2f} exceeds {3:.2f}"
+                        .format(name, metric, values[metric], limit))
+    return regressions
+
+
+def _fmt(value, fmt):
+    return 'n/a' if value is None else format(value, fmt)
+
+
+def report(results, out=sys.stdout):
+    header = ('{0:<45} {1:>9} {2:>9} {3:>7} {4:>7} {5:>8} {6:>6} {7:>11}'
+              .format('benchmark', 'infix ns', 'direct ns', 'ratio',
+                      'blocks', 'bytes', 'gc', 'compiled ns'))
+    print(header, file=out)
+    print('-' * len(header), file=out)
+    for name, values in sorted(results.items()):
+        print('{0:<45} {1:>9} {2:>9} {3:>7} {4:>7} {5:>8} {6:>6} {7:>11}'.format(
+            name,
+            _fmt(values['infix_ns'], '.1f'),
+            _fmt(values['direct_ns'], '.1f'),
+            _fmt(values['ratio'], '.2f'),
+            _fmt(values.get('blocks'), '.2f'),
+            _fmt(values.get('bytes'), '.1f'),
+            _fmt(values.get('gc_objects'), '.2f'),
+            _fmt(values.get('compiled_ns'), '.1f'),
+        ), file=out)
+
+
+## main
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().split('\n')[0])
+    parser.add_argument(
+        '--baseline', metavar='FILE',
+        help="Compare results against baseline values stored in FILE.")
+    parser.add_argument(
+        '--update-baseline', action='store_true', default=False,
+        help="Store results as the new baseline for the running interpreter.")
+    parser.add_argument(
+        '--tolerance', type=float, default=None,
+        help=("Also check that the infix/direct time ratio does not"
+              " increase by more than this fraction (default: only check"
+              " allocations; timings are too noisy on shared machines)."))
+    parser.add_argument(
+        '--require-baseline', action='store_true', default=False,
+        help=("Fail if the baseline has no values for the running"
+              " interpreter, instead of skipping the comparison."))
+    parser.add_argument(
+        '--alloc-tolerance', type=float, default=0.1,
+        help=("Maximum allowed absolute increase of allocated blocks and"
+              " GC-tracked objects per application, to absorb rounding"
+              " (default: %(default)s)."))
+    parser.add_argument(
+        '--number', type=int, default=100000,
+        help="Applications per timing run (default: %(default)s).")
+    parser.add_argument(
+        '--repeat', type=int, default=7,
+        help="Timing runs per benchmark; the best is taken (default: %(default)s).")
+    parser.add_argument(
+        '--alloc-number', type=int, default=10000,
+        help="Applications per allocation count (default: %(default)s).")
+    parser.add_argument(
+        '-k', '--select', metavar='PATTERN', default='*',
+        help="Only run benchmarks whose name matches glob PATTERN.")
+    args = parser.parse_args(argv)
+
+    results = {}
+    for name, delimiter, op, operands, lazy in collect_benchmarks():
+        if not fnmatch.fnmatchcase(name, args.select):
+            continue
+        results[name] = measure(delimiter, op, operands, lazy,
+                                args.number, args.repeat, args.alloc_number)
+    print("# {0} {1}".format(baseline_key(), sys.version.split()[0]))
+    report(results)
+
+    if args.baseline is None:
+        return 0
+
+    key = baseline_key()
+    try:
+        with open(args.baseline) as stream:
+            baselines = json.load(stream)
+    except IOError:
+        baselines = {}
+    if args.update_baseline:
+        baselines.setdefault(key, {}).update(
+            (name, dict((metric, round(value, 3))
+                        for metric, value in values.items()))
+            for name, values in results.items())
+        with open(args.baseline, 'w') as stream:
+            json.dump(baselines, stream, indent=2, sort_keys=True)
+            stream.write('\n')
+        print("\nBaseline for {0} written to {1}".format(key, args.baseline))
+        return 0
+    if key not in baselines:
+        print("\nWARNING: No baseline for {0} in {1}; nothing to compare."
+              " Record one with --update-baseline."
+              .format(key, args.baseline))
+        return 1 if args.require_baseline else 0
+    regressions = check_regressions(
+        results, baselines[key], args.tolerance, args.alloc_tolerance)
+    if regressions:
+        print("\nREGRESSIONS (vs. baseline {0}):".format(key))
+        for line in regressions:
+            print("  " + line)
+        return 1
+    print("\nNo regressions vs. baseline {0}.".format(key))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
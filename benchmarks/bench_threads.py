@@ -0,0 +1,225 @@
+#! /usr/bin/env python
+#
+"""
+Measure the throughput of `betwixt` infix operators applied by many threads.
+
+Every thread applies the same operator object, ``x |op| y``, to its
+own operands in a tight loop; the benchmark reports the total number
+of applications per second for an increasing number of threads, and
+the scaling efficiency, i.e., the throughput with *n* threads divided
+by *n* times the throughput with one thread.
+
+On CPython builds with the GIL, threads run Python code one at a
+time and the efficiency decreases as ``1/n``; on free-threaded builds
+(3.13+ with the GIL disabled) it should stay close to 1, up to the
+number of available cores.  Any state shared by all applications of an
+operator (e.g., a lock, or a counter updated by every thread) shows up
+as an efficiency well below 1.
+
+Option ``--min-efficiency`` makes the script exit with a non-zero
+status if the efficiency with the largest number of threads falls
+below the given value; it is only checked on free-threaded builds.
+"""
+# Copyright (C) 2016-2020 Riccardo Murri <riccardo.murri@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# make coding more python3-ish, must be the first statement
+from __future__ import (absolute_import, division, print_function)
+
+import argparse
+import fnmatch
+import os
+import sys
+import threading
+import time
+
+import betwixt
+import betwixt.examples
+
+
+## benchmark definitions
+
+def _second(lhs, rhs):
+    # pylint: disable=unused-argument
+    return rhs
+
+
+def collect_benchmarks():
+    """
+    Return list of ``(name, setup, op, operands)`` tuples to measure.
+
+    Function *setup* is called (with no arguments) before measuring,
+    and returns a function to call afterwards to undo it.  Thread *n*
+    applies *op* to the pair ``operands(n)``.
+    """
+    def nothing():
+        return lambda: None
+
+    def stats():
+        betwixt.enable_stats()
+
+        def undo():
+            betwixt.disable_stats()
+            betwixt.reset_stats()
+        return undo
+
+    def numbers(n):
+        return (n, n + 1)
+
+    return [
+        ('operator', nothing, betwixt.infix_operator('|', _second), numbers),
+        ('operator[specialized]', nothing,
+         betwixt.infix_operator('|', _second, specialize=True), numbers),
+        ('operator[cache]', nothing,
+         betwixt.infix_operator('|', _second, cache=1024), numbers),
+        ('operator[cache,identity]', nothing,
+         betwixt.infix_operator('|', _second, cache=1024, cache_key='identity'),
+         numbers),
+        ('operator[stats]', stats, betwixt.infix_operator('|', _second), numbers),
+        ('examples:contains_indexed', nothing, betwixt.examples.contains_indexed,
+         lambda n: (tuple(range(100)), n)),
+    ]
+
+
+## measurement
+
+def _run(op, lhs, rhs, number):
+    for _ in range(number):
+        lhs |op| rhs
+
+
+def throughput(op, operands, nthreads, number):
+    """
+    Return applications per second of *op* by *nthreads* threads.
+
+    Each thread applies *op* *number* times; all threads are started
+    together and the time is measured until the last one is done.
+    """
+    barrier = threading.Barrier(nthreads + 1)
+
+    def worker(n):
+        lhs, rhs = operands(n)
+        barrier.wait()
+        _run(op, lhs, rhs, number)
+    threads = [threading.Thread(target=worker, args=(n,))
+               for n in range(nthreads)]
+    for thread in threads:
+        thread.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    return nthreads * number / elapsed
+
+
+def measure(op, operands, thread_counts, number, repeat):
+    """
+    Return mapping of thread count to best throughput over *repeat* runs.
+    """
+    # warm up caches (and the specializing interpreter)
+    throughput(op, operands, 1, number // 10 or 1)
+    return dict(
+        (nthreads, max(throughput(op, operands, nthreads, number)
+                       for _ in range(repeat)))
+        for nthreads in thread_counts)
+
+
+def _gil_enabled():
+    return getattr(sys, '_is_gil_enabled', lambda: True)()
+
+
+def report(results, thread_counts, out=sys.stdout):
+    header = '{0:<30} {1}'.format('benchmark', ' '.join(
+        '{0:>16}'.format('{0} thr Mops/s'.format(n)) for n in thread_counts))
+    print(header, file=out)
+    print('-' * len(header), file=out)
+    for name, values in sorted(results.items()):
+        single = values[thread_counts[0]] / thread_counts[0]
+        print('{0:<30} {1}'.format(name, ' '.join(
+            '{0:>16}'.format('{0:.2f} ({1:.0%})'.format(
+                values[n] / 1e6, values[n] / (n * single)))
+            for n in thread_counts)), file=out)
+    print("\n(scaling efficiency vs. {0} thread(s) in parentheses)"
+          .format(thread_counts[0]), file=out)
+
+
+## main
+
+def _cpu_count():
+    try:
+        return len(os.sched_getaffinity(0))
+    except AttributeError:
+        return os.cpu_count() or 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description=__doc__.strip().split('\n')[0])
+    parser.add_argument(
+        '--max-threads', type=int, default=_cpu_count(),
+        help="Largest number of threads to run (default: %(default)s).")
+    parser.add_argument(
+        '--number', type=int, default=200000,
+        help="Applications per thread and run (default: %(default)s).")
+    parser.add_argument(
+        '--repeat', type=int, default=3,
+        help="Runs per thread count; the best is taken (default: %(default)s).")
+    parser.add_argument(
+        '--min-efficiency', type=float, default=None,
+        help=("Fail if the scaling efficiency with the largest number of"
+              " threads is below this value (free-threaded builds only)."))
+    parser.add_argument(
+        '-k', '--select', metavar='PATTERN', default='*',
+        help="Only run benchmarks whose name matches glob PATTERN.")
+    args = parser.parse_args(argv)
+
+    thread_counts = [1]
+    while thread_counts[-1] * 2 <= args.max_threads:
+        thread_counts.append(thread_counts[-1] * 2)
+    if thread_counts[-1] != args.max_threads:
+        thread_counts.append(args.max_threads)
+
+    results = {}
+    for name, setup, op, operands in collect_benchmarks():
+        if not fnmatch.fnmatchcase(name, args.select):
+            continue
+        undo = setup()
+        try:
+            results[name] = measure(
+                op, operands, thread_counts, args.number, args.repeat)
+        finally:
+            undo()
+    print("# {0} {1}, GIL {2}, {3} CPU(s)".format(
+        sys.implementation.name, sys.version.split()[0],
+        'enabled' if _gil_enabled() else 'disabled', _cpu_count()))
+    report(results, thread_counts)
+
+    if args.min_efficiency is None or _gil_enabled():
+        return 0
+    nthreads = thread_counts[-1]
+    failures = [
+        name for name, values in sorted(results.items())
+        if values[nthreads] < args.min_efficiency * nthreads * values[1]]
+    if failures:
+        print("\nScaling efficiency with {0} threads below {1:.0%}: {2}"
+              .format(nthreads, args.min_efficiency, ', '.join(failures)))
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
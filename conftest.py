@@ -0,0 +1,16 @@
+#
+# Configuration of test collection for `pytest`
+#
+
+import sys
+
+
+collect_ignore = []
+
+# `async def` needs Python 3.5+, and tests and doctests of coroutine
+# operators run them with `asyncio.run`, new in Python 3.7
+if sys.version_info < (3, 7):
+    collect_ignore += [
+        'src/betwixt/aio.py',
+        'tests/test_aio.py',
+    ]
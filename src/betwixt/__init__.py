@@ -24,6 +24,25 @@ Inspired by http://code.activestate.com/recipes/384122-infix-operators/
 # make coding more python3-ish, must be the first statement
 from __future__ import (absolute_import, division, print_function)
 
+from itertools import starmap as _starmap
+import os
+import sys
+
+try:
+    # the `weakref` module proper takes a while to import, and we
+    # only need this
+    from _weakref import ref as _weakref
+except ImportError:
+    from weakref import ref as _weakref
+
+try:
+    # likewise, avoid importing `functools` for its C-coded `partial`
+    from _functools import partial as _partial
+except ImportError:
+    from functools import partial as _partial
+
+from .lazy import Var, evaluate, evaluate_many, _make_lazy
+
 
 ## module metadata
 __version__ = '1.0.0'
@@ -33,7 +52,16 @@ __version__ = '1.0.0'
 
 __all__ = [
     'betwixt',
+    'compile_module',
+    'disable_stats',
+    'enable_stats',
+    'evaluate',
+    'evaluate_many',
     'infix_operator',
+    'reset_stats',
+    'Section',
+    'stats',
+    'Var',
     # just in case some masochist wants to access these directly ...
     'DoubleStarDelimitedInfixOperator',
     'StarDelimitedInfixOperator',
@@ -48,28 +76,513 @@ __all__ = [
 
 ## "maker" code
 
+_new_object = object.__new__
+
+
+# On free-threaded CPython builds (3.13+, with the GIL disabled) many
+# threads can apply the same operator at the same time, each on its own
+# CPU: data written by every application of an operator would then
+# bounce between the CPUs' caches, so the code running applications
+# must not write to any object shared across threads.
+_FREE_THREADED = not getattr(sys, '_is_gil_enabled', lambda: True)()
+
+
+# `inspect` takes a long time to import: these are the checks that
+# `inspect.iscoroutinefunction` makes, for functions, methods and
+# `functools.partial` objects
+_CO_COROUTINE = 0x0080 if sys.version_info >= (3, 5) else 0
+
+
+def _iscoroutinefunction(func):
+    # if `functools` has not been imported, there can be no partials
+    functools = sys.modules.get('functools')
+    while True:
+        if functools is not None and isinstance(func, functools.partial):
+            func = func.func
+        elif hasattr(func, '__func__'):
+            func = func.__func__
+        else:
+            break
+    code = getattr(func, '__code__', None)
+    return code is not None and bool(code.co_flags & _CO_COROUTINE)
+
+
+# All operators created so far, as a mapping from `id()` to a weak
+# reference, for `betwixt.instrument`.
+_operators = {}
+
+
+# Set by `betwixt.instrument.enable_stats()` to the function that
+# starts collecting statistics on an operator; when set, it is called
+# on each new operator.
+_instrument_new = None
+
+
 class _BaseInfixOperator(object):
-    __slots__ = ['_op']
+    # operators are weak-referenceable so they can be tracked in
+    # `_operators`; partial operations are not
+    __slots__ = ['_op', '_bind', '_batch', '_name', '_func', '_options',
+                 '__weakref__']
+
+    # Tell NumPy not to handle arithmetic with operators and partial
+    # operations itself, but to defer to our reflected methods: without
+    # this, ``array |op| y`` would broadcast ``ndarray.__or__`` over
+    # ``op``, building an object array of partial operations.  (Older
+    # NumPy versions only look at `__array_priority__`.)
+    __array_ufunc__ = None
+    __array_priority__ = 1000
 
     def __init__(self, func):
+        # function and `infix_operator` options to pickle the operator
+        # by value, see `__reduce__`
+        self._func = func
+        self._options = None
+        if _iscoroutinefunction(func):
+            func = _make_async(func)
         self._op = func
+        # functions precomputing sections, see `left` and `right`
+        self._bind = _NO_BIND
+        # batch implementation, see `batch`
+        self._batch = None
+        # name to pickle the operator by, see `__reduce__`
+        self._name = None
+        key = id(self)
+        # bind `_operators` too: module globals may already be cleared
+        # when operators are collected at interpreter shutdown
+        _operators[key] = _weakref(
+            self, lambda _, key=key, ops=_operators: ops.pop(key, None))
+        if _instrument_new is not None:
+            _instrument_new(self)
+
+    def left(self, lhs):
+        """
+        Return operator section with *lhs* bound as the left operand.
+
+        The section is a function of the right operand: calling it on
+        *rhs* gives the result of applying the operator to *lhs* and
+        *rhs* (e.g., ``lhs |op| rhs``), at the cost of a single call.
+        Sections can be re-used, and passed to `map`, `filter` & co.::
+
+          >>> from betwixt.examples import contains
+          >>> list(map(contains.left('haystack'), ['hay', 'needle']))
+          [True, False]
+
+        If the operator was made with the *bind_left* option of
+        `infix_operator`, per-operand work (e.g., building an index of
+        *lhs*) is done here, once for all calls of the section.
+        """
+        bind = self._bind[0]
+        prepared = bind(lhs) if bind is not None else None
+        if prepared is not None:
+            return Section(self, 'left', lhs, prepared)
+        return Section(self, 'left', lhs, self._op, lhs)
+
+    def right(self, rhs):
+        """
+        Return operator section with *rhs* bound as the right operand.
+
+        The section is a function of the left operand: calling it on
+        *lhs* gives the result of applying the operator to *lhs* and
+        *rhs*::
+
+          >>> from betwixt.examples import matches
+          >>> list(filter(matches.right('*.txt'), ['a.txt', 'b.png']))
+          ['a.txt']
+
+        If the operator was made with the *bind_right* option of
+        `infix_operator`, per-operand work (e.g., compiling a pattern)
+        is done here, once for all calls of the section.
+        """
+        bind = self._bind[1]
+        prepared = bind(rhs) if bind is not None else None
+        if prepared is not None:
+            return Section(self, 'right', rhs, prepared)
+        return Section(self, 'right', rhs, _call_flipped, self._op, rhs)
+
+    def map(self, lhs, rhs):
+        """
+        Return list of results of applying the operator to items in pairs.
+
+        Item *n* of the result is the operator applied to item *n* of
+        iterable *lhs* and item *n* of iterable *rhs*; the shortest
+        iterable determines the number of results, as with `zip`::
+
+          >>> from betwixt.examples import matches
+          >>> matches.map(['a.txt', 'b.png'], ['*.txt', '*.txt'])
+          [True, False]
+
+        The wrapped function is called directly (or the batch
+        implementation, if one was registered with `batch`), without
+        going through the infix syntax.
+        """
+        batch = self._batch
+        if batch is None:
+            return list(map(self._op, lhs, rhs))
+        lhs = list(lhs)
+        rhs = list(rhs)
+        count = min(len(lhs), len(rhs))
+        del lhs[count:]
+        del rhs[count:]
+        return _apply_batch(batch, lhs, rhs)
+
+    def starmap(self, pairs):
+        """
+        Return list of results of applying the operator to each pair.
+
+        Each item of iterable *pairs* is a ``(lhs, rhs)`` pair of
+        operands; see `map`.
+        """
+        batch = self._batch
+        if batch is None:
+            return list(_starmap(self._op, pairs))
+        pairs = list(pairs)
+        return _apply_batch(batch, [lhs for lhs, _ in pairs], [rhs for _, rhs in pairs])
+
+    def outer(self, lhs, rhs):
+        """
+        Return table of results of applying the operator to all pairs.
+
+        The result is a list with a row for each item in *lhs*, and
+        each row is the list of results of applying the operator to
+        that item and each item in *rhs*::
+
+          >>> from betwixt.examples import matches
+          >>> matches.outer(['a.txt', 'b.png'], ['*.txt', 'b.*'])
+          [[True, False], [False, True]]
+
+        The wrapped function (or the batch implementation registered
+        with `batch`) is called directly, once for each pair.
+        """
+        if not isinstance(rhs, (list, tuple)):
+            rhs = list(rhs)
+        batch = self._batch
+        if batch is None:
+            func = self._op
+            return [list(map(_partial(func, item), rhs)) for item in lhs]
+        lhs = list(lhs)
+        width = len(rhs)
+        if width == 0:
+            return [[] for _ in lhs]
+        results = _apply_batch(
+            batch, [item for item in lhs for _ in range(width)], list(rhs) * len(lhs))
+        return [results[start:start + width]
+                for start in range(0, len(results), width)]
+
+    def batch(self, kernel):
+        """
+        Register *kernel* as the batch implementation of the operator.
+
+        Methods `map`, `starmap` and `outer` then call *kernel* once
+        with two sequences of the same length, of left and right
+        operands, instead of calling the wrapped function on each pair;
+        *kernel* must return a sequence (or an iterable) with the
+        result for each pair.  Applications with the infix syntax
+        still call the wrapped function.
+
+        Return *kernel*, so this method can be used as a decorator::
+
+          @op.batch
+          def op_kernel(lhs, rhs):
+              ...
+
+        Calling ``op.batch(None)`` removes the batch implementation.
+        """
+        self._batch = kernel
+        return kernel
+
+    def register(self, lhs_type, rhs_type, func=None):
+        """
+        Register *func* as implementation for operands of the given types.
+
+        Applying the operator to a left operand of class *lhs_type* (or
+        a subclass) and a right operand of class *rhs_type* (or a
+        subclass), as told by `type()`, then calls *func* instead of
+        the wrapped function, which stays the implementation for all
+        other operands (as if registered for ``(object, object)``).
+        If several registered pairs match, the one where both types are
+        the most specific is used (when there is none, e.g., for
+        ``(int, object)`` and ``(object, int)``, applying the operator
+        raises `TypeError`).  The choice is made once for each pair of
+        operand classes, and remembered::
+
+          >>> op = infix_operator('|', lambda lhs, rhs: 'any')
+          >>> @op.register(int, object)
+          ... def _(lhs, rhs):
+          ...     return 'int'
+          >>> [1 |op| 'x', True |op| 'x', 'x' |op| 1]
+          ['int', 'int', 'any']
+
+        If *func* is not given, return a decorator registering the
+        decorated function.  Registered implementations are called as
+        they are: the *cache*, *vectorize* and *lazy* options of
+        `infix_operator` only apply to the wrapped function.
+        """
+        if func is None:
+            def decorate(fn):
+                return self.register(lhs_type, rhs_type, fn)
+            return decorate
+        dispatcher = self._dispatcher(create=True)
+        dispatcher.registry[lhs_type, rhs_type] = func
+        dispatcher.dispatch_cache.clear()
+        return func
+
+    def dispatch(self, lhs_type, rhs_type):
+        """
+        Return the function called on operands of the given classes.
+
+        See `register`.
+        """
+        dispatcher = self._dispatcher()
+        if dispatcher is None:
+            return self._op
+        return _dispatch(dispatcher.registry, lhs_type, rhs_type)
+
+    def _dispatcher(self, create=False):
+        # the dispatcher may be wrapped, e.g., when collecting statistics
+        func = self._op
+        while func is not None:
+            if getattr(func, 'dispatch_cache', None) is not None:
+                return func
+            func = getattr(func, '__wrapped__', None)
+        if not create:
+            return None
+        # stop collecting statistics while `_op` is replaced
+        instrument = sys.modules.get(__name__ + '.instrument')
+        instrumented = instrument is not None and self in instrument._saved
+        if instrumented:
+            instrument._uninstrument(self)
+        dispatcher = self._op = _make_dispatcher(self._op)
+        # specialized classes bind the original function in their code;
+        # replace them (and the generic operator classes, but not any
+        # other subclass) with one looking implementations up directly
+        cls = getattr(self.__class__, '_specialized_from', self.__class__)
+        for delimiter, generic in _delimiter_to_class.items():
+            if cls is generic:
+                self.__class__ = _make_specialized_class(
+                    delimiter, dispatcher, dispatcher.dispatch_cache)
+                break
+        if instrumented:
+            instrument._instrument(self)
+        return dispatcher
+
+    def cache_info(self):
+        """
+        Return hits, misses, maximum and current size of the result cache.
+
+        Raise `TypeError` if the operator was not made with the *cache*
+        option of `infix_operator`.
+        """
+        return self._cached_function().cache_info()
+
+    def cache_clear(self):
+        """
+        Empty the result cache and reset its statistics.
+
+        Raise `TypeError` if the operator was not made with the *cache*
+        option of `infix_operator`.
+        """
+        self._cached_function().cache_clear()
+
+    def _cached_function(self):
+        # the cache may be wrapped in other layers, e.g., vectorization
+        func = self._op
+        while not hasattr(func, 'cache_clear'):
+            func = getattr(func, '__wrapped__', None)
+            if func is None:
+                raise TypeError("Operator results are not cached;"
+                                " use `infix_operator(..., cache=...)`")
+        return func
+
+    def __reduce__(self):
+        # Operators are pickled by reference when possible, like
+        # functions and classes: by the *name* given to
+        # `infix_operator`, or by the name of the function they were
+        # made from.  Otherwise, the function the operator was made
+        # from is pickled (not `_op`, which may be a wrapper made by
+        # an option, or replaced by `register`), along with the options
+        # and registered implementations needed to make it again.
+        name = _operator_name(self)
+        if name is not None:
+            return (_operator_named, (name,))
+        cls = getattr(self.__class__, '_specialized_from', self.__class__)
+        registered = ()
+        dispatcher = self._dispatcher()
+        if dispatcher is not None:
+            registered = tuple(
+                (lhs_type, rhs_type, func)
+                for (lhs_type, rhs_type), func in dispatcher.registry.items()
+                if (lhs_type, rhs_type) != (object, object)
+                or func is not dispatcher.__wrapped__)
+        args = (cls, self._func, self._options, registered, self._batch)
+        while len(args) > 2 and args[-1] in (None, ()):
+            args = args[:-1]
+        return (_make_operator, args)
+
+
+# no section functions, see `_BaseInfixOperator.left` and `right`
+_NO_BIND = (None, None)
+
+
+def _call_flipped(func, rhs, lhs):
+    return func(lhs, rhs)
+
+
+def _mro_distance(cls, base):
+    mro = getattr(cls, '__mro__', (cls, object))
+    try:
+        return mro.index(base)
+    except ValueError:
+        # virtual base class, e.g., registered with an ABC: less
+        # specific than any real base class but `object`
+        return len(mro) - 1.5
+
+
+def _dispatch(registry, lhs_type, rhs_type):
+    """
+    Return implementation in *registry* for operands of the given classes.
+
+    Keys of *registry* are pairs of classes, and values are functions;
+    among the pairs matching the operand classes, pick the one whose
+    classes are both closest to the operand classes in their MRO.
+    Raise `TypeError` if there is no such pair.
+    """
+    matching = [
+        ((_mro_distance(lhs_type, left), _mro_distance(rhs_type, right)),
+         (left, right))
+        for left, right in registry
+        if issubclass(lhs_type, left) and issubclass(rhs_type, right)]
+    if not matching:
+        return registry[object, object]
+    best = [
+        (rank, types) for rank, types in matching
+        if not any(other[0] <= rank[0] and other[1] <= rank[1] and other != rank
+                   for other, _ in matching)]
+    if len(best) > 1:
+        raise TypeError(
+            "Ambiguous implementations for operands of types {0} and {1}: {2}"
+            .format(lhs_type.__name__, rhs_type.__name__, ', '.join(
+                '({0}, {1})'.format(left.__name__, right.__name__)
+                for _, (left, right) in sorted(best, key=lambda item: item[0]))))
+    return registry[best[0][1]]
+
+
+def _make_dispatcher(default):
+    """
+    Return function calling *default*, or the implementation registered
+    for the classes of the operands.
+
+    The returned function has attributes `registry`, mapping pairs of
+    classes to implementations (see `_dispatch`), and `dispatch_cache`,
+    mapping the class of the left operand to a mapping from the class of
+    the right operand to the chosen implementation, which must be
+    cleared whenever `registry` changes.
+    """
+    registry = {(object, object): default}
+    # nested mappings are faster to look up than a tuple of classes
+    cache = {}
+
+    def dispatch(lhs, rhs):
+        try:
+            func = cache[type(lhs)][type(rhs)]
+        except KeyError:
+            func = None
+        if func is None:
+            func = _dispatch(registry, type(lhs), type(rhs))
+            cache.setdefault(type(lhs), {})[type(rhs)] = func
+        return func(lhs, rhs)
+    dispatch.registry = registry
+    dispatch.dispatch_cache = cache
+    dispatch.__wrapped__ = default
+    dispatch.__doc__ = getattr(default, '__doc__', None)
+    return dispatch
+
+
+def _apply_batch(kernel, lhs, rhs):
+    """
+    Return list of results of calling batch *kernel* on operands *lhs* and *rhs*.
+    """
+    results = list(kernel(lhs, rhs))
+    if len(results) != len(lhs):
+        raise ValueError(
+            "Batch implementation returned {0} results for {1} pairs of operands"
+            .format(len(results), len(lhs)))
+    return results
+
+
+class Section(_partial):
+    """
+    Infix operator with one operand bound.
+
+    Sections are made by methods `left` and `right` of operators;
+    calling a section on the other operand applies the operator.
+    Attributes `operator`, `side` (``'left'`` or ``'right'``) and
+    `operand` tell how the section was made.
+    """
+    __slots__ = ()
+
+    def __new__(cls, operator, side, operand, func, *args):
+        # pylint: disable=arguments-differ
+        self = _partial.__new__(cls, func, *args)
+        self.operator = operator
+        self.side = side
+        self.operand = operand
+        return self
+
+    def __repr__(self):
+        return '<Section {0} of {1!r} with {2!r}>'.format(
+            self.side, self.operator, self.operand)
+
+    def __reduce__(self):
+        # the section function may be a closure made by the *bind_left*
+        # or *bind_right* hook: make it again when unpickling
+        return (_make_section, (self.operator, self.side, self.operand))
 
 
 class _BasePartialOperation(object):
+    __slots__ = ['_op', '_lhs']
+
+    __array_ufunc__ = None
+    __array_priority__ = 1000
+
     def __init__(self, op, lhs):
         self._op = op
         self._lhs = lhs
 
+    def __reduce__(self):
+        return (_make_partial_operation, (_operator_of(self), self._lhs))
+
+
+# Each application creates a new partial operation: slotted and
+# without a `__dict__`, it's a single small allocation.  Operators do
+# not keep the last one around for re-use with the same left operand,
+# as that would keep the operand alive as long as the operator (e.g.,
+# forever for module-level operators), and, on free-threaded builds,
+# make every application write to the shared operator object.  Partial
+# operations are also callable, on the missing operand, so that
+# ``lhs |op`` can be passed as a function.
+
+
+def _class_body(cls):
+    """
+    Return copy of *cls*' namespace, suitable for building a slotted class.
+    """
+    body = dict(cls.__dict__)
+    body.pop('__dict__', None)
+    body.pop('__weakref__', None)
+    body['__slots__'] = ()
+    return body
+
 
 def _make_partial_operation_class(method):
     def make(cls):
         name = cls.__name__
         bases = (_BasePartialOperation,)
-        body = dict(cls.__dict__)
+        body = _class_body(cls)
 
         def stage1(self, rhs):
             return self._op(self._lhs, rhs)
         body[method] = stage1
+        body['__call__'] = stage1
 
         return type(name, bases, body)
     return make
@@ -79,15 +592,21 @@ def _make_infix_operator_class(lmeth, rmeth):
     def make(cls):
         name = cls.__name__
         bases = (_BaseInfixOperator,)
-        body = dict(cls.__dict__)
+        body = _class_body(cls)
 
         @_make_partial_operation_class(rmeth)
         class _PartialOperation:
             pass
+        # make it importable by name, as for the hand-written classes
+        _PartialOperation.__qualname__ = name + '._PartialOperation'
         body['_PartialOperation'] = _PartialOperation
+        body['_stage_methods'] = ((lmeth,), (rmeth,))
 
         def stage2(self, other):
-            return self._PartialOperation(self._op, other)
+            partial = _new_object(_PartialOperation)
+            partial._op = self._op
+            partial._lhs = other
+            return partial
         body[lmeth] = stage2
 
         return type(name, bases, body)
@@ -101,11 +620,18 @@ def _make_infix_operator_class(lmeth, rmeth):
 # explicitly write the code here, than extend the "maker" methods to
 # support this special case.
 class DoubleStarDelimitedInfixOperator(_BaseInfixOperator):
+    __slots__ = ()
+    _stage_methods = (('__pow__',), ('__rpow__',))
     class _PartialOperation(_BasePartialOperation):
+        __slots__ = ()
         def __rpow__(self, rhs):
             return self._op(rhs, self._lhs)
+        __call__ = __rpow__
     def __pow__(self, other):
-        return self._PartialOperation(self._op, other)
+        partial = _new_object(self._PartialOperation)
+        partial._op = self._op
+        partial._lhs = other
+        return partial
 
 
 @_make_infix_operator_class('__rmul__', '__mul__')
@@ -117,15 +643,21 @@ class StarDelimitedInfixOperator:
 # It's just simpler to explicitly write the code here, than extend the
 # "maker" methods to support this special case.
 class SlashDelimitedInfixOperator(_BaseInfixOperator):
+    __slots__ = ()
+    _stage_methods = (('__rdiv__', '__rtruediv__'), ('__div__', '__truediv__'))
     class _PartialOperation(_BasePartialOperation):
+        __slots__ = ()
         def __div__(self, rhs):
             return self._op(self._lhs, rhs)
         def __truediv__(self, rhs):
             return self._op(self._lhs, rhs)
+        __call__ = __truediv__
     def __rdiv__(self, other):
-        return self._PartialOperation(self._op, other)
-    def __rtruediv__(self, other):
-        return self._PartialOperation(self._op, other)
+        partial = _new_object(self._PartialOperation)
+        partial._op = self._op
+        partial._lhs = other
+        return partial
+    __rtruediv__ = __rdiv__
 
 @_make_infix_operator_class('__rfloordiv__', '__floordiv__')
 class DoubleSlashDelimitedInfixOperator:
@@ -163,20 +695,421 @@ _delimiter_to_class = {
     '|':  BarDelimitedInfixOperator,
 }
 
-def infix_operator(delimiter, *func):
+def _make_specialized_class(delimiter, func, dispatch_cache=None):
+    """
+    Return a subclass of the operator class for *delimiter*, with *func*
+    bound in the stage methods of the operator and partial operation.
+
+    If *func* is made by `_make_dispatcher`, pass its `dispatch_cache`
+    as well: the implementation for the operand classes is then looked
+    up in the stage method, saving the call to *func* itself.
+    """
+    cls = _delimiter_to_class[delimiter]
+    stage2_methods, stage1_methods = cls._stage_methods
+
+    if dispatch_cache is not None:
+        def apply(lhs, rhs):
+            try:
+                impl = dispatch_cache[type(lhs)][type(rhs)]
+            except KeyError:
+                impl = func
+            return impl(lhs, rhs)
+    else:
+        apply = func
+
+    # `apply` is inlined in the more common cases
+    if delimiter == '**':
+        # operands are bound in reverse order, see
+        # `DoubleStarDelimitedInfixOperator`
+        def stage1(self, rhs):
+            return apply(rhs, self._lhs)
+    elif dispatch_cache is not None:
+        def stage1(self, rhs):
+            lhs = self._lhs
+            try:
+                impl = dispatch_cache[type(lhs)][type(rhs)]
+            except KeyError:
+                impl = func
+            return impl(lhs, rhs)
+    else:
+        def stage1(self, rhs):
+            return func(self._lhs, rhs)
+    body = dict.fromkeys(stage1_methods + ('__call__',), stage1)
+    body['__slots__'] = ()
+    _PartialOperation = type('_PartialOperation', (cls._PartialOperation,), body)
+
+    def stage2(self, other):
+        partial = _new_object(_PartialOperation)
+        partial._op = func
+        partial._lhs = other
+        return partial
+    body = dict.fromkeys(stage2_methods, stage2)
+    body['__slots__'] = ()
+    body['_PartialOperation'] = _PartialOperation
+    # `betwixt.instrument` switches instrumented operators back to
+    # *cls*; `betwixt.compiler` looks this up in the class `__dict__`
+    # to tell specialized classes (where ``op._op(lhs, rhs)`` gives the
+    # same result as the infix application) from their subclasses
+    body['_specialized_from'] = cls
+    return type(cls.__name__, (cls,), body)
+
+
+def _vectorize(func, kernel):
     """
+    Return a function applying *kernel* if any operand is a NumPy array,
+    and *func* otherwise.
+
+    If *kernel* is ``True``, use ``numpy.frompyfunc(func, 2, 1)``.
+    NumPy is only looked up when it has already been imported by some
+    other module: if it has not, there can be no arrays around.
+    """
+    # resolved at the first call after NumPy has been imported; the
+    # pair is stored at once, so that concurrent calls either see
+    # both items or none
+    resolved = [None]
+
+    def vectorized(lhs, rhs):
+        entry = resolved[0]
+        if entry is None:
+            numpy = sys.modules.get('numpy')
+            if numpy is None:
+                return func(lhs, rhs)
+            entry = resolved[0] = (
+                numpy.ndarray,
+                numpy.frompyfunc(func, 2, 1) if kernel is True else kernel,
+            )
+        ndarray, batched = entry
+        if isinstance(lhs, ndarray) or isinstance(rhs, ndarray):
+            return batched(lhs, rhs)
+        return func(lhs, rhs)
+    vectorized.__wrapped__ = func
+    return vectorized
+
+
+def _make_async(func):
+    """
+    Return a function calling coroutine function *func* on awaited operands.
+
+    See module `betwixt.aio` for details.
+    """
+    # imported here since `betwixt.aio` is only valid Python 3 code
+    from .aio import _make_async as _make_async_
+    return _make_async_(func)
+
+
+## pickling
+
+# Operators made with ``infix_operator(..., name=...)``, by name.
+_named_operators = {}
+
+
+def _operator_name(op):
+    """
+    Return dotted name by which `_operator_named` finds *op*, or ``None``.
+
+    That's the *name* given to `infix_operator` or, as for functions,
+    the module and name of the function *op* was made from, provided
+    that it refers to *op* itself (e.g., when the operator was made by
+    decorating the function).  Other variables are not looked for,
+    since they may refer to another operator by the time the pickle
+    is loaded (e.g., a loop variable).
+    """
+    name = op._name
+    if name is not None:
+        return name
+    func = op._func
+    module = getattr(func, '__module__', None)
+    attr = getattr(func, '__name__', None)
+    if (module is not None and attr is not None
+            and getattr(sys.modules.get(module), attr, None) is op):
+        return module + '.' + attr
+    return None
+
+
+def _operator_named(name):
+    """
+    Return operator with the given dotted *name*, importing its module.
+    """
+    op = _named_operators.get(name)
+    if op is None:
+        module, _, attr = name.rpartition('.')
+        __import__(module)
+        op = _named_operators.get(name)
+        if op is None:
+            op = getattr(sys.modules[module], attr)
+    return op
+
+
+def _make_operator(cls, func, options=None, registered=(), batch=None):
+    """
+    Return operator of class *cls* wrapping *func*, as pickled by value.
+
+    If *options* is not ``None``, the operator is made by
+    `infix_operator` with these keyword arguments; then the
+    implementations in *registered*, a sequence of ``(lhs_type,
+    rhs_type, func)`` triples, are registered, and *batch* is set as
+    the batch implementation.
+    """
+    if options is None:
+        op = cls(func)
+    else:
+        for delimiter, generic in _delimiter_to_class.items():
+            if generic is cls:
+                op = infix_operator(delimiter, func, **options)
+                break
+    for lhs_type, rhs_type, impl in registered:
+        op.register(lhs_type, rhs_type, impl)
+    op._batch = batch
+    return op
+
+
+def _operator_of(partial):
+    """
+    Return operator which made partial operation *partial*.
+    """
+    # partial operations only refer to the function, so look for an
+    # operator wrapping it, whose partial operations are of the same
+    # kind (another operator may wrap the same function)
+    func = partial._op
+    for ref in list(_operators.values()):
+        op = ref()
+        if op is None or op._op is not func:
+            continue
+        cls = op.__class__
+        if isinstance(partial, getattr(cls, '_specialized_from', cls)._PartialOperation):
+            return op
+    raise TypeError("cannot pickle partial operation {0!r}:"
+                    " the operator that made it is gone or was changed"
+                    .format(partial))
+
+
+def _make_partial_operation(op, operand):
+    """
+    Return partial operation of *op* with *operand* bound.
+    """
+    # i.e., ``operand |op`` (or ``op ** operand``)
+    return getattr(op, op._stage_methods[0][0])(operand)
+
+
+def _make_section(op, side, operand):
+    """
+    Return section of *op* with *operand* bound on *side*.
+    """
+    return getattr(op, side)(operand)
+
+
+def infix_operator(delimiter, *func, **options):
+    """
+    Make a function of two arguments into an infix operator.
+
+    The *delimiter* is the Python operator that goes on both sides of
+    the operator name, e.g., ``'|'`` for ``lhs |op| rhs``; it can be
+    one of ``**``, ``*``, ``/``, ``//``, ``+``, ``<<`` (which pairs with
+    ``>>`` on the right side), ``^``, or ``|``.  If *func* is given,
+    return the operator wrapping it; otherwise, return a decorator that
+    turns a function into an operator.
+
+    The following keyword arguments are supported:
+
+    *specialize*
+      If true, generate a dedicated operator class (and partial
+      operation class) for *func*, where *func* is referenced directly
+      by the code implementing the infix syntax instead of being looked
+      up on the operator instance at each application.  This makes
+      applications slightly faster, at the cost of creating two new
+      classes per operator.
+
+    *vectorize*
+      If either operand is a NumPy array, apply a batched kernel to the
+      operands instead of *func*.  If *vectorize* is ``True``, the
+      kernel is ``numpy.frompyfunc(func, 2, 1)`` (which returns arrays
+      of ``object`` type); otherwise *vectorize* is the kernel itself,
+      e.g., a NumPy ufunc, and is called with the two operands.
+      Operands that are not arrays are passed to *func* as usual.
+
+    *lazy*
+      If true, applying the operator does not call *func*, but returns
+      an expression node to be computed later by `evaluate` or
+      `evaluate_many`; see module `betwixt.lazy` for details.
+
+    *pure*
+      Declare that *func* has no side effects and that its result only
+      depends on the operands.  Lazy evaluation can then compute
+      identical subexpressions only once, and remember the value of
+      constant subexpressions.
+
+    *cache*
+      If true, remember the result of *func* for given operands and
+      return it when the operator is applied to the same operands
+      again.  If *cache* is an integer, keep at most that many results,
+      discarding the least recently used ones first; if it is
+      ``True``, keep all of them.  Operators made with this option have
+      methods `cache_info()` and `cache_clear()`; see module
+      `betwixt.cache` for details.
+
+    *cache_ttl*
+      Discard cached results after the given number of seconds.
+      Requires *cache*.
+
+    *cache_key*
+      How operands are compared to cached ones: by ``'value'``
+      (default; operands must be hashable) or by ``'identity'``.
+      Requires *cache*.
+
+    *bind_left*, *bind_right*
+      Function called by the `left` (resp. `right`) method of the
+      operator with the operand to bind, to do per-operand work once
+      for all applications of the section.  It returns a function of
+      the other operand, which must give the same results as *func*,
+      or ``None`` if there's nothing to precompute for that operand.
+      Applications with the infix syntax do not use it.
+
+    *associative*
+      Declare that the operator is associative, and fuse chained
+      applications ``a /op/ b /op/ c ...``: the result is computed
+      with a single call passing all the operands, when it is first
+      used.  If *associative* is ``True``, *func* is called with all
+      the operands; otherwise, *associative* is the function to call
+      with them, and *func* is only called on chains of two operands.
+      See module `betwixt.chain` for details.
+
+    *name*
+      Dotted name ``module.name`` to pickle the operator by; unpickling
+      imports *module*, which must make the operator (with the same
+      *name*) when imported.  Without it, operators made by decorating
+      a module-level function are pickled by the name of the function,
+      and all others by value: *func* and the options given here are
+      pickled (so they must be picklable themselves), along with
+      implementations added by `register` and `batch`.  Give a *name*
+      to module-level operators made by calling `infix_operator`, so
+      that they are pickled by reference, as functions are.
+
+    If *func* is a coroutine function (``async def``), applying the
+    operator returns an awaitable, and awaitable operands are awaited
+    before being passed to *func*; see module `betwixt.aio`.
     """
     assert delimiter in _delimiter_to_class
     assert len(func) in [0, 1]
+    # named operators are pickled by reference, see `_make_operator`
+    given = dict((key, value) for key, value in options.items() if key != 'name')
+    specialize = options.pop('specialize', False)
+    vectorize = options.pop('vectorize', None)
+    lazy = options.pop('lazy', False)
+    pure = options.pop('pure', False)
+    cache = options.pop('cache', False)
+    cache_ttl = options.pop('cache_ttl', None)
+    cache_key = options.pop('cache_key', None)
+    bind_left = options.pop('bind_left', None)
+    bind_right = options.pop('bind_right', None)
+    associative = options.pop('associative', False)
+    name = options.pop('name', None)
+    if options:
+        raise TypeError(
+            "infix_operator() got unexpected keyword argument(s): {0}"
+            .format(', '.join(sorted(options))))
+    bind = (bind_left, bind_right) if (bind_left or bind_right) else _NO_BIND
+    if lazy and bind is not _NO_BIND:
+        raise ValueError(
+            "Cannot precompute sections of a lazy operator,"
+            " since applying it does not call the function")
+    if not cache and (cache_ttl is not None or cache_key is not None):
+        raise ValueError(
+            "Options `cache_ttl` and `cache_key` need `cache`,"
+            " e.g., `cache=True`")
+    if associative and (lazy or cache):
+        raise ValueError(
+            "Cannot fuse applications of a {0} operator,"
+            " since their results are not computed when applied"
+            .format('lazy' if lazy else 'caching'))
+    if name is not None and '.' not in name:
+        raise ValueError("Operator name must be a dotted name `module.name`,"
+                         " got {0!r}".format(name))
     # pylint: disable=no-else-return
     if func:
         # make operator
-        return _delimiter_to_class[delimiter](func[0])
-    else:
+        func = orig = func[0]
+        if _iscoroutinefunction(func):
+            if cache:
+                raise ValueError(
+                    "Cannot cache results of a coroutine function,"
+                    " since a coroutine can only be awaited once")
+            if associative:
+                raise ValueError(
+                    "Cannot fuse applications of a coroutine function,"
+                    " since it takes exactly two operands")
+            func = _make_async(func)
+        if associative:
+            from .chain import _make_associative
+            func = _make_associative(
+                func, func if associative is True else associative)
+        if cache:
+            from .cache import _make_cached
+            func = _make_cached(
+                func, None if cache is True else cache, cache_ttl,
+                cache_key or 'value')
+        if vectorize:
+            func = _vectorize(func, vectorize)
+        if lazy:
+            func = _make_lazy(func, pure)
+        if specialize:
+            op = _make_specialized_class(delimiter, func)(func)
+        else:
+            op = _delimiter_to_class[delimiter](func)
+        op._func = orig
+        op._options = given
+        op._bind = bind
+        if name is not None:
+            op._name = name
+            _named_operators[name] = op
+        return op
+    elif (not (specialize or vectorize or lazy or cache or associative)
+          and bind is _NO_BIND and name is None):
         # decorate a function
         return _delimiter_to_class[delimiter]
+    else:
+        def decorate(fn):
+            return infix_operator(delimiter, fn, specialize=specialize,
+                                  vectorize=vectorize, lazy=lazy, pure=pure,
+                                  cache=cache, cache_ttl=cache_ttl,
+                                  cache_key=cache_key, bind_left=bind_left,
+                                  bind_right=bind_right,
+                                  associative=associative, name=name)
+        return decorate
 
 betwixt = infix_operator
 """
 Alias for `infix_operator` (which see).
 """
+
+
+def compile_module(source, filename='<string>', operators=()):
+    """
+    Compile module *source*, turning infix operator applications into direct calls.
+
+    See `betwixt.compiler.compile_module` for details.
+    """
+    # imported here to avoid loading the `ast` machinery unless needed
+    from .compiler import compile_module as _compile_module
+    return _compile_module(source, filename, operators)
+
+
+## statistics
+
+# `betwixt.instrument` is only imported when first used
+_INSTRUMENT_NAMES = ('disable_stats', 'enable_stats', 'reset_stats', 'stats')
+
+if sys.version_info < (3, 7):
+    # no support for module-level `__getattr__`
+    from .instrument import disable_stats, enable_stats, reset_stats, stats
+else:
+    def __getattr__(name):
+        if name in _INSTRUMENT_NAMES:
+            from . import instrument
+            value = globals()[name] = getattr(instrument, name)
+            return value
+        raise AttributeError("module {0!r} has no attribute {1!r}"
+                             .format(__name__, name))
+
+if os.environ.get('BETWIXT_STATS', '') not in ('', '0'):
+    from . import instrument
+    instrument.enable_stats()
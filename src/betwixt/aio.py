@@ -0,0 +1,149 @@
+"""
+Infix operators in `asyncio` code.
+
+When the function wrapped by `infix_operator` is a coroutine function,
+applying the operator returns an awaitable; operands which are
+themselves awaitable (e.g., the result of another application of an
+async operator) are awaited before calling the function, concurrently
+if both are::
+
+  >>> import asyncio
+  >>> from betwixt import infix_operator
+  >>> @infix_operator('|')
+  ... async def add(lhs, rhs):
+  ...     await asyncio.sleep(0)
+  ...     return lhs + rhs
+  >>> asyncio.run((1 |add| 2) |add| (3 |add| 4))
+  10
+
+This module also provides operators to build asynchronous pipelines:
+`athen` is the async counterpart of `betwixt.examples.then`, and
+`async_map` maps a coroutine function over many items, with a limit
+on the number of calls running concurrently.
+
+Requires Python 3.5 or later.
+"""
+# Copyright (C) 2016-2020 Riccardo Murri <riccardo.murri@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+import asyncio
+from inspect import isawaitable
+
+from . import infix_operator
+
+
+__all__ = [
+    'amap',
+    'async_map',
+    'athen',
+]
+
+
+async def _apply(func, lhs, rhs):
+    if isawaitable(lhs):
+        if isawaitable(rhs):
+            lhs, rhs = await asyncio.gather(lhs, rhs)
+        else:
+            lhs = await lhs
+    elif isawaitable(rhs):
+        rhs = await rhs
+    return await func(lhs, rhs)
+
+
+def _make_async(func):
+    """
+    Return a function calling coroutine function *func* on awaited operands.
+    """
+    # not a coroutine function itself (it returns the coroutine
+    # object), so that it is not wrapped again if passed to
+    # `infix_operator` once more
+    def apply(lhs, rhs):
+        return _apply(func, lhs, rhs)
+    apply.__wrapped__ = func
+    return apply
+
+
+async def _resolve(value):
+    if isawaitable(value):
+        return await value
+    return value
+
+
+@infix_operator('<<')
+async def athen(lhs, rhs):
+    """
+    Apply right-hand side to left-hand side, awaiting the result.
+    Delimited by ``<<`` and ``>>``.
+
+    This is the asynchronous version of `betwixt.examples.then`: the
+    right-hand side can be a plain function or a coroutine function,
+    and the whole chain is awaited at once::
+
+      result = await (url <<athen>> fetch <<athen>> parse <<athen>> store)
+
+    The left-hand side is awaited first, if it's awaitable, so stages
+    are run one after the other.
+    """
+    return await _resolve(rhs(lhs))
+
+
+def async_map(limit=None, name=None):
+    """
+    Return a ``<<``-delimited operator mapping a function over items.
+
+    Applying the operator as ``items <<op>> func`` returns an awaitable
+    for the list of ``func(item)`` for every *item* in *items* (which
+    can also be an awaitable, e.g., a previous `athen` stage).  If
+    *func* returns awaitables, they are run concurrently, but no more
+    than *limit* at a time (no limit if *limit* is ``None``)::
+
+      >>> async def double(n):
+      ...     await asyncio.sleep(0)
+      ...     return 2 * n
+      >>> amap5 = async_map(5)
+      >>> asyncio.run(range(10) <<amap5>> double)
+      [0, 2, 4, 6, 8, 10, 12, 14, 16, 18]
+
+    Results are in the same order as the corresponding items.
+    Optional argument *name* is passed on to `infix_operator`, to
+    pickle the operator by reference.
+    """
+    if limit is not None and limit < 1:
+        raise ValueError("Concurrency limit must be a positive integer, got {0!r}"
+                         .format(limit))
+
+    async def amap(items, func):
+        if limit is None:
+            return list(await asyncio.gather(
+                *[_resolve(func(item)) for item in items]))
+        # created here, so that it is bound to the running event loop
+        semaphore = asyncio.Semaphore(limit)
+
+        async def run(item):
+            async with semaphore:
+                return await _resolve(func(item))
+        return list(await asyncio.gather(*[run(item) for item in items]))
+
+    return infix_operator('<<', amap, name=name)
+
+
+amap = async_map(name='betwixt.aio.amap')
+"""
+Map a function over items, running all calls concurrently.
+Delimited by ``<<`` and ``>>``.
+
+Use `async_map` to limit the number of concurrent calls.
+"""
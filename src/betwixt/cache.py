@@ -0,0 +1,202 @@
+"""
+Memoization of infix operator applications.
+
+Operators created with ``infix_operator(..., cache=...)`` remember
+the result of calling the wrapped function on given operands, and
+return it when the operator is applied to the same operands again::
+
+  >>> from betwixt import infix_operator
+  >>> calls = []
+  >>> def plus(lhs, rhs):
+  ...     calls.append((lhs, rhs))
+  ...     return lhs + rhs
+  >>> op = infix_operator('|', plus, cache=100)
+  >>> [1 |op| 2, 1 |op| 2, 2 |op| 1]
+  [3, 3, 3]
+  >>> calls
+  [(1, 2), (2, 1)]
+  >>> op.cache_info()
+  CacheInfo(hits=1, misses=2, maxsize=100, currsize=2)
+
+The cache can be bounded in size (least-recently used entries are
+evicted first) and/or in time (entries expire *cache_ttl* seconds
+after being computed).  By default, operands are compared by value, so
+they must be hashable; with ``cache_key='identity'``, they are compared
+by identity instead, which allows any operand (e.g., lists or arrays)
+but only hits when the very same objects are passed again.
+
+On free-threaded Python builds, the cache is split in parts with
+separate locks, chosen by hashing the operands, so that threads
+applying the operator to different operands do not wait for each
+other; each part then evicts its own least recently used entries.
+"""
+# Copyright (C) 2016-2020 Riccardo Murri <riccardo.murri@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# make coding more python3-ish, must be the first statement
+from __future__ import (absolute_import, division, print_function)
+
+from collections import OrderedDict, namedtuple
+import functools
+import threading
+import time
+
+from . import _FREE_THREADED
+
+
+__all__ = [
+    'CacheInfo',
+]
+
+
+CacheInfo = namedtuple('CacheInfo', 'hits misses maxsize currsize')
+"""
+Cache statistics, as returned by the `cache_info()` method of operators.
+"""
+
+
+try:
+    _timer = time.monotonic
+except AttributeError:
+    # Python 2
+    _timer = time.time
+
+
+# number of separately locked parts of caches on free-threaded builds
+_SHARDS = 16
+
+
+class _Shard(object):
+    """
+    Part of a cache, with its own lock, entries and statistics.
+    """
+    __slots__ = ['lock', 'entries', 'maxsize', 'hits', 'misses']
+
+    def __init__(self, maxsize):
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (expiry time, lhs, rhs, value)
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+
+def _make_cached(func, maxsize=None, ttl=None, key='value', shards=None):
+    """
+    Return a function memoizing the results of ``func(lhs, rhs)``.
+
+    At most *maxsize* results are kept (no limit if ``None``); if *ttl*
+    is not ``None``, results are discarded after *ttl* seconds.  If
+    *key* is ``'identity'``, operands are compared by identity instead
+    of by value.  Entries are split in *shards* separately locked parts
+    (by default, one, or `_SHARDS` on free-threaded builds).
+
+    The returned function has methods `cache_info()` and `cache_clear()`
+    and attribute `__wrapped__`, like those made by `functools.lru_cache`.
+    """
+    if maxsize is not None and maxsize < 0:
+        raise ValueError("Cache size must be a non-negative integer, got {0!r}"
+                         .format(maxsize))
+    if ttl is not None and ttl <= 0:
+        raise ValueError("Cache TTL must be a positive number, got {0!r}"
+                         .format(ttl))
+    if key not in ('value', 'identity'):
+        raise ValueError("Cache key must be 'value' or 'identity', got {0!r}"
+                         .format(key))
+    if shards is None:
+        shards = _SHARDS if _FREE_THREADED else 1
+    if shards < 1:
+        raise ValueError("Number of cache shards must be a positive integer,"
+                         " got {0!r}".format(shards))
+    if maxsize is not None:
+        # every part holds at least one entry
+        shards = max(1, min(shards, maxsize))
+
+    lru_cache = getattr(functools, 'lru_cache', None)
+    if key == 'value' and ttl is None and shards == 1 and lru_cache is not None:
+        # the C implementation in the std library is hard to beat
+        cached = lru_cache(maxsize, typed=True)(func)
+        info = cached.cache_info
+
+        def cache_info():
+            return CacheInfo(*info())
+        cached.cache_info = cache_info
+        return cached
+
+    if maxsize is None:
+        parts = [_Shard(None) for _ in range(shards)]
+    else:
+        # spread *maxsize* over the parts, so that the total is exact
+        parts = [_Shard(maxsize // shards + (1 if n < maxsize % shards else 0))
+                 for n in range(shards)]
+    single = parts[0] if shards == 1 else None
+    by_identity = (key == 'identity')
+
+    def cached(lhs, rhs):
+        if by_identity:
+            # the entry keeps references to the operands, so their
+            # `id()` cannot be reused while the entry is in the cache
+            k = (id(lhs), id(rhs))
+        else:
+            k = (lhs, type(lhs), rhs, type(rhs))
+        shard = single or parts[hash(k) % shards]
+        entries = shard.entries
+        with shard.lock:
+            entry = entries.pop(k, None)
+            if entry is not None:
+                if ttl is None or entry[0] > _timer():
+                    # re-insert as most recently used
+                    entries[k] = entry
+                    shard.hits += 1
+                    return entry[3]
+            shard.misses += 1
+        value = func(lhs, rhs)
+        if maxsize == 0:
+            return value
+        expiry = (_timer() + ttl) if ttl is not None else None
+        with shard.lock:
+            entries[k] = (expiry, lhs, rhs, value)
+            if shard.maxsize is not None and len(entries) > shard.maxsize:
+                entries.popitem(last=False)
+            if ttl is not None:
+                # drop expired entries from the least-recently used end
+                now = _timer()
+                while entries:
+                    oldest = next(iter(entries))
+                    if entries[oldest][0] > now:
+                        break
+                    del entries[oldest]
+        return value
+
+    def cache_info():
+        hits = misses = currsize = 0
+        for shard in parts:
+            with shard.lock:
+                hits += shard.hits
+                misses += shard.misses
+                currsize += len(shard.entries)
+        return CacheInfo(hits, misses, maxsize, currsize)
+
+    def cache_clear():
+        for shard in parts:
+            with shard.lock:
+                shard.entries.clear()
+                shard.hits = shard.misses = 0
+
+    functools.update_wrapper(cached, func)
+    cached.cache_info = cache_info
+    cached.cache_clear = cache_clear
+    cached.__wrapped__ = func
+    return cached
@@ -0,0 +1,280 @@
+"""
+Fusion of chained applications of associative operators.
+
+Operators created with ``infix_operator(..., associative=...)`` do not
+call the wrapped function when applied; instead, ``lhs /op/ rhs``
+returns a `Chain`, which stands for the result and computes it the
+first time it is used.  A chain which is an operand of the same
+operator is extended rather than computed, so that a whole expression
+``a /op/ b /op/ c /op/ d`` is computed with a single call, passing all
+the operands at once::
+
+  >>> import os
+  >>> from betwixt import infix_operator
+  >>> calls = []
+  >>> def join(*parts):
+  ...     calls.append(parts)
+  ...     return os.path.join(*parts)
+  >>> op = infix_operator('/', join, associative=True)
+  >>> path = '/a' /op/ 'b' /op/ 'c' /op/ 'd'
+  >>> calls
+  []
+  >>> path
+  '/a/b/c/d'
+  >>> calls
+  [('/a', 'b', 'c', 'd')]
+
+With ``associative=True``, the wrapped function must accept any number
+of operands, as `os.path.join` does; otherwise, *associative* is the
+function to call with all the operands (the "n-ary kernel") of chains
+of three or more, while single applications still call the wrapped
+function with two operands::
+
+  >>> cat = infix_operator('+', lambda lhs, rhs: lhs + rhs,
+  ...                      associative=lambda *parts: ''.join(parts))
+  >>> 'a' +cat+ 'b' +cat+ 'c'
+  'abc'
+
+Either way, the operator must be associative: operands are
+passed in left-to-right order, no matter how the expression is
+parenthesized.  When building long strings or paths, this replaces
+the copy of the partial result made at each step with a single
+concatenation.
+
+Chains forward attribute access, comparisons, arithmetic, conversion
+to strings, `os.fspath`, iteration, etc. to the result, and
+``isinstance(chain, cls)`` checks the class of the result, so in most
+code they can stand in for it; functions implemented in C that require
+an exact type (e.g., ``str.join`` or `re.match` for strings) need the
+result itself, which is returned by `materialize`.  Note that errors
+raised by the wrapped function only show up when the chain is used.
+So, making an existing operator associative changes what it returns:
+see `betwixt.examples.concat` for an operator designed this way.
+"""
+# Copyright (C) 2016-2020 Riccardo Murri <riccardo.murri@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# make coding more python3-ish, must be the first statement
+from __future__ import (absolute_import, division, print_function)
+
+try:
+    import _operator as operator
+except ImportError:
+    import operator
+
+from . import _BaseInfixOperator, _BasePartialOperation
+
+
+__all__ = [
+    'Chain',
+    'materialize',
+]
+
+
+_UNSET = object()
+
+_infix_classes = (_BaseInfixOperator, _BasePartialOperation)
+
+_new_chain = object.__new__
+
+
+class Chain(object):
+    """
+    Deferred application of *kernel* to a chain of operands.
+
+    Instances are created by applying operators made with
+    ``infix_operator(..., associative=...)``: operands *lhs* and *rhs*
+    are themselves chains when the operator is applied to the result
+    of another application.  Chains of only two operands are computed
+    by calling *func* instead.  See the module documentation for details.
+    """
+    # Attribute lookups on instances are slow (the class defines
+    # `__getattr__`), so all arguments are kept in a single tuple.
+    __slots__ = ['_args', '_value']
+
+    def __init__(self, kernel, func, lhs, rhs):
+        self._args = (kernel, func, lhs, rhs)
+        self._value = _UNSET
+
+    def _operands(self):
+        """
+        Return list of the operands of the whole chain, left to right.
+        """
+        operands = []
+        kernel = self._args[0]
+        # iterative visit, so that long chains do not hit the recursion limit
+        stack = [self]
+        while stack:
+            node = stack.pop()
+            if type(node) is not Chain:  # pylint: disable=unidiomatic-typecheck
+                operands.append(node)
+                continue
+            value = node._value
+            if value is not _UNSET:
+                # by associativity, the result of a sub-chain can
+                # replace its operands
+                operands.append(value)
+                continue
+            args = node._args
+            if args[0] is kernel:
+                stack.append(args[3])
+                stack.append(args[2])
+            else:
+                # chain of another operator
+                operands.append(node._materialize())
+        return operands
+
+    def _materialize(self):
+        value = self._value
+        if value is _UNSET:
+            # concurrent uses may compute the value more than once,
+            # but then they all store the same result
+            kernel, func, lhs, rhs = self._args
+            if type(lhs) is not Chain and type(rhs) is not Chain:  # pylint: disable=unidiomatic-typecheck
+                value = func(lhs, rhs)
+            else:
+                operands = self._operands()
+                value = func(*operands) if len(operands) == 2 else kernel(*operands)
+            self._value = value
+        return value
+
+    # `isinstance()` and `copy`/`pickle` see the result
+    @property
+    def __class__(self):
+        return self._materialize().__class__
+
+    def __reduce_ex__(self, protocol):
+        return (materialize, (self._materialize(),))
+
+    def __getattr__(self, name):
+        # only called for attributes not found on the chain itself
+        return getattr(self._materialize(), name)
+
+    def __dir__(self):
+        return dir(self._materialize())
+
+
+def materialize(obj):
+    """
+    Return the result of *obj* if it is a `Chain`, or *obj* itself otherwise.
+    """
+    if type(obj) is Chain:  # pylint: disable=unidiomatic-typecheck
+        return obj._materialize()
+    return obj
+
+
+def _make_associative(func, kernel):
+    """
+    Return a function building `Chain` nodes to be computed by *kernel*.
+    """
+    # applying the operator only allocates a node, so skip the call
+    # to `Chain.__init__`
+    def build(lhs, rhs):
+        chain = _new_chain(Chain)
+        chain._args = (kernel, func, lhs, rhs)
+        chain._value = _UNSET
+        return chain
+    build.__wrapped__ = func
+    return build
+
+
+## forwarding of special methods to the result
+
+def _forward(name, func):
+    def method(self, *args, **kwargs):
+        return func(self._materialize(), *args, **kwargs)
+    method.__name__ = name
+    return method
+
+
+def _forward_binary(name):
+    # in ``chain |op| rhs``, it's the infix operator that handles
+    # ``chain | op``, possibly extending the chain: so do not compute
+    # it; likewise, if the result does not support the operation, give
+    # the other operand a chance
+    def method(self, other):
+        if isinstance(other, _infix_classes):
+            return NotImplemented
+        value = self._materialize()
+        impl = getattr(type(value), name, None)
+        if impl is None:
+            return NotImplemented
+        return impl(value, materialize(other))
+    method.__name__ = name
+    return method
+
+
+def _forward_reflected(name, func):
+    # the other operand does not support the operation with a chain:
+    # try again with the result, e.g., ``'prefix' + chain``
+    def method(self, other):
+        return func(other, self._materialize())
+    method.__name__ = name
+    return method
+
+
+def _call(value, *args, **kwargs):
+    return value(*args, **kwargs)
+
+
+def _fspath(value):
+    # imported here, since `os.fspath` needs Python 3.6+
+    from os import fspath
+    return fspath(value)
+
+
+for _name, _func in [
+        ('__str__', str),
+        ('__repr__', repr),
+        ('__bytes__', bytes),
+        ('__format__', format),
+        ('__hash__', hash),
+        ('__bool__', bool),
+        ('__nonzero__', bool),
+        ('__len__', len),
+        ('__iter__', iter),
+        ('__reversed__', reversed),
+        ('__contains__', lambda value, item: item in value),
+        ('__getitem__', operator.getitem),
+        ('__fspath__', _fspath),
+        ('__call__', _call),
+        ('__int__', int),
+        ('__float__', float),
+        ('__complex__', complex),
+        ('__index__', operator.index),
+        ('__round__', round),
+        ('__neg__', operator.neg),
+        ('__pos__', operator.pos),
+        ('__abs__', abs),
+        ('__invert__', operator.invert),
+]:
+    setattr(Chain, _name, _forward(_name, _func))
+
+for _name in ('eq', 'ne', 'lt', 'le', 'gt', 'ge'):
+    setattr(Chain, '__{0}__'.format(_name), _forward_binary('__{0}__'.format(_name)))
+
+for _name in ('add', 'sub', 'mul', 'matmul', 'truediv', 'floordiv', 'div',
+              'mod', 'divmod', 'pow', 'lshift', 'rshift', 'and', 'xor', 'or'):
+    _func = (divmod if _name == 'divmod'
+             else getattr(operator, _name + '_', None) or getattr(operator, _name, None))
+    if _func is None:
+        # ``/`` is always true division on Python 3; ``@`` needs Python 3.5+
+        continue
+    setattr(Chain, '__{0}__'.format(_name), _forward_binary('__{0}__'.format(_name)))
+    setattr(Chain, '__r{0}__'.format(_name),
+            _forward_reflected('__r{0}__'.format(_name), _func))
+
+del _name, _func
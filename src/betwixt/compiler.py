@@ -0,0 +1,403 @@
+"""
+Compile infix operator applications into direct function calls.
+
+Every application ``lhs |op| rhs`` of a `betwixt` operator costs two
+special-method dispatches and (usually) one partial operation object.
+This module rewrites the syntax tree of a module so that each such
+application becomes a plain call to the wrapped function, guarded by
+a check that ``op`` is still a `betwixt` operator of the expected
+kind::
+
+  # source
+  y = lhs |contains| rhs
+
+  # compiled as (roughly)
+  y = (contains._op if contains.__class__ in <plain `|` operator classes>
+       else <generic infix application>)(lhs, rhs)
+
+so that the rewritten module keeps working (at the normal speed) if
+the name is rebound at runtime to something else.
+
+Only names that are *statically known* to refer to `betwixt`
+operators are rewritten: names imported from the `betwixt` package
+that refer to operators, names assigned the result of calling
+`betwixt.infix_operator` (or its alias `betwixt.betwixt`), functions
+decorated with either, and any additional name passed in the
+*operators* argument of `compile_module`.
+
+The rewriting assumes that the left operand does not itself handle
+the delimiter operator when the right operand is a `betwixt`
+operator -- which is what makes infix syntax work in the first place.
+Note also that the operator name is evaluated *before* the left
+operand in the compiled code.
+
+Modules can be compiled explicitly with `compile_module`, or on import
+by installing an import hook with `install_import_hook`.  This module
+requires Python 3.9 or later.
+"""
+# Copyright (C) 2016-2020 Riccardo Murri <riccardo.murri@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# make coding more python3-ish, must be the first statement
+from __future__ import (absolute_import, division, print_function)
+
+import ast
+import fnmatch
+import importlib
+import importlib.abc
+import importlib.machinery
+import sys
+
+from . import _BaseInfixOperator, _delimiter_to_class, infix_operator
+
+
+__all__ = [
+    'compile_module',
+    'install_import_hook',
+    'rewrite',
+    'uninstall_import_hook',
+]
+
+
+## runtime support
+
+# How to apply an operator with each delimiter, with the usual
+# (special-method based) semantics.
+_APPLY = {
+    '**': lambda lhs, op, rhs: lhs **op** rhs,
+    '*':  lambda lhs, op, rhs: lhs *op* rhs,
+    '/':  lambda lhs, op, rhs: lhs /op/ rhs,
+    '//': lambda lhs, op, rhs: lhs //op// rhs,
+    '+':  lambda lhs, op, rhs: lhs +op+ rhs,
+    '<<': lambda lhs, op, rhs: lhs <<op>> rhs,
+    '^':  lambda lhs, op, rhs: lhs ^op^ rhs,
+    '|':  lambda lhs, op, rhs: lhs |op| rhs,
+}
+
+
+def _fallback(delimiter, op):
+    """
+    Return a function of two arguments applying *op* in infix form.
+
+    Used by compiled code when the operator name no longer refers to
+    a `betwixt` operator of the kind that was expected at compile time.
+    """
+    apply = _APPLY[delimiter]
+    return lambda lhs, rhs: apply(lhs, op, rhs)
+
+
+## AST rewriting
+
+# Map the two AST operator nodes surrounding the operator name to the
+# corresponding delimiter; for all delimiters but ``**`` the first
+# operator is the "outer" one, i.e., the one between the partial
+# operation and the right operand.
+_DELIMITER_OF = {
+    (ast.Mult, ast.Mult): '*',
+    (ast.Div, ast.Div): '/',
+    (ast.FloorDiv, ast.FloorDiv): '//',
+    (ast.Add, ast.Add): '+',
+    (ast.RShift, ast.LShift): '<<',
+    (ast.BitXor, ast.BitXor): '^',
+    (ast.BitOr, ast.BitOr): '|',
+}
+
+_FACTORY_NAMES = ('infix_operator', 'betwixt')
+
+_FALLBACK_NAME = '__betwixt_fallback__'
+
+
+def _class_alias(delimiter):
+    return '__betwixt_{0}__'.format(_delimiter_to_class[delimiter].__name__)
+
+
+def _is_betwixt_module(modname):
+    return modname == 'betwixt' or modname.startswith('betwixt.')
+
+
+class _OperatorNames(ast.NodeVisitor):
+    """
+    Collect names bound to `betwixt` operators at module level.
+    """
+
+    def __init__(self):
+        self.operators = set()
+        self.factories = set()
+        self.modules = set()
+
+    def _is_factory(self, node):
+        if isinstance(node, ast.Call):
+            node = node.func
+        if isinstance(node, ast.Name):
+            return node.id in self.factories
+        if isinstance(node, ast.Attribute):
+            return (node.attr in _FACTORY_NAMES
+                    and isinstance(node.value, ast.Name)
+                    and node.value.id in self.modules)
+        return False
+
+    def visit_Module(self, node):
+        # only look at top-level statements
+        for stmt in node.body:
+            self.visit(stmt)
+
+    def visit_Import(self, node):
+        for alias in node.names:
+            if alias.name == 'betwixt':
+                self.modules.add(alias.asname or alias.name)
+
+    def visit_ImportFrom(self, node):
+        if node.level or not _is_betwixt_module(node.module or ''):
+            return
+        module = importlib.import_module(node.module)
+        for alias in node.names:
+            if alias.name == '*':
+                names = getattr(module, '__all__', None)
+                if names is None:
+                    names = [name for name in vars(module) if not name.startswith('_')]
+                for name in names:
+                    self._classify(name, getattr(module, name, None))
+            else:
+                self._classify(alias.asname or alias.name,
+                               getattr(module, alias.name, None))
+
+    def _classify(self, name, obj):
+        if isinstance(obj, _BaseInfixOperator):
+            self.operators.add(name)
+        elif obj is infix_operator:
+            self.factories.add(name)
+
+    def visit_Assign(self, node):
+        if self._is_factory(node.value) and isinstance(node.value, ast.Call):
+            for target in node.targets:
+                if isinstance(target, ast.Name):
+                    self.operators.add(target.id)
+
+    def visit_FunctionDef(self, node):
+        if any(self._is_factory(deco) for deco in node.decorator_list):
+            self.operators.add(node.name)
+
+    visit_AsyncFunctionDef = visit_FunctionDef
+
+
+class _InfixRewriter(ast.NodeTransformer):
+    """
+    Replace infix applications of known operators with direct calls.
+    """
+
+    def __init__(self, operators):
+        self.operators = operators
+        self.delimiters = set()
+
+    def _match(self, node):
+        """
+        Return tuple *(lhs, name, rhs, delimiter)* if *node* is an
+        infix operator application, or ``None``.
+        """
+        # ``lhs **op** rhs`` is parsed as ``lhs ** (op ** rhs)``
+        if (isinstance(node.op, ast.Pow)
+                and isinstance(node.right, ast.BinOp)
+                and isinstance(node.right.op, ast.Pow)
+                and isinstance(node.right.left, ast.Name)):
+            return (node.left, node.right.left, node.right.right, '**')
+        # all other delimiters are parsed as ``(lhs OP op) OP rhs``
+        if (isinstance(node.left, ast.BinOp)
+                and isinstance(node.left.right, ast.Name)):
+            delimiter = _DELIMITER_OF.get((type(node.op), type(node.left.op)))
+            if delimiter is not None:
+                return (node.left.left, node.left.right, node.right, delimiter)
+        return None
+
+    def visit_BinOp(self, node):
+        # rewrite innermost applications first
+        node = self.generic_visit(node)
+        match = self._match(node)
+        if match is None:
+            return node
+        lhs, name, rhs, delimiter = match
+        if name.id not in self.operators:
+            return node
+        self.delimiters.add(delimiter)
+        # test ``op.__class__ is C or
+        # op.__class__.__dict__.get('_specialized_from') is C``, where
+        # ``C`` is the generic operator class: the infix application
+        # of instances of ``C`` and of classes specialized from it
+        # (but not of further subclasses) is the same as calling `_op`
+        func = ast.IfExp(
+            test=ast.BoolOp(op=ast.Or(), values=[
+                ast.Compare(
+                    left=ast.Attribute(
+                        value=ast.Name(id=name.id, ctx=ast.Load()),
+                        attr='__class__', ctx=ast.Load()),
+                    ops=[ast.Is()],
+                    comparators=[ast.Name(id=_class_alias(delimiter), ctx=ast.Load())]),
+                ast.Compare(
+                    left=ast.Call(
+                        func=ast.Attribute(
+                            value=ast.Attribute(
+                                value=ast.Attribute(
+                                    value=ast.Name(id=name.id, ctx=ast.Load()),
+                                    attr='__class__', ctx=ast.Load()),
+                                attr='__dict__', ctx=ast.Load()),
+                            attr='get', ctx=ast.Load()),
+                        args=[ast.Constant(value='_specialized_from')],
+                        keywords=[]),
+                    ops=[ast.Is()],
+                    comparators=[ast.Name(id=_class_alias(delimiter), ctx=ast.Load())]),
+            ]),
+            body=ast.Attribute(
+                value=ast.Name(id=name.id, ctx=ast.Load()),
+                attr='_op', ctx=ast.Load()),
+            orelse=ast.Call(
+                func=ast.Name(id=_FALLBACK_NAME, ctx=ast.Load()),
+                args=[ast.Constant(value=delimiter),
+                      ast.Name(id=name.id, ctx=ast.Load())],
+                keywords=[]),
+        )
+        call = ast.Call(func=func, args=[lhs, rhs], keywords=[])
+        return ast.fix_missing_locations(ast.copy_location(call, node))
+
+
+def _preamble_position(tree):
+    """
+    Return index of the first statement after docstring and ``__future__`` imports.
+    """
+    pos = 0
+    body = tree.body
+    if (body and isinstance(body[0], ast.Expr)
+            and isinstance(body[0].value, ast.Constant)
+            and isinstance(body[0].value.value, str)):
+        pos = 1
+    while (pos < len(body)
+           and isinstance(body[pos], ast.ImportFrom)
+           and body[pos].module == '__future__'):
+        pos += 1
+    return pos
+
+
+def rewrite(tree, operators=()):
+    """
+    Rewrite module AST *tree* in place and return it.
+
+    Infix applications of operators known to be `betwixt` operators
+    are replaced with guarded direct calls to the wrapped function.
+    Optional argument *operators* lists additional names that should
+    be treated as `betwixt` operators.
+    """
+    names = _OperatorNames()
+    names.visit(tree)
+    rewriter = _InfixRewriter(names.operators | set(operators))
+    tree = rewriter.visit(tree)
+    if rewriter.delimiters:
+        imports = [
+            ast.ImportFrom(
+                module='betwixt.compiler',
+                names=[ast.alias(name='_fallback', asname=_FALLBACK_NAME)],
+                level=0),
+            ast.ImportFrom(
+                module='betwixt',
+                names=[ast.alias(name=_delimiter_to_class[delimiter].__name__,
+                                 asname=_class_alias(delimiter))
+                       for delimiter in sorted(rewriter.delimiters)],
+                level=0),
+        ]
+        pos = _preamble_position(tree)
+        tree.body[pos:pos] = imports
+        ast.fix_missing_locations(tree)
+    return tree
+
+
+def compile_module(source, filename='<string>', operators=()):
+    """
+    Compile module *source* into a code object, rewriting infix applications.
+
+    Applications ``lhs |op| rhs`` of operators that are statically
+    known to be `betwixt` operators are compiled into direct calls to
+    the wrapped function (see the module documentation for details).
+    Optional argument *operators* lists additional names that should
+    be treated as `betwixt` operators.
+
+    Example::
+
+      >>> code = compile_module(
+      ...     "from betwixt.examples import contains\\n"
+      ...     "result = [1, 2, 3] |contains| 2\\n")
+      >>> namespace = {}
+      >>> exec(code, namespace)
+      >>> namespace['result']
+      True
+    """
+    tree = ast.parse(source, filename, 'exec')
+    return compile(rewrite(tree, operators), filename, 'exec', dont_inherit=True)
+
+
+## import hook
+
+class _RewritingLoader(importlib.machinery.SourceFileLoader):
+    """
+    Load module source, rewriting infix applications.
+
+    Bytecode caching is bypassed, so that rewritten code never ends up
+    in (or is read from) the ``.pyc`` files used by regular imports.
+    """
+
+    def get_code(self, fullname):
+        path = self.get_filename(fullname)
+        return compile_module(self.get_data(path), path)
+
+
+class _RewritingFinder(importlib.abc.MetaPathFinder):
+
+    def __init__(self, patterns):
+        self.patterns = tuple(patterns)
+
+    def find_spec(self, fullname, path, target=None):
+        # pylint: disable=unused-argument
+        if not any(fnmatch.fnmatchcase(fullname, pattern)
+                   for pattern in self.patterns):
+            return None
+        spec = importlib.machinery.PathFinder.find_spec(fullname, path)
+        if spec is None or not isinstance(
+                spec.loader, importlib.machinery.SourceFileLoader):
+            return None
+        spec.loader = _RewritingLoader(fullname, spec.origin)
+        return spec
+
+
+def install_import_hook(*patterns):
+    """
+    Rewrite modules whose name matches any of *patterns* on import.
+
+    Patterns are shell-style globs (see `fnmatch`) matched against the
+    full dotted module name, e.g., ``myapp.rules`` or ``myapp.hot.*``.
+    Only modules imported *after* installing the hook are affected.
+    Return the hook object, which can be passed to
+    `uninstall_import_hook`.
+    """
+    finder = _RewritingFinder(patterns)
+    sys.meta_path.insert(0, finder)
+    return finder
+
+
+def uninstall_import_hook(finder=None):
+    """
+    Remove import hook *finder* (default: all hooks installed by this module).
+    """
+    sys.meta_path[:] = [
+        hook for hook in sys.meta_path
+        if not (hook is finder
+                or (finder is None and isinstance(hook, _RewritingFinder)))
+    ]
@@ -11,8 +11,40 @@ Examples of `betwixt` operators usage.
 
 from . import betwixt, infix_operator
 
+# Modules that take long to import (e.g., `re`, `fnmatch`, `threading`
+# or `multiprocessing`) are only imported by the code that needs them,
+# so that importing this module stays fast.
 
-@infix_operator('|')
+import sys
+
+try:
+    from _operator import contains as _contains
+except ImportError:
+    # Python 2
+    from operator import contains as _contains
+
+try:
+    from _thread import allocate_lock as _Lock
+except ImportError:
+    # Python 2
+    from thread import allocate_lock as _Lock
+
+
+def _contains_section(right):
+    # `AnyOf` and `AllOf` are compiled once, so search them directly
+    # (but only in text, see `_contains_needles`)
+    if isinstance(right, _Needles):
+        occurs_in = right.occurs_in
+
+        def section(left):
+            if left.__class__ is str:
+                return occurs_in(left)
+            return _contains_needles(left, right)
+        return section
+    return None
+
+
+@infix_operator('|', bind_right=_contains_section)
 def contains(left, right):
     """
     Return ``True`` if sequence *right* occurs in sequence *left*.
@@ -30,10 +62,354 @@ def contains(left, right):
 
       >>> "foobar" |contains| "a"
       True
+
+    If *right* is an `AnyOf` or `AllOf` set of substrings, and *left*
+    is a string or a bytes-like object, return ``True`` if any (resp.
+    all) of them occur in *left*; other left-hand sides (e.g., lists)
+    are searched for the set itself, as by ``right in left``.
+
+    See also `contains_indexed` and `Index`, for searching the same
+    sequence many times.  When testing many items against the same
+    set of substrings, use a section::
+
+      >>> errors = contains.right(AnyOf(['error', 'fatal']))
+      >>> [line for line in ['ok', 'fatal: disk full'] if errors(line)]
+      ['fatal: disk full']
+    """
+    return right in left
+
+
+# the membership test of built-in containers is run by a C function;
+# see below for `AnyOf` and `AllOf`
+for _type in list, tuple, set, frozenset, dict:
+    contains.register(_type, object, _contains)
+contains.register(str, str, _contains)
+contains.register(bytes, bytes, _contains)
+del _type
+
+
+## indexed membership tests
+
+# `right in left` takes time proportional to the length of a list or
+# tuple; the following operator and class replace the scan with a hash
+# table lookup, for when the same sequence is searched many times.
+
+class Index(object):
+    """
+    Read-only snapshot of a sequence, with fast membership tests.
+
+    Use an `Index` when testing for membership in the same large list
+    or tuple many times: building it takes one pass over the items,
+    then each test is a hash table lookup instead of a scan::
+
+      >>> allowed = Index(['alice', 'bob', 'carol'])
+      >>> allowed |contains| 'bob'
+      True
+      >>> 'dave' in allowed
+      False
+
+    An `Index` does not see later changes to the sequence it was built
+    from; build a new one after changing it.  Unhashable items (e.g.,
+    lists) are allowed, but they are searched by scanning as usual.
+    """
+    __slots__ = ['_items', '_hashable', '_unhashable']
+
+    def __init__(self, items):
+        self._items = tuple(items)
+        hashable = set()
+        unhashable = []
+        for item in self._items:
+            try:
+                hashable.add(item)
+            except TypeError:
+                unhashable.append(item)
+        self._hashable = frozenset(hashable)
+        self._unhashable = tuple(unhashable)
+
+    def __contains__(self, item):
+        try:
+            if item in self._hashable:
+                return True
+        except TypeError:
+            # unhashable item: may still compare equal to any item
+            return item in self._items
+        return item in self._unhashable
+
+    def __iter__(self):
+        return iter(self._items)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __repr__(self):
+        return 'Index({0!r})'.format(list(self._items))
+
+
+# id(tuple) -> [tuple, index, used].  Looking up an index takes no lock
+# and does not reorder entries, so that threads searching the same
+# tuples do not wait for each other: instead, keys are kept in a ring
+# swept by a "clock hand" when the cache is full, which gives an entry
+# used since the last sweep a second chance (the "clock" approximation
+# of LRU).  Entries keep a reference to their tuple, so that its `id()`
+# cannot be reused by another object while in the cache.
+_indexes = {}
+_indexes_ring = []
+_indexes_hand = 0
+_indexes_lock = _Lock()
+_INDEXES_MAXSIZE = 32
+
+
+def _index_of(left):
+    """
+    Return the (cached) `Index` of tuple *left*.
+    """
+    global _indexes_hand  # pylint: disable=global-statement
+    key = id(left)
+    entry = _indexes.get(key)
+    if entry is not None and entry[0] is left:
+        if not entry[2]:
+            entry[2] = True
+        return entry[1]
+    index = Index(left)
+    with _indexes_lock:
+        entry = _indexes.get(key)
+        if entry is not None:
+            # added by another thread meanwhile
+            return entry[1]
+        if len(_indexes_ring) < _INDEXES_MAXSIZE:
+            _indexes_ring.append(key)
+        else:
+            # the new entry is not in the ring yet, so it cannot be
+            # evicted even if all the others have been used
+            hand = _indexes_hand
+            while True:
+                oldest = _indexes[_indexes_ring[hand]]
+                if not oldest[2]:
+                    break
+                oldest[2] = False
+                hand = (hand + 1) % _INDEXES_MAXSIZE
+            del _indexes[_indexes_ring[hand]]
+            _indexes_ring[hand] = key
+            _indexes_hand = (hand + 1) % _INDEXES_MAXSIZE
+        _indexes[key] = [left, index, False]
+    return index
+
+
+def _contains_indexed_section(left):
+    # index the sequence for the section only, not in the shared cache
+    if left.__class__ is tuple:
+        return Index(left).__contains__
+    if isinstance(left, Index):
+        return left.__contains__
+    return None
+
+
+@infix_operator('|', bind_left=_contains_indexed_section)
+def contains_indexed(left, right):
+    """
+    Like `contains`, but use a hash index of tuples.
+    Delimited by ``|``.
+
+    The first time a tuple is searched, an `Index` of it is built and
+    remembered, so that subsequent searches of the very same tuple
+    take constant time.  Since tuples cannot change, the index never
+    goes stale.  Indexes of the 32 most recently searched tuples (give
+    or take, favoring the most used ones) are kept, together with the
+    tuples themselves: a tuple searched by `contains_indexed` stays in
+    memory until other tuples push it out of the cache.
+
+    Lists and other mutable sequences are searched as usual: wrap them
+    into an `Index` to get the same speedup::
+
+      >>> names = tuple('name{0}'.format(n) for n in range(10000))
+      >>> names |contains_indexed| 'name9999'
+      True
+      >>> Index(list(names)) |contains_indexed| 'name10000'
+      False
     """
+    if left.__class__ is tuple:
+        return right in _index_of(left)
     return right in left
 
 
+## multiple needles
+
+# Searching a long text for many substrings with `contains` would scan
+# the text once per substring; instead, the substrings are compiled
+# into a single regular expression, shaped like a trie (e.g.,
+# ``ab(?:c|d)?`` for needles ``ab``, ``abc`` and ``abd``) so that the
+# regex engine never needs to backtrack over a common prefix.
+
+def _trie_regex(needles):
+    """
+    Return a regex source (`str`) matching any string in *needles*.
+    """
+    import re
+    end = None
+    trie = {}
+    for needle in needles:
+        node = trie
+        for char in needle:
+            node = node.setdefault(char, {})
+        node[end] = True
+
+    def emit(node):
+        alternatives = [re.escape(char) + emit(child)
+                        for char, child in sorted(
+                            (item for item in node.items() if item[0] is not end),
+                            key=lambda item: item[0])]
+        if not alternatives:
+            return ''
+        if len(alternatives) == 1 and end not in node:
+            return alternatives[0]
+        return '(?:{0}){1}'.format('|'.join(alternatives),
+                                   '?' if end in node else '')
+    return emit(trie)
+
+
+class _Needles(object):
+    """
+    Base class for sets of substrings to search with `contains`.
+    """
+    __slots__ = ['needles', '_search', '_finditer']
+
+    def __init__(self, needles):
+        import re
+        self.needles = frozenset(needles)
+        if not self.needles:
+            self._search = self._finditer = None
+            return
+        kinds = set(isinstance(needle, bytes) for needle in self.needles)
+        if len(kinds) > 1:
+            raise TypeError("Needles must be all `str` or all `bytes`")
+        if kinds.pop():
+            # build the regex on a 1:1 decoding of bytes to `str`
+            source = _trie_regex(needle.decode('latin-1') for needle in self.needles)
+            source = source.encode('latin-1')
+            lookahead = b'(?=(' + source + b'))'
+        else:
+            source = _trie_regex(self.needles)
+            lookahead = '(?=(' + source + '))'
+        self._search = re.compile(source, re.DOTALL).search
+        self._finditer = re.compile(lookahead, re.DOTALL).finditer
+
+    def found(self, haystack):
+        """
+        Return the set of needles occurring in *haystack*.
+
+        Argument *haystack* can be a `str` (if the needles are `str`)
+        or a bytes-like object such as `bytes`, `bytearray`,
+        `memoryview` or `mmap.mmap` (if the needles are `bytes`); it is
+        scanned once, plus one scan per needle hidden by a longer
+        needle starting at the same position.
+        """
+        if self._finditer is None:
+            return set()
+        result = set(match.group(1) for match in self._finditer(haystack))
+        # the regex reports only one needle at each position; look
+        # for the others (e.g., ``ab`` in ``abc``) one by one
+        for needle in self.needles - result:
+            if self._find(haystack, needle):
+                result.add(needle)
+        return result
+
+    @staticmethod
+    def _find(haystack, needle):
+        if isinstance(haystack, (str, bytes, bytearray)):
+            return needle in haystack
+        # e.g., `memoryview`, where ``in`` looks for a single item
+        import re
+        return re.search(re.escape(needle), haystack) is not None
+
+    def __repr__(self):
+        return '{0}({1!r})'.format(self.__class__.__name__, sorted(self.needles))
+
+
+class AnyOf(_Needles):
+    """
+    A set of substrings, any of which must occur in a text.
+
+    Use as right-hand side of `contains`, to scan the text only once
+    regardless of the number of substrings::
+
+      >>> 'Connection reset by peer' |contains| AnyOf(['timeout', 'reset'])
+      True
+      >>> b'all good' |contains| AnyOf([b'error', b'warning'])
+      False
+
+    See `found` to get the substrings that occur in a text.
+    """
+    __slots__ = []
+
+    def occurs_in(self, haystack):
+        """
+        Return ``True`` if any needle occurs in *haystack*.
+        """
+        if self._search is None:
+            return False
+        return self._search(haystack) is not None
+
+
+class AllOf(_Needles):
+    """
+    A set of substrings, all of which must occur in a text.
+
+    Use as right-hand side of `contains`::
+
+      >>> 'spam, eggs and ham' |contains| AllOf(['spam', 'ham'])
+      True
+      >>> 'spam, eggs and ham' |contains| AllOf(['spam', 'bacon'])
+      False
+    """
+    __slots__ = []
+
+    def occurs_in(self, haystack):
+        """
+        Return ``True`` if all needles occur in *haystack*.
+        """
+        if self._finditer is None:
+            return True
+        missing = set(self.needles)
+        for match in self._finditer(haystack):
+            missing.discard(match.group(1))
+            if not missing:
+                return True
+        return all(self._find(haystack, needle) for needle in missing)
+
+
+_text_types = (type(u''), bytes, bytearray)
+
+
+def _is_text(obj):
+    """
+    Return ``True`` if *obj* is a string or bytes-like object.
+    """
+    if isinstance(obj, _text_types):
+        return True
+    try:
+        # e.g., `memoryview` or `mmap.mmap`
+        view = memoryview(obj)
+    except TypeError:
+        return False
+    view.release()
+    return True
+
+
+@contains.register(object, _Needles)
+def _contains_needles(left, right):
+    if _is_text(left):
+        return right.occurs_in(left)
+    return right in left
+
+
+# built-in containers hold items, not text: the pairs registered above
+# for them apply to needle sets too (without these, both those and
+# ``(object, _Needles)`` would match)
+for _type in list, tuple, set, frozenset, dict:
+    contains.register(_type, _Needles, _contains)
+del _type
+
+
 @infix_operator('*')
 def joining(left, right):
     """
@@ -46,10 +422,167 @@ def joining(left, right):
 
       >>> '_' *joining* ['a', 'b', 'c']
       'a_b_c'
+
+    If *left* is a `Sink`, write the joined items to a file instead.
     """
     return left.join(right)
 
 
+joining.register(str, object, str.join)
+joining.register(bytes, object, bytes.join)
+joining.register(bytearray, object, bytearray.join)
+
+
+class Sink(object):
+    """
+    Destination for streaming the result of `joining`.
+
+    ``Sink(target, sep) *joining* items`` writes the items of iterable
+    *items* to *target*, separated by *sep*, without ever building the
+    joined string; the total number of bytes (or characters) written
+    is returned::
+
+      >>> import io
+      >>> out = io.StringIO()
+      >>> Sink(out, ',') *joining* (str(n) for n in range(5))
+      9
+      >>> out.getvalue()
+      '0,1,2,3,4'
+
+    The *target* can be:
+
+    - a file object: items are passed to its `writelines()` method in
+      batches, so buffered files see few calls;
+    - an integer file descriptor (of a file, pipe or socket): items
+      must be bytes-like, and are written with one `os.writev` call
+      per batch, so no data is copied in Python;
+    - a `bytearray`: items must be bytes-like, and are appended to it;
+      if *items* is a sequence (e.g., a list), the array is resized
+      only once, to the exact total length.
+    """
+    __slots__ = ['target', 'sep']
+
+    def __init__(self, target, sep):
+        self.target = target
+        self.sep = sep
+
+    def __repr__(self):
+        return 'Sink({0!r}, {1!r})'.format(self.target, self.sep)
+
+    def write_joined(self, items):
+        """
+        Write *items* to the target, separated by the sink separator.
+
+        Return the total length of the written data.
+        """
+        target = self.target
+        if isinstance(target, bytearray):
+            return _join_into_bytearray(target, self.sep, items)
+        if isinstance(target, int):
+            write = _fd_writer(target)
+        else:
+            write = target.writelines
+        total = 0
+        for batch in _separated_batches(self.sep, items, _IOV_MAX):
+            write(batch)
+            total += sum(len(item) for item in batch)
+        return total
+
+
+joining.register(Sink, object, Sink.write_joined)
+
+
+import os
+
+try:
+    _IOV_MAX = os.sysconf('SC_IOV_MAX')
+except (AttributeError, OSError, ValueError):
+    _IOV_MAX = 1024
+if _IOV_MAX < 2:
+    _IOV_MAX = 1024
+
+
+def _separated_batches(sep, items, size):
+    """
+    Iterate over lists of at most *size* items, with *sep* in between.
+    """
+    batch = []
+    append = batch.append
+    first = True
+    for item in items:
+        if first:
+            first = False
+        elif sep:
+            append(sep)
+        append(item)
+        if len(batch) >= size - 1:
+            yield batch
+            batch = []
+            append = batch.append
+    if batch:
+        yield batch
+
+
+def _fd_writer(fd):
+    writev = getattr(os, 'writev', None)
+
+    def write(buffers):
+        if writev is None:
+            # e.g., Windows
+            for buf in buffers:
+                _write_all(fd, memoryview(buf))
+            return
+        written = writev(fd, buffers)
+        # short write (e.g., on a pipe or socket): finish by hand
+        for buf in buffers:
+            size = len(buf)
+            if written >= size:
+                written -= size
+                continue
+            _write_all(fd, memoryview(buf)[written:])
+            written = 0
+    return write
+
+
+def _write_all(fd, view):
+    while len(view):
+        view = view[os.write(fd, view):]
+
+
+def _join_into_bytearray(target, sep, items):
+    if not hasattr(items, '__len__'):
+        # unknown length: let `bytearray` grow as needed
+        start = len(target)
+        first = True
+        for item in items:
+            if first:
+                first = False
+            else:
+                target += sep
+            target += item
+        return len(target) - start
+    if not items:
+        return 0
+    # known length: resize once, then copy each item into place
+    total = sum(len(item) for item in items) + len(sep) * (len(items) - 1)
+    pos = len(target)
+    # large zero-filled `bytes` come from `calloc()`, which maps fresh
+    # pages that take no memory until written to
+    target.extend(bytes(total))
+    with memoryview(target) as view:
+        first = True
+        for item in items:
+            if first:
+                first = False
+            elif sep:
+                view[pos:pos + len(sep)] = sep
+                pos += len(sep)
+            size = len(item)
+            view[pos:pos + size] = item
+            pos += size
+    return total
+
+
 @infix_operator('//')
 def split_at(left, right):
     """
@@ -62,10 +595,119 @@ def split_at(left, right):
 
       >>> 'a_b_c' //split_at// '_'
       ['a', 'b', 'c']
+
+    See `isplit_at` to split large texts or binary data lazily.
     """
     return left.split(right)
 
 
+class Separator(object):
+    """
+    Separator for `isplit_at`, with a limit on the number of splits.
+
+    Argument *sep* is a string (or bytes) separator, or a compiled
+    regular expression; at most *maxsplit* splits are done (no limit
+    if *maxsplit* is ``None``), the rest of the text being the last
+    item::
+
+      >>> [str(part, 'ascii') for part in b'a,b,c,d' //isplit_at// Separator(b',', 2)]
+      ['a', 'b', 'c,d']
+    """
+    __slots__ = ['sep', 'maxsplit']
+
+    def __init__(self, sep, maxsplit=None):
+        if maxsplit is not None and maxsplit < 0:
+            raise ValueError("Argument `maxsplit` must be non-negative, got {0!r}"
+                             .format(maxsplit))
+        self.sep = sep
+        self.maxsplit = maxsplit
+
+    def __repr__(self):
+        return 'Separator({0!r}, {1!r})'.format(self.sep, self.maxsplit)
+
+
+def _split_points(text, sep, maxsplit):
+    """
+    Iterate over ``(start, end)`` positions of separators in *text*.
+    """
+    if hasattr(sep, 'finditer'):
+        # compiled regex
+        matches = sep.finditer(text)
+        if maxsplit is not None:
+            matches = itertools.islice(matches, maxsplit)
+        for match in matches:
+            yield match.span()
+        return
+    if not sep:
+        raise ValueError("Empty separator")
+    find = getattr(text, 'find', None)
+    if find is None:
+        # `memoryview` has no `.find()`, but regexes can search it
+        import re
+        for span in _split_points(text, re.compile(re.escape(sep)), maxsplit):
+            yield span
+        return
+    size = len(sep)
+    count = 0
+    # `mmap.find()` starts from the current file position by default
+    pos = find(sep, 0)
+    while pos >= 0 and (maxsplit is None or count < maxsplit):
+        yield pos, pos + size
+        count += 1
+        pos = find(sep, pos + size)
+
+
+@infix_operator('//')
+def isplit_at(left, right):
+    """
+    Lazily split *left* at every occurrence of separator *right*.
+    Delimited by ``//``.
+
+    Like `split_at`, but return an iterator over the parts, which are
+    found one at a time.  If *left* is a bytes-like object (`bytes`,
+    `bytearray`, `memoryview` or `mmap.mmap`), the parts are
+    `memoryview` slices of it, so no data is copied::
+
+      >>> parts = b'a\\r\\nbb\\r\\n' //isplit_at// b'\\r\\n'
+      >>> [bytes(part) for part in parts]
+      [b'a', b'bb', b'']
+
+    The separator *right* can be a string (of any length), a compiled
+    regular expression, or a `Separator` to limit the number of splits::
+
+      >>> import re
+      >>> list('a1b22c' //isplit_at// re.compile('[0-9]+'))
+      ['a', 'b', 'c']
+
+    This allows processing files of any size one record at a time,
+    e.g., by memory-mapping them::
+
+      with open('huge.log', 'rb') as stream:
+          data = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+          for line in data //isplit_at// b'\\n':
+              process(line)
+
+    Note that a memory map cannot be closed while slices of it are
+    still referenced.
+    """
+    maxsplit = None
+    if isinstance(right, Separator):
+        right, maxsplit = right.sep, right.maxsplit
+    if isinstance(left, (bytes, bytearray, memoryview)) or not hasattr(left, 'split'):
+        # bytes-like: slice a memoryview to avoid copies
+        view = memoryview(left)
+        return _isplit(left, view, right, maxsplit)
+    return _isplit(left, left, right, maxsplit)
+
+
+def _isplit(text, parts, sep, maxsplit):
+    start = 0
+    for sep_start, sep_end in _split_points(text, sep, maxsplit):
+        yield parts[start:sep_start]
+        start = sep_end
+    yield parts[start:]
+
+
 @infix_operator('<<')
 def then(lhs, rhs):
     """
@@ -99,13 +741,884 @@ def then(lhs, rhs):
         <<then>> _build_node_section
         <<then>> _validate_and_convert
         <<then>> _dereference_config_tree)
+
+    To run the same sequence of functions on many inputs, build a
+    `Pipeline` instead, starting from `START`.
     """
+    if isinstance(lhs, Pipeline):
+        return lhs._then(rhs)
     return rhs(lhs)
 
 
-import fnmatch
+def _compose(stages):
+    """
+    Return a function applying all functions in *stages* in order.
+
+    The function is generated from source code, so that the stages
+    are called one after the other with no intermediate objects.
+    """
+    names = ['_s{0}'.format(n) for n in range(len(stages))]
+    src = (
+        "def make({0}):\n"
+        "    def pipeline(value):\n"
+        "{1}"
+        "        return value\n"
+        "    return pipeline\n"
+    ).format(', '.join(names),
+             ''.join("        value = {0}(value)\n".format(name) for name in names))
+    namespace = {}
+    exec(compile(src, '<betwixt pipeline>', 'exec'), namespace)
+    return namespace['make'](*stages)
+
+
+class Pipeline(object):
+    """
+    A sequence of functions, applied one after the other.
+
+    Pipelines are built by chaining functions with `then`, starting
+    from the empty pipeline `START`, and can be then called like any
+    function::
+
+      >>> pipeline = START <<then>> abs <<then>> str <<then>> len
+      >>> pipeline(-123)
+      3
+      >>> [pipeline(n) for n in (1, -10, 100)]
+      [1, 2, 3]
+
+    The stages are compiled into a single function, so a pipeline is
+    much faster than running ``x <<then>> f <<then>> g ...`` on each
+    input.  The list of stages is available as attribute `stages`::
+
+      >>> pipeline.stages
+      (<built-in function abs>, <class 'str'>, <built-in function len>)
+
+    Pipelines are immutable: adding a stage returns a new pipeline.
+    Appending a pipeline to another one appends all its stages.
+
+    The streaming operators `each`, `where` and `batched` (and the
+    `parallel_map` ones) can be used in place of `then`, to build
+    pipelines that process an iterable lazily: ``START <<op>> x`` adds
+    a stage computing ``value <<op>> x``::
+
+      >>> evens = START <<where>> (lambda n: n % 2 == 0) <<each>> str
+      >>> list(evens(range(7)))
+      ['0', '2', '4', '6']
+
+    These operators check for a `Pipeline` left operand themselves;
+    other operators are applied to the pipeline as to any other
+    operand.  To add a stage applying some other operator, use a
+    section of it, e.g., ``START <<then>> op.right(x)``.
+    """
+    __slots__ = ['stages', '_run']
+
+    def __init__(self, stages=()):
+        self.stages = tuple(stages)
+        # compiled on first call, so that building a long pipeline
+        # stage by stage does not compile every intermediate one
+        self._run = None
+
+    def __call__(self, value):
+        run = self._run
+        if run is None:
+            run = self._run = _compose(self.stages)
+        return run(value)
+
+    def _then(self, func):
+        """
+        Return new pipeline with *func* (or all stages of it, if it's a
+        pipeline) appended.
+        """
+        if isinstance(func, Pipeline):
+            return Pipeline(self.stages + func.stages)
+        return Pipeline(self.stages + (func,))
+
+    def _apply(self, op, rhs):
+        """
+        Return new pipeline with a stage computing ``value <<op>> rhs`` appended.
+        """
+        return Pipeline(self.stages + (op.right(rhs),))
+
+    def __repr__(self):
+        return 'Pipeline({0!r})'.format(self.stages)
+
+
+START = Pipeline()
+"""
+The empty pipeline: start of a `Pipeline` built with `then`.
+"""
+
+
+## streaming stages
+
+# The following operators work like `then`, but on each item of an
+# iterable; they return iterators, so that arbitrarily long sequences
+# (e.g., lines read from a file) can be processed in constant memory.
+
+import itertools
+
+try:
+    # Python 2
+    _imap = itertools.imap
+    _ifilter = itertools.ifilter
+except AttributeError:
+    # Python 3
+    _imap = map
+    _ifilter = filter
+
+
+@infix_operator('<<')
+def each(lhs, rhs):
+    """
+    Lazily apply right-hand side to every item of left-hand side.
+    Delimited by ``<<`` and ``>>``.
+
+    Return an iterator; items are computed only when requested::
+
+      >>> squares = range(5) <<each>> (lambda n: n * n)
+      >>> list(squares)
+      [0, 1, 4, 9, 16]
+
+    Together with `where` and `batched`, this allows processing data
+    sources larger than the available memory, one item at a time::
+
+      with open('huge.log') as lines:
+          for chunk in (lines
+                        <<each>> str.strip
+                        <<where>> is_error
+                        <<batched>> 1000):
+              store(chunk)
+    """
+    if isinstance(lhs, Pipeline):
+        return lhs._apply(each, rhs)
+    return _imap(rhs, lhs)
+
+
+@infix_operator('<<')
+def where(lhs, rhs):
+    """
+    Lazily select the items of left-hand side satisfying right-hand side.
+    Delimited by ``<<`` and ``>>``.
+
+    Return an iterator over the items *x* of the left-hand side
+    iterable for which ``rhs(x)`` is true::
+
+      >>> list(range(10) <<where>> (lambda n: n % 3 == 0))
+      [0, 3, 6, 9]
+    """
+    if isinstance(lhs, Pipeline):
+        return lhs._apply(where, rhs)
+    return _ifilter(rhs, lhs)
+
+
+@infix_operator('<<')
+def batched(lhs, rhs):
+    """
+    Lazily group items of left-hand side into lists of right-hand side length.
+    Delimited by ``<<`` and ``>>``.
+
+    Return an iterator over lists of (at most) *rhs* consecutive items;
+    only the last list may be shorter::
+
+      >>> list(range(7) <<batched>> 3)
+      [[0, 1, 2], [3, 4, 5], [6]]
+
+    At most one batch is held in memory at any time.
+    """
+    if rhs < 1:
+        raise ValueError("Batch size must be a positive integer, got {0!r}"
+                         .format(rhs))
+    if isinstance(lhs, Pipeline):
+        return lhs._apply(batched, rhs)
+    return _batches(iter(lhs), rhs)
+
+
+def _batches(items, size):
+    islice = itertools.islice
+    while True:
+        batch = list(islice(items, size))
+        if not batch:
+            return
+        yield batch
+
+
+## parallel map
+
+# `pmap` and `tmap` are streaming counterparts of `each` which run
+# the right-hand side function over a pool of worker processes or
+# threads; use `parallel_map` to build variants with different
+# settings.
+
+_pools = {}
+_pools_lock = _Lock()
+
+
+def _shared_pool(kind, workers):
+    """
+    Return the process or thread pool for *kind* and *workers*.
+
+    Pools are created on first use and kept around for the lifetime
+    of the program, so that applying a parallel map operator does not
+    pay the pool startup cost each time.
+    """
+    key = (kind, workers)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            import concurrent.futures
+            if kind == 'process':
+                pool = concurrent.futures.ProcessPoolExecutor(workers)
+            else:
+                pool = concurrent.futures.ThreadPoolExecutor(workers)
+            _pools[key] = pool
+        return pool
+
+
+def shutdown_pools(wait=True):
+    """
+    Shut down all pools started by parallel map operators.
+
+    New pools will be started if a parallel map operator is used
+    again afterwards.
+    """
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown(wait)
+
+
+def _apply_to_chunk(func, chunk):
+    return [func(item) for item in chunk]
+
+
+def _parallel_map(executor, func, items, chunksize, ordered, window):
+    import collections
+    chunks = _batches(iter(items), chunksize)
+    submit = executor.submit
+    if ordered:
+        pending = collections.deque(
+            submit(_apply_to_chunk, func, chunk)
+            for chunk in itertools.islice(chunks, window))
+    else:
+        pending = set(
+            submit(_apply_to_chunk, func, chunk)
+            for chunk in itertools.islice(chunks, window))
+    try:
+        while pending:
+            if ordered:
+                done = [pending.popleft()]
+            else:
+                import concurrent.futures
+                done, pending = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                # keep at most *window* chunks in flight, so that
+                # memory use is bounded even for endless sources
+                for chunk in itertools.islice(chunks, 1):
+                    if ordered:
+                        pending.append(submit(_apply_to_chunk, func, chunk))
+                    else:
+                        pending.add(submit(_apply_to_chunk, func, chunk))
+                for result in future.result():
+                    yield result
+    finally:
+        # the consumer stopped early (or a call raised an exception)
+        for future in pending:
+            future.cancel()
+
+
+def _cpu_count():
+    try:
+        return os.cpu_count() or 1
+    except AttributeError:
+        # Python 2
+        import multiprocessing
+        return multiprocessing.cpu_count()
+
+
+def parallel_map(executor='thread', workers=None, chunksize=1, ordered=True,
+                 name=None):
+    """
+    Return a ``<<``-delimited operator mapping a function over a pool.
+
+    Applying the operator as ``items <<op>> func`` returns an iterator
+    over ``func(item)`` for every *item* in *items*, like `each` does;
+    however, calls to *func* run concurrently on a
+    `concurrent.futures` executor:
+
+    - if *executor* is ``'thread'`` or ``'process'``, a thread or
+      process pool with *workers* workers (default: as many as the
+      `concurrent.futures` default), shared by all operators with the
+      same settings and started on first use (see also `shutdown_pools`);
+    - otherwise, *executor* must be an `Executor` instance, which is
+      used as-is.
+
+    Items are sent to workers in chunks of *chunksize* items; larger
+    chunks reduce communication overhead, especially for process pools.
+    Only a bounded number of chunks is in flight at any time, so
+    *items* can be an arbitrarily long iterable.
+
+    If *ordered* is true (default), results are returned in the same
+    order as the corresponding items; otherwise, chunk results are
+    returned as soon as they are ready.
+
+    With process pools, *func* and the items must be picklable: in
+    particular, *func* cannot be a lambda or a nested function.  It can
+    be an operator section or partial operation, though, which are
+    pickled as a reference to the operator plus the bound operand::
+
+      names <<pmap>> matches.right('*.txt')
+
+    Optional argument *name* is passed on to `infix_operator`, to
+    pickle the operator by reference.
+    """
+    if chunksize < 1:
+        raise ValueError("Chunk size must be a positive integer, got {0!r}"
+                         .format(chunksize))
+    if executor not in ('thread', 'process') and not hasattr(executor, 'submit'):
+        raise ValueError(
+            "Argument `executor` must be 'thread', 'process',"
+            " or a `concurrent.futures.Executor` instance; got {0!r}"
+            .format(executor))
+    if workers is not None and workers < 1:
+        raise ValueError("Number of workers must be a positive integer, got {0!r}"
+                         .format(workers))
+    # number of chunks in flight: enough to keep all workers busy
+    window = 2 * (workers or getattr(executor, '_max_workers', None)
+                  or _cpu_count())
+
+    def pmap(items, func):
+        if isinstance(items, Pipeline):
+            return items._apply(op, func)
+        if isinstance(executor, str):
+            pool = _shared_pool(executor, workers)
+        else:
+            pool = executor
+        return _parallel_map(pool, func, items, chunksize, ordered, window)
+
+    pmap.__name__ = '{0}_map'.format(
+        executor if isinstance(executor, str) else 'executor')
+    op = infix_operator('<<', pmap, name=name)
+    return op
+
+
+pmap = parallel_map('process', chunksize=16, name='betwixt.examples.pmap')
+"""
+Map a function over items in a shared process pool.
+Delimited by ``<<`` and ``>>``.
+
+``items <<pmap>> func`` returns an iterator over ``func(item)`` for
+each item, in order; see `parallel_map` for details and for building
+variants with different settings.
+"""
+
+tmap = parallel_map('thread', name='betwixt.examples.tmap')
+"""
+Map a function over items in a shared thread pool.
+Delimited by ``<<`` and ``>>``.
+
+``items <<tmap>> func`` returns an iterator over ``func(item)`` for
+each item, in order; see `parallel_map` for details and for building
+variants with different settings.
+"""
+
+
+def _glob_tokens(pattern):
+    """
+    Split glob *pattern* into a list of literal characters and wildcards.
+
+    Wildcards (``*``, ``?`` and bracket expressions like ``[a-z]``)
+    are returned as ``None``; bracket expressions that are not closed
+    are literal characters, as in `fnmatch`.
+    """
+    tokens = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if c in '*?':
+            tokens.append(None)
+            i += 1
+        elif c == '[':
+            j = i + 1
+            if j < n and pattern[j] == '!':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            j = pattern.find(']', j)
+            if j < 0:
+                tokens.append(c)
+                i += 1
+            else:
+                tokens.append(None)
+                i = j + 1
+        else:
+            tokens.append(c)
+            i += 1
+    return tokens
+
+
+class Globs(object):
+    """
+    A set of glob patterns, matched all at once.
+
+    Use a `Globs` instance as the right-hand side of `matches` and
+    `matching` to test names against many patterns::
+
+      >>> sources = Globs(['*.py', 'src/*.c', 'Makefile'])
+      >>> 'src/main.c' /matches/ sources
+      True
+      >>> ['setup.py', 'README', 'src/x.c'] /matching/ sources
+      ['setup.py', 'src/x.c']
+
+    Method `match` tells which pattern matched::
+
+      >>> sources.match('src/util.c')
+      'src/*.c'
+      >>> sources.match('README') is None
+      True
+
+    Patterns follow the syntax and (case-sensitive) semantics of
+    `fnmatch.fnmatchcase`; if more than one pattern matches, the
+    first one in the list is reported.
+
+    Patterns are indexed by their literal suffix (e.g., ``.py`` in
+    ``*.py``) or, failing that, their literal prefix, so that each name
+    is only checked against the few patterns it could possibly match;
+    patterns consisting of just a prefix, a ``*`` and a suffix are
+    checked with plain string comparisons.  All remaining patterns
+    (e.g., ``*.[ch]``) are merged into a single regular expression, so
+    they are tried in one pass.
+    """
+    __slots__ = ['patterns', '_suffixes', '_suffix_lengths', '_prefixes',
+                 '_prefix_lengths', '_checks', '_combined']
+
+    def __init__(self, patterns):
+        import fnmatch
+        import re
+        self.patterns = tuple(patterns)
+        self._suffixes = {}  # literal suffix -> list of pattern indices
+        self._prefixes = {}  # literal prefix -> list of pattern indices
+        self._checks = []    # pattern index -> function checking a name
+        unindexed = []
+        for index, pattern in enumerate(self.patterns):
+            tokens = _glob_tokens(pattern)
+            if None not in tokens:
+                # no wildcards
+                self._checks.append(pattern.__eq__)
+                self._suffixes.setdefault(pattern, []).append(index)
+                continue
+            first = tokens.index(None)
+            last = len(tokens) - tokens[::-1].index(None)
+            prefix = ''.join(tokens[:first])
+            suffix = ''.join(tokens[last:])
+            if first == last - 1 and pattern[len(prefix)] == '*':
+                self._checks.append(self._simple_check(prefix, suffix))
+            else:
+                self._checks.append(
+                    re.compile(fnmatch.translate(pattern)).match)
+            if suffix:
+                self._suffixes.setdefault(suffix, []).append(index)
+            elif prefix:
+                self._prefixes.setdefault(prefix, []).append(index)
+            else:
+                unindexed.append(index)
+        self._suffix_lengths = sorted(set(len(s) for s in self._suffixes))
+        self._prefix_lengths = sorted(set(len(p) for p in self._prefixes))
+        if unindexed:
+            self._combined = re.compile('|'.join(
+                '(?P<_{0}>{1})'.format(index, fnmatch.translate(self.patterns[index]))
+                for index in unindexed)).match
+        else:
+            self._combined = None
+
+    @staticmethod
+    def _simple_check(prefix, suffix):
+        minlen = len(prefix) + len(suffix)
+
+        def check(name):
+            return (len(name) >= minlen
+                    and name.startswith(prefix)
+                    and name.endswith(suffix))
+        return check
+
+    def _candidates(self, name):
+        candidates = []
+        size = len(name)
+        for length in self._suffix_lengths:
+            if length > size:
+                break
+            found = self._suffixes.get(name[size-length:])
+            if found:
+                candidates.extend(found)
+        for length in self._prefix_lengths:
+            if length > size:
+                break
+            found = self._prefixes.get(name[:length])
+            if found:
+                candidates.extend(found)
+        return candidates
+
+    def match_index(self, name):
+        """
+        Return the index of the first pattern matching *name*, or ``None``.
+        """
+        best = None
+        if self._combined is not None:
+            m = self._combined(name)
+            if m is not None:
+                best = int(m.lastgroup[1:])
+        candidates = self._candidates(name)
+        if len(candidates) > 1:
+            candidates.sort()
+        checks = self._checks
+        for index in candidates:
+            if best is not None and index > best:
+                break
+            if checks[index](name):
+                return index
+        return best
+
+    def match(self, name):
+        """
+        Return the first pattern matching *name*, or ``None``.
+        """
+        index = self.match_index(name)
+        if index is None:
+            return None
+        return self.patterns[index]
+
+    def filter(self, names):
+        """
+        Return the list of items in *names* matching any pattern.
+        """
+        match_index = self.match_index
+        return [name for name in names if match_index(name) is not None]
+
+    def __repr__(self):
+        return 'Globs({0!r})'.format(list(self.patterns))
+
+
+## walking directory trees
+
+# `str()` is enough for Python 2, which has no path-like objects
+_fspath = getattr(os, 'fspath', str)
+
+
+class _DirEntry(object):
+    """
+    Stand-in for `os.DirEntry`, on Python versions without `os.scandir`.
+    """
+    __slots__ = ['name', 'path']
+
+    def __init__(self, top, name):
+        self.name = name
+        self.path = os.path.join(top, name)
+
+    def is_dir(self, follow_symlinks=True):
+        if not follow_symlinks and os.path.islink(self.path):
+            return False
+        return os.path.isdir(self.path)
+
+
+def _listdir_entries(path):
+    return [_DirEntry(path, name) for name in os.listdir(path)]
+
+
+# `os.scandir` needs Python 3.5+
+_scandir = getattr(os, 'scandir', _listdir_entries)
+
+
+class Root(object):
+    """
+    Mark a directory as the root of a tree to search with `matching`.
+
+    ``Root(path) /matching/ pattern`` returns an iterator over the
+    paths of files and directories under *path* matching *pattern*;
+    if *workers* is given, directories are read concurrently by that
+    many threads (of the pool shared with `tmap`), and results are
+    returned in no particular order.
+    """
+    __slots__ = ['path', 'workers']
+
+    def __init__(self, path, workers=None):
+        if workers is not None and workers < 1:
+            raise ValueError(
+                "Number of workers must be a positive integer, got {0!r}"
+                .format(workers))
+        self.path = path
+        self.workers = workers
+
+    def __repr__(self):
+        if self.workers is None:
+            return 'Root({0!r})'.format(self.path)
+        return 'Root({0!r}, workers={1!r})'.format(self.path, self.workers)
+
+
+class _PathPattern(object):
+    """
+    Match paths against a glob pattern one path segment at a time.
+
+    The pattern is split at ``/``; each segment is matched against one
+    directory entry name with `fnmatch.fnmatchcase`, except for ``**``,
+    which matches any number (including zero) of segments.  Matching
+    state is the tuple of pattern positions that the path read so far
+    can be at: a directory is only worth descending into if its state
+    is not empty.
+    """
+    __slots__ = ['_segments', 'initial']
+
+    def __init__(self, pattern):
+        import fnmatch
+        import re
+        segments = []
+        for segment in pattern.split('/'):
+            if segment in ('', '.'):
+                continue
+            if segment == '**':
+                if segments and segments[-1] is None:
+                    continue
+                segments.append(None)
+            elif None in _glob_tokens(segment):
+                segments.append(re.compile(fnmatch.translate(segment)).match)
+            else:
+                segments.append(segment.__eq__)
+        self._segments = segments
+        self.initial = self._closure((0,))
+
+    def _closure(self, states):
+        # ``**`` can match zero segments: skip over it
+        segments = self._segments
+        result = []
+        for state in states:
+            while state not in result:
+                result.append(state)
+                if state < len(segments) and segments[state] is None:
+                    state += 1
+                else:
+                    break
+        return tuple(sorted(result))
+
+    def advance(self, states, name):
+        """
+        Return the state after reading path segment *name* in *states*.
+        """
+        segments = self._segments
+        end = len(segments)
+        result = []
+        for state in states:
+            if state == end:
+                continue
+            segment = segments[state]
+            if segment is None:
+                # ``**`` consumes the segment and stays
+                result.append(state)
+            elif segment(name):
+                result.append(state + 1)
+        return self._closure(result) if result else ()
+
+    def accepts(self, states, relpath):  # pylint: disable=unused-argument
+        return len(self._segments) in states
+
+    def descend(self, states):
+        return bool(states) and states[0] < len(self._segments)
+
+
+class _GlobsPattern(object):
+    """
+    Match paths against all patterns in a `Globs` set.
+
+    Each pattern is matched one path segment at a time by a
+    `_PathPattern`, so that the same rules apply as for a single
+    pattern; matching state is the tuple of the states of all
+    patterns, and a directory is only worth descending into if any
+    pattern could still match below it.
+    """
+    __slots__ = ['_patterns', 'initial']
+
+    def __init__(self, globs):
+        self._patterns = tuple(_PathPattern(pattern) for pattern in globs.patterns)
+        self.initial = tuple(pattern.initial for pattern in self._patterns)
+
+    def advance(self, states, name):
+        result = tuple(pattern.advance(state, name)
+                       for pattern, state in zip(self._patterns, states))
+        return result if any(result) else ()
+
+    def accepts(self, states, relpath):
+        return any(pattern.accepts(state, relpath)
+                   for pattern, state in zip(self._patterns, states))
+
+    def descend(self, states):
+        return any(pattern.descend(state)
+                   for pattern, state in zip(self._patterns, states))
+
+
+def _scan_dir(path, relpath, states, pattern):
+    """
+    Return matching paths and subdirectories to visit in directory *path*.
+    """
+    found = []
+    subdirs = []
+    try:
+        entries = _scandir(path)
+    except OSError:
+        # unreadable or vanished directory, ignore as `os.walk` does
+        return found, subdirs
+    try:
+        for entry in entries:
+            name = entry.name
+            entry_relpath = (relpath + '/' + name) if relpath else name
+            entry_states = pattern.advance(states, name)
+            if not entry_states:
+                continue
+            if pattern.accepts(entry_states, entry_relpath):
+                found.append(entry.path)
+            try:
+                # do not follow symlinks, which could lead to loops
+                is_dir = entry.is_dir(follow_symlinks=False)
+            except OSError:
+                is_dir = False
+            if is_dir and pattern.descend(entry_states):
+                subdirs.append((entry.path, entry_relpath, entry_states))
+    finally:
+        # the iterator of `os.scandir` is a context manager only
+        # since Python 3.6
+        close = getattr(entries, 'close', None)
+        if close is not None:
+            close()
+    return found, subdirs
+
+
+def _walk_matching(top, pattern, workers=None):
+    """
+    Iterate over paths under directory *top* that match *pattern*.
+    """
+    if isinstance(pattern, Globs):
+        pattern = _GlobsPattern(pattern)
+    else:
+        pattern = _PathPattern(pattern)
+    pending = [(top, '', pattern.initial)]
+    if workers is None:
+        while pending:
+            found, subdirs = _scan_dir(*(pending.pop() + (pattern,)))
+            for path in found:
+                yield path
+            # visit subdirectories in listing order
+            pending.extend(reversed(subdirs))
+        return
+    executor = _shared_pool('thread', workers)
+    window = 2 * workers
+    running = set()
+    try:
+        while pending or running:
+            while pending and len(running) < window:
+                running.add(executor.submit(
+                    _scan_dir, *(pending.pop() + (pattern,))))
+            import concurrent.futures
+            done, running = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                found, subdirs = future.result()
+                pending.extend(subdirs)
+                for path in found:
+                    yield path
+    finally:
+        for future in running:
+            future.cancel()
+
+
+def _walk_root(root, pattern):
+    if isinstance(root, Root):
+        return _walk_matching(_fspath(root.path), pattern, root.workers)
+    # a `pathlib.Path` (only on Python 3.8+, see `matching`): return
+    # paths of the same type
+    return (type(root)(path) for path in _walk_matching(_fspath(root), pattern))
+
+
+def _is_path(obj):
+    # if `pathlib` has not been imported, there can be no paths
+    pathlib = sys.modules.get('pathlib')
+    return pathlib is not None and isinstance(obj, pathlib.PurePath)
+
+
+# The following two functions import `fnmatch` at their first call,
+# then replace themselves with the function from `fnmatch`.
 
-matches = infix_operator('/', fnmatch.fnmatchcase)
+def _fnmatchcase(name, pattern):
+    global _fnmatchcase  # pylint: disable=global-statement,invalid-name
+    from fnmatch import fnmatchcase as _fnmatchcase
+    return _fnmatchcase(name, pattern)
+
+
+def _fnfilter(names, pattern):
+    global _fnfilter  # pylint: disable=global-statement,invalid-name
+    from fnmatch import filter as _fnfilter
+    return _fnfilter(names, pattern)
+
+
+def _matches(name, pattern):
+    if isinstance(pattern, Globs):
+        return pattern.match_index(name) is not None
+    return _fnmatchcase(name, pattern)
+
+
+def _matches_section(pattern):
+    # compile the pattern once for all names; other kinds of names
+    # (e.g., NumPy arrays) are passed on to `matches`
+    if isinstance(pattern, Globs):
+        match_index = pattern.match_index
+
+        def match(name):
+            if isinstance(name, str):
+                return match_index(name) is not None
+            return matches._op(name, pattern)
+        return match
+    if isinstance(pattern, str):
+        import fnmatch
+        import re
+        search = re.compile(fnmatch.translate(pattern)).match
+
+        def match(name):  # pylint: disable=function-redefined
+            if isinstance(name, str):
+                return search(name) is not None
+            return matches._op(name, pattern)
+        return match
+    return None
+
+
+def _matching(names, pattern):
+    if isinstance(names, Root) or _is_path(names):
+        return _walk_root(names, pattern)
+    if isinstance(pattern, Globs):
+        return pattern.filter(names)
+    return _fnfilter(names, pattern)
+
+
+def _matches_kernel(names, patterns):
+    # NumPy must be already loaded, since one of the operands is an array
+    import numpy
+    if isinstance(patterns, numpy.ndarray):
+        result = numpy.frompyfunc(_matches, 2, 1)(names, patterns)
+    elif isinstance(patterns, Globs):
+        match_index = patterns.match_index
+        result = numpy.frompyfunc(
+            lambda name: match_index(name) is not None, 1, 1)(names)
+    else:
+        # compile the pattern only once for the whole array
+        import fnmatch
+        import re
+        match = re.compile(fnmatch.translate(patterns)).match
+        result = numpy.frompyfunc(lambda name: match(name) is not None, 1, 1)(names)
+    return result.astype(bool)
+
+
+def _matching_kernel(names, pattern):
+    return names[_matches_kernel(names, pattern)]
+
+
+matches = infix_operator('/', _matches, vectorize=_matches_kernel,
+                         bind_right=_matches_section,
+                         name='betwixt.examples.matches')
 """
 Check if left-hand side matches the glob expression on the right-hand side.
 Delimited by ``/``.
@@ -117,9 +1630,46 @@ Examples::
 
   >>> 'bar.jpg' /matches/ '*.png'
   False
+
+The right-hand side can also be a `Globs` set of patterns, in which
+case the result is true if any pattern matches.
+
+If either side is a NumPy array, return a boolean array::
+
+  >>> import numpy as np
+  >>> np.array(['foo.txt', 'bar.jpg']) /matches/ '*.txt'
+  array([ True, False])
+
+To match many names against the same pattern, use a section: the
+pattern is compiled only once::
+
+  >>> is_text = matches.right('*.txt')
+  >>> [name for name in ['foo.txt', 'bar.jpg'] if is_text(name)]
+  ['foo.txt']
+
+Methods `map`, `starmap` and `outer` compile each distinct pattern only
+once, e.g., to match every path against every pattern::
+
+  >>> matches.outer(['foo.txt', 'bar.jpg'], ['*.txt', '*.jpg', 'b*'])
+  [[True, False, False], [False, True, True]]
 """
 
-matching = infix_operator('/', fnmatch.filter)
+
+@matches.batch
+def _matches_batch(names, patterns):
+    matchers = {}
+    result = []
+    for name, pattern in zip(names, patterns):
+        match = matchers.get(pattern)
+        if match is None:
+            match = matchers[pattern] = (_matches_section(pattern)
+                                         or matches.right(pattern))
+        result.append(match(name))
+    return result
+
+
+matching = infix_operator('/', _matching, vectorize=_matching_kernel,
+                          name='betwixt.examples.matching')
 """
 Given a list on the left-hand side, return list of
 items that match the glob pattern on the right-hand side.
@@ -132,12 +1682,41 @@ Examples::
 
   >>> ['foo.txt', 'bar.txt', 'quux.png'] /matching/ '*.pjg'
   []
-"""
 
+The right-hand side can also be a `Globs` set of patterns, in which
+case items matching any pattern are returned.
 
-import os
+If the left-hand side is a directory, given as a `Root` instance (or,
+on Python 3.8+, as a `pathlib.Path`), return an iterator over the
+paths of files and directories under it, whose path relative to the
+directory matches the pattern::
+
+  for path in Root('/data') /matching/ 'logs/**/*.gz':
+      ...
+
+Before Python 3.8, ``path / x`` raises `TypeError` for any *x* that
+is not a path or string, so ``path /matching/ pattern`` fails before
+`matching` is even applied; use ``Root(path)`` instead, which works
+with any Python version.
 
-join = infix_operator('/', os.path.join)
+The directory is read while iterating, and subdirectories that cannot
+contain any match are skipped.  In this case, the pattern is matched
+one path component at a time: ``*``, ``?`` and ``[...]`` never match
+``/``, and a ``**`` component matches any number of directories.  The
+same holds for each pattern of a `Globs` set, even though
+``name /matches/ globs`` matches whole strings with `fnmatch`, where
+``*`` also matches ``/``.  Symbolic links to directories are not
+followed.
+
+If the left-hand side is a NumPy array, return an array::
+
+  >>> import numpy as np
+  >>> np.array(['foo.txt', 'bar.txt', 'quux.png']) /matching/ '*.txt'
+  array(['foo.txt', 'bar.txt'], dtype='<U8')
+"""
+
+
+join = infix_operator('/', os.path.join, name='betwixt.examples.join')
 """
 Append relative path the the right-hand side to the patch on the left.
 Delimited by ``/``.
@@ -152,3 +1731,49 @@ Examples::
   >>> '.' /join/ 'bar'
   './bar'
 """
+
+
+def _concat(lhs, rhs):
+    return lhs + rhs
+
+
+def _concat_all(*parts):
+    cls = type(parts[0])
+    if all(type(part) is cls for part in parts):
+        if cls in (str, bytes):
+            return parts[0][:0].join(parts)
+        if cls in (list, tuple):
+            return cls(itertools.chain.from_iterable(parts))
+    result = parts[0]
+    for part in parts[1:]:
+        result = result + part
+    return result
+
+
+concat = infix_operator('+', _concat, associative=_concat_all,
+                        name='betwixt.examples.concat')
+"""
+Concatenate the left-hand side and the right-hand side.
+Delimited by ``+``.
+
+This is Python's ``lhs + rhs``, for strings, lists, tuples, etc.;
+however, the operator is associative (see `betwixt.chain`): the
+result is a `betwixt.chain.Chain`, and a whole chain ``a +concat+ b
++concat+ c ...`` of strings, bytes, lists or tuples is concatenated
+at once when first used, instead of copying the partial result at
+each step::
+
+  >>> 'Hello' +concat+ ', ' +concat+ 'world'
+  'Hello, world'
+  >>> [1] +concat+ [2, 3] +concat+ [4]
+  [1, 2, 3, 4]
+
+Chains stand in for their result in most code, but not everywhere;
+use `betwixt.chain.materialize` to get the result itself, e.g., to
+pass it to a function that requires a `str` instance::
+
+  >>> from betwixt.chain import materialize
+  >>> import re
+  >>> re.match('a+', materialize('a' +concat+ 'ab')).group()
+  'aa'
+"""
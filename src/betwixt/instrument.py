@@ -0,0 +1,368 @@
+"""
+Per-operator statistics: number of applications, errors, and latency.
+
+Instrumentation is off by default; turn it on by calling
+`enable_stats()`, or by setting environment variable ``BETWIXT_STATS``
+to a non-empty value other than ``0`` before importing `betwixt`.
+Statistics are then returned by `stats()`, as a dictionary or in the
+Prometheus text exposition format::
+
+  >>> import betwixt
+  >>> plus = betwixt.infix_operator('+', lambda lhs, rhs: lhs + rhs,
+  ...                               name='example.plus')
+  >>> betwixt.enable_stats()
+  >>> [1 +plus+ 2, 3 +plus+ 4]
+  [3, 7]
+  >>> betwixt.stats()['+example.plus+']['calls']
+  2
+  >>> betwixt.disable_stats()
+
+When instrumentation is off, operators run exactly the same code as
+if this module did not exist: turning it on replaces the function
+called by each operator with a wrapper that takes measurements (and,
+for operators made with ``specialize=True``, switches the operator to
+the generic class of its delimiter, which looks the function up on
+the operator); turning it off restores the original function and
+class.  Statistics are kept until `reset_stats()` is called.
+
+Latencies are collected in a histogram with power-of-2 buckets (in
+nanoseconds), so percentiles are approximate: they are reported as
+the upper bound of the bucket where they fall.  The time measured is
+the time taken by the call to the wrapped function; for operators
+wrapping a coroutine function, that's only the time to create the
+coroutine.
+
+Each thread counts applications in its own record, and records of
+all threads are only added up by `stats()`: threads applying the same
+operator at the same time do not contend for a lock, nor for the
+memory holding the counters.
+"""
+# Copyright (C) 2016-2020 Riccardo Murri <riccardo.murri@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# make coding more python3-ish, must be the first statement
+from __future__ import (absolute_import, division, print_function)
+
+import threading
+import weakref
+
+from . import _delimiter_to_class, _operator_name, _operators
+
+try:
+    from time import perf_counter_ns as _clock
+except ImportError:
+    # Python < 3.7
+    from timeit import default_timer as _timer
+
+    def _clock():
+        return int(_timer() * 1e9)
+
+
+__all__ = [
+    'disable_stats',
+    'enable_stats',
+    'reset_stats',
+    'stats',
+]
+
+
+# operator -> statistics record, kept until `reset_stats()`
+_records = weakref.WeakKeyDictionary()
+
+# instrumented operator -> original function and class
+_saved = weakref.WeakKeyDictionary()
+
+_lock = threading.Lock()
+
+# bucket *n* counts calls taking less than ``2**n`` nanoseconds (and at
+# least ``2**(n-1)``); the last one counts all the slower calls
+_NBUCKETS = 40
+
+
+class _Counters(object):
+    """
+    Statistics of one operator, collected by a single thread.
+    """
+    __slots__ = ['calls', 'errors', 'total_ns', 'buckets']
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.calls = 0
+        self.errors = 0
+        self.total_ns = 0
+        self.buckets = [0] * _NBUCKETS
+
+
+class _Record(object):
+    """
+    Statistics of one operator.
+    """
+    __slots__ = ['name', 'delimiter', 'local', 'counters']
+
+    def __init__(self, name, delimiter):
+        self.name = name
+        self.delimiter = delimiter
+        # each thread's own `_Counters`, also listed in `counters`
+        self.local = threading.local()
+        self.counters = []
+
+    def new_counters(self):
+        """
+        Return `_Counters` for the calling thread.
+        """
+        counters = self.local.counters = _Counters()
+        with _lock:
+            self.counters.append(counters)
+        return counters
+
+
+def _instrumented(func, record):
+    """
+    Return a function calling *func* and updating *record*.
+    """
+    last = _NBUCKETS - 1
+    local = record.local
+
+    def instrumented(lhs, rhs):
+        try:
+            counters = local.counters
+        except AttributeError:
+            counters = record.new_counters()
+        start = _clock()
+        try:
+            return func(lhs, rhs)
+        except BaseException:
+            counters.errors += 1
+            raise
+        finally:
+            elapsed = _clock() - start
+            counters.calls += 1
+            counters.total_ns += elapsed
+            counters.buckets[min(elapsed.bit_length(), last)] += 1
+    instrumented.__wrapped__ = func
+    return instrumented
+
+
+def _name_of(func):
+    # use the name of the innermost function, not of wrappers made
+    # by `infix_operator` options; only for operators without a name
+    # (see `_operator_name`), since many operators are made by the
+    # same function (e.g., all those returned by `parallel_map`)
+    while getattr(func, '__wrapped__', None) is not None:
+        func = func.__wrapped__
+    return (getattr(func, '__qualname__', None)
+            or getattr(func, '__name__', None)
+            or repr(func))
+
+
+def _delimiter_of(op):
+    for delimiter, cls in _delimiter_to_class.items():
+        if isinstance(op, cls):
+            return delimiter
+    return '?'
+
+
+def _instrument(op):
+    """
+    Start collecting statistics for operator *op*.
+    """
+    with _lock:
+        if op in _saved:
+            return
+        record = _records.get(op)
+        if record is None:
+            record = _records[op] = _Record(_name_of(op._op), _delimiter_of(op))
+        cls = op.__class__
+        _saved[op] = (op._op, cls)
+        op._op = _instrumented(op._op, record)
+        # specialized classes bind the original function in their code
+        generic = getattr(cls, '_specialized_from', None)
+        if generic is not None:
+            op.__class__ = generic
+
+
+def _uninstrument(op):
+    """
+    Stop collecting statistics for operator *op*.
+    """
+    with _lock:
+        saved = _saved.pop(op, None)
+        if saved is None:
+            return
+        op._op, op.__class__ = saved
+
+
+def enable_stats():
+    """
+    Start collecting statistics for all operators, old and new.
+    """
+    import betwixt
+    betwixt._instrument_new = _instrument
+    for ref in list(_operators.values()):
+        op = ref()
+        if op is not None:
+            _instrument(op)
+
+
+def disable_stats():
+    """
+    Stop collecting statistics; already collected ones are kept.
+    """
+    import betwixt
+    betwixt._instrument_new = None
+    for op in list(_saved.keys()):
+        _uninstrument(op)
+
+
+def reset_stats():
+    """
+    Forget all the statistics collected so far.
+    """
+    with _lock:
+        for record in _records.values():
+            for counters in record.counters:
+                counters.reset()
+
+
+def _collect():
+    """
+    Return list of ``(name, delimiter, calls, errors, total_ns, buckets)``.
+
+    Statistics of operators with the same name and delimiter are merged.
+    """
+    merged = {}
+    with _lock:
+        # operators made by decorating a function are only bound to
+        # their name after being instrumented, so look it up now
+        records = [(_operator_name(op) or record.name, record.delimiter,
+                    list(record.counters))
+                   for op, record in list(_records.items())]
+    for name, delimiter, all_counters in records:
+        entry = merged.get((name, delimiter))
+        if entry is None:
+            entry = merged[(name, delimiter)] = [0, 0, 0, [0] * _NBUCKETS]
+        for counters in all_counters:
+            entry[0] += counters.calls
+            entry[1] += counters.errors
+            entry[2] += counters.total_ns
+            entry[3] = [a + b for a, b in zip(entry[3], counters.buckets)]
+    return [key + tuple(value) for key, value in sorted(merged.items())]
+
+
+def _percentile(buckets, calls, fraction):
+    if not calls:
+        return None
+    threshold = fraction * calls
+    count = 0
+    for index, number in enumerate(buckets):
+        count += number
+        if count >= threshold:
+            return (2 ** index) / 1e9
+    return (2 ** (len(buckets) - 1)) / 1e9
+
+
+# closing delimiter of keys returned by `stats()`, where it differs
+# from the opening one
+_CLOSING = {'<<': '>>'}
+
+
+def _as_dict():
+    result = {}
+    for name, delimiter, calls, errors, total_ns, buckets in _collect():
+        closing = _CLOSING.get(delimiter, delimiter)
+        result['{0}{1}{2}'.format(delimiter, name, closing)] = {
+            'name': name,
+            'delimiter': delimiter,
+            'calls': calls,
+            'errors': errors,
+            'total_seconds': total_ns / 1e9,
+            'mean_seconds': (total_ns / 1e9 / calls) if calls else None,
+            'p50_seconds': _percentile(buckets, calls, 0.50),
+            'p90_seconds': _percentile(buckets, calls, 0.90),
+            'p99_seconds': _percentile(buckets, calls, 0.99),
+        }
+    return result
+
+
+def _label(value):
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _as_prometheus():
+    lines = [
+        '# HELP betwixt_operator_calls_total Applications of infix operators.',
+        '# TYPE betwixt_operator_calls_total counter',
+        '# HELP betwixt_operator_errors_total Applications of infix operators'
+        ' that raised an exception.',
+        '# TYPE betwixt_operator_errors_total counter',
+        '# HELP betwixt_operator_latency_seconds Time taken by applications'
+        ' of infix operators.',
+        '# TYPE betwixt_operator_latency_seconds histogram',
+    ]
+    for name, delimiter, calls, errors, total_ns, buckets in _collect():
+        labels = 'operator="{0}",delimiter="{1}"'.format(
+            _label(name), _label(delimiter))
+        lines.append('betwixt_operator_calls_total{{{0}}} {1}'.format(labels, calls))
+        lines.append('betwixt_operator_errors_total{{{0}}} {1}'.format(labels, errors))
+        count = 0
+        for index, number in enumerate(buckets[:-1]):
+            count += number
+            lines.append('betwixt_operator_latency_seconds_bucket{{{0},le="{1!r}"}} {2}'
+                         .format(labels, (2 ** index) / 1e9, count))
+        lines.append('betwixt_operator_latency_seconds_bucket{{{0},le="+Inf"}} {1}'
+                     .format(labels, calls))
+        lines.append('betwixt_operator_latency_seconds_sum{{{0}}} {1!r}'
+                     .format(labels, total_ns / 1e9))
+        lines.append('betwixt_operator_latency_seconds_count{{{0}}} {1}'
+                     .format(labels, calls))
+    return '\n'.join(lines) + '\n'
+
+
+def stats(format='dict'):  # pylint: disable=redefined-builtin
+    """
+    Return statistics collected on operator applications.
+
+    If *format* is ``'dict'`` (default), return a dictionary mapping
+    each operator, written as ``<delimiter><name><delimiter>`` (e.g.,
+    ``|betwixt.examples.contains|``, or ``<<betwixt.examples.then>>``)
+    to a dictionary with keys:
+
+    - ``name``, ``delimiter``: name and delimiter of the operator; the
+      name is the dotted one given to `infix_operator` or the module
+      and name of the function decorated to make the operator, or
+      else (e.g., for an operator made from a lambda or a local
+      function) the qualified name of the wrapped function;
+    - ``calls``: number of applications;
+    - ``errors``: number of applications that raised an exception;
+    - ``total_seconds``, ``mean_seconds``: total and mean time taken;
+    - ``p50_seconds``, ``p90_seconds``, ``p99_seconds``: approximate
+      percentiles of the time taken.
+
+    If *format* is ``'prometheus'``, return the same data in the
+    Prometheus text exposition format, as metrics
+    ``betwixt_operator_calls_total``, ``betwixt_operator_errors_total``,
+    and histogram ``betwixt_operator_latency_seconds``.
+
+    Operators with the same name and delimiter are reported together.
+    """
+    if format == 'dict':
+        return _as_dict()
+    if format == 'prometheus':
+        return _as_prometheus()
+    raise ValueError("Argument `format` must be 'dict' or 'prometheus', got {0!r}"
+                     .format(format))
@@ -0,0 +1,257 @@
+"""
+Deferred evaluation of infix operator applications.
+
+Operators created with ``infix_operator(..., lazy=True)`` do not call
+the wrapped function when applied; instead, ``lhs |op| rhs`` returns an
+expression node (an `Expr` instance) recording the operator and its
+operands.  Nodes can in turn be operands of other lazy operators,
+building an expression graph which is computed by `evaluate` (one
+expression) or `evaluate_many` (a batch of expressions).
+
+Expressions may contain placeholders (`Var` instances) whose value is
+given at evaluation time, so that the same expressions can be
+evaluated over and over with different inputs::
+
+  >>> from betwixt import infix_operator, Var, evaluate
+  >>> plus = infix_operator('|', lambda lhs, rhs: lhs + rhs, lazy=True, pure=True)
+  >>> expr = (Var('x') |plus| 1) |plus| (2 |plus| 3)
+  >>> evaluate(expr, {'x': 10})
+  16
+  >>> evaluate(expr, {'x': 20})
+  26
+
+When evaluating, identical subexpressions of *pure* operators (i.e.,
+those created with ``pure=True``, whose result depends only on the
+operands) are computed only once, across all the expressions given to
+`evaluate_many`; in addition, the value of pure subexpressions that do
+not depend on any `Var` is remembered in the expression node itself
+("constant folding"), so it is computed once for all subsequent
+evaluations.  Subexpressions that do not depend on each other can be
+run concurrently on a `concurrent.futures` executor.
+"""
+# Copyright (C) 2016-2020 Riccardo Murri <riccardo.murri@gmail.com>
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU Lesser General Public License as
+# published by the Free Software Foundation, either version 3 of the
+# License, or (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU Lesser General Public
+# License along with this program.  If not, see <http://www.gnu.org/licenses/>.
+#
+
+# make coding more python3-ish, must be the first statement
+from __future__ import (absolute_import, division, print_function)
+
+
+__all__ = [
+    'Expr',
+    'Var',
+    'evaluate',
+    'evaluate_many',
+]
+
+
+_UNSET = object()
+
+
+class Var(object):
+    """
+    Placeholder for a value to be given at evaluation time.
+    """
+    __slots__ = ['name']
+
+    def __init__(self, name):
+        self.name = name
+
+    def __repr__(self):
+        return 'Var({0!r})'.format(self.name)
+
+
+class Expr(object):
+    """
+    Deferred application of function *func* to operands *lhs* and *rhs*.
+
+    Instances are created by applying operators made with
+    ``infix_operator(..., lazy=True)``; the result is computed by
+    `evaluate` or `evaluate_many`.
+    """
+    __slots__ = ['func', 'lhs', 'rhs', 'pure', '_value']
+
+    def __init__(self, func, lhs, rhs, pure=False):
+        self.func = func
+        self.lhs = lhs
+        self.rhs = rhs
+        self.pure = pure
+        self._value = _UNSET
+
+    def __repr__(self):
+        return 'Expr({0}, {1!r}, {2!r})'.format(
+            getattr(self.func, '__name__', self.func), self.lhs, self.rhs)
+
+
+def _make_lazy(func, pure):
+    """
+    Return a function building `Expr` nodes for *func*.
+    """
+    def build(lhs, rhs):
+        return Expr(func, lhs, rhs, pure)
+    build.__wrapped__ = func
+    return build
+
+
+## evaluation
+
+# kinds of operand references in an evaluation plan
+_CONST, _VAR, _SLOT = 0, 1, 2
+
+
+class _Plan(object):
+    """
+    Unique subexpressions of a set of expressions, sorted by level.
+
+    Each distinct subexpression is given a "slot" number; the operands
+    of a slot are references ``(kind, payload)`` to a constant value, a
+    `Var` name, or another slot.  Slots at the same level only depend
+    on slots of lower levels.
+    """
+
+    def __init__(self, exprs):
+        self.slot_of = {}   # id(node) -> slot
+        self.by_key = {}    # structural key -> slot (pure nodes only)
+        self.func = []      # slot -> function to call
+        self.operands = []  # slot -> pair of operand references
+        self.nodes = []     # slot -> list of nodes computed by this slot
+        self.foldable = []  # slot -> `True` if pure and independent of `Var`s
+        self.level = []     # slot -> level in the dependency graph
+        self.roots = [self._add(expr) for expr in exprs]
+
+    def _ref(self, operand):
+        if isinstance(operand, Expr):
+            if operand._value is not _UNSET:
+                return (_CONST, operand._value)
+            return (_SLOT, self.slot_of[id(operand)])
+        if isinstance(operand, Var):
+            return (_VAR, operand.name)
+        return (_CONST, operand)
+
+    def _key(self, ref):
+        kind, payload = ref
+        if kind != _CONST:
+            return ref
+        try:
+            hash(payload)
+        except TypeError:
+            return (_CONST, 'id', id(payload))
+        # distinguish, e.g., ``1`` from ``True`` and ``1.0``
+        return (_CONST, type(payload), payload)
+
+    def _add(self, root):
+        # iterative post-order visit, so that deep expressions do not
+        # hit the recursion limit
+        stack = [(root, False)]
+        while stack:
+            node, expanded = stack.pop()
+            if not isinstance(node, Expr) or node._value is not _UNSET:
+                continue
+            if id(node) in self.slot_of:
+                continue
+            if not expanded:
+                stack.append((node, True))
+                stack.append((node.rhs, False))
+                stack.append((node.lhs, False))
+                continue
+            lhs = self._ref(node.lhs)
+            rhs = self._ref(node.rhs)
+            if node.pure:
+                key = (node.func, self._key(lhs), self._key(rhs))
+                slot = self.by_key.get(key)
+            else:
+                slot = None
+            if slot is None:
+                slot = len(self.func)
+                if node.pure:
+                    self.by_key[key] = slot
+                self.func.append(node.func)
+                self.operands.append((lhs, rhs))
+                self.nodes.append([])
+                self.foldable.append(node.pure and all(
+                    kind == _CONST or (kind == _SLOT and self.foldable[payload])
+                    for kind, payload in (lhs, rhs)))
+                self.level.append(1 + max(
+                    (self.level[payload] if kind == _SLOT else 0)
+                    for kind, payload in (lhs, rhs)))
+            self.nodes[slot].append(node)
+            self.slot_of[id(node)] = slot
+        return self._ref(root)
+
+    def levels(self):
+        """
+        Return lists of slots, grouped by level in increasing order.
+        """
+        groups = {}
+        for slot, level in enumerate(self.level):
+            groups.setdefault(level, []).append(slot)
+        return [groups[level] for level in sorted(groups)]
+
+
+def evaluate_many(exprs, env=None, executor=None):
+    """
+    Evaluate all expressions in *exprs* and return the list of results.
+
+    Optional argument *env* is a mapping of `Var` names to values.
+    Identical subexpressions of pure operators are computed only once
+    across all expressions; values of pure subexpressions that do not
+    depend on any `Var` are remembered for subsequent evaluations.
+
+    If *executor* is given (e.g., a `concurrent.futures.ThreadPoolExecutor`),
+    independent subexpressions are submitted to it and run
+    concurrently; otherwise, they are evaluated one by one in the
+    calling thread.
+
+    Items in *exprs* that are not `Expr` nodes are returned unchanged
+    (or looked up in *env*, if they are `Var` instances).
+    """
+    if env is None:
+        env = {}
+    plan = _Plan(exprs)
+    values = [None] * len(plan.func)
+
+    def resolve(ref):
+        kind, payload = ref
+        if kind == _CONST:
+            return payload
+        if kind == _VAR:
+            return env[payload]
+        return values[payload]
+
+    def run(slot):
+        lhs, rhs = plan.operands[slot]
+        return plan.func[slot](resolve(lhs), resolve(rhs))
+
+    for slots in plan.levels():
+        if executor is not None and len(slots) > 1:
+            results = executor.map(run, slots)
+        else:
+            results = (run(slot) for slot in slots)
+        for slot, value in zip(slots, results):
+            values[slot] = value
+            if plan.foldable[slot]:
+                for node in plan.nodes[slot]:
+                    node._value = value
+
+    return [resolve(ref) for ref in plan.roots]
+
+
+def evaluate(expr, env=None, executor=None):
+    """
+    Evaluate expression *expr* and return its value.
+
+    See `evaluate_many` for the meaning of arguments *env* and *executor*.
+    """
+    return evaluate_many([expr], env, executor)[0]
@@ -0,0 +1,91 @@
+#
+# Tests for `betwixt.aio` and operators wrapping coroutine functions
+#
+# Coroutine functions need Python 3.5+, and the tests use `asyncio.run`
+# from Python 3.7; see `collect_ignore` in the top-level ``conftest.py``.
+#
+
+import asyncio
+
+import pytest
+
+from betwixt import *
+
+
+class TestAsync(object):
+
+    @staticmethod
+    def run(awaitable):
+        return asyncio.run(awaitable)
+
+    def test_coroutine_function_gives_awaitable(self):
+        import inspect
+        @infix_operator('|')
+        async def add(lhs, rhs):
+            return lhs + rhs
+        result = 1 |add| 2
+        assert inspect.isawaitable(result)
+        assert self.run(result) == 3
+
+    def test_awaitable_operands(self):
+        add = infix_operator('+', self._async_add)
+        async def delayed(value):
+            await asyncio.sleep(0)
+            return value
+        assert self.run(delayed(1) +add+ delayed(2)) == 3
+        assert self.run((1 +add+ 2) +add+ 3) == 6
+        assert self.run(4 +add+ delayed(5)) == 9
+
+    @staticmethod
+    async def _async_add(lhs, rhs):
+        return lhs + rhs
+
+    def test_async_with_options(self):
+        add = infix_operator('**', self._async_add, specialize=True)
+        assert self.run(('a' **add** 'b') **add** 'c') == 'abc'
+
+    def test_not_wrapped_twice(self):
+        from betwixt import AngleDelimitedInfixOperator
+        op1 = infix_operator('<<', self._async_add)
+        op2 = AngleDelimitedInfixOperator(op1._op)
+        assert op2._op is op1._op
+
+    def test_athen(self):
+        from betwixt.aio import athen
+        async def double(n):
+            await asyncio.sleep(0)
+            return 2 * n
+        assert self.run(3 <<athen>> double <<athen>> str <<athen>> double) == '66'
+
+    def test_async_map_limit(self):
+        from betwixt.aio import async_map, athen
+        running = [0]
+        peak = [0]
+        async def work(n):
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+            await asyncio.sleep(0.001)
+            running[0] -= 1
+            return n + 1
+        amap3 = async_map(3)
+        result = self.run(range(20) <<athen>> list <<amap3>> work)
+        assert result == list(range(1, 21))
+        assert peak[0] == 3
+
+    def test_amap_with_plain_function(self):
+        from betwixt.aio import amap
+        assert self.run('abc' <<amap>> str.upper) == ['A', 'B', 'C']
+
+    def test_cache_rejects_coroutine_functions(self):
+        async def coro(lhs, rhs):
+            return lhs
+        with pytest.raises(ValueError):
+            infix_operator('|', coro, cache=True)
+
+    def test_pickle_by_value(self):
+        import pickle
+        op = infix_operator('|', asyncio.sleep)
+        copy = pickle.loads(pickle.dumps(op))
+        assert self.run(0 |copy| 'x') == 'x'
+        partial = pickle.loads(pickle.dumps(0 |op))
+        assert self.run(partial('x')) == 'x'
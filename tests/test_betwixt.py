@@ -4,6 +4,11 @@
 
 from fnmatch import fnmatch
 
+import os
+import sys
+
+import pytest
+
 from betwixt import *
 
 
@@ -135,3 +140,1829 @@ class Test_infix_operator_as_decorator(object):
         def matches(lhs, rhs):
             return fnmatch(lhs, rhs)
         assert ('foo.txt' |matches| '*.txt')
+
+
+class TestPartialOperation(object):
+    """
+    Test layout and lifetime of partial operation objects.
+    """
+
+    def test_operator_and_partial_have_no_instance_dict(self):
+        for cls in (DoubleStarDelimitedInfixOperator,
+                    StarDelimitedInfixOperator,
+                    SlashDelimitedInfixOperator,
+                    DoubleSlashDelimitedInfixOperator,
+                    PlusDelimitedInfixOperator,
+                    AngleDelimitedInfixOperator,
+                    CaretDelimitedInfixOperator,
+                    BarDelimitedInfixOperator):
+            op = cls(fnmatch)
+            assert not hasattr(op, '__dict__')
+            assert not hasattr(op._PartialOperation(fnmatch, 'foo.txt'), '__dict__')
+
+    @pytest.mark.parametrize('specialize', [False, True])
+    @pytest.mark.parametrize('delimiter', ['**', '*', '/', '//', '+', '<<', '^', '|'])
+    def test_operands_not_kept_alive(self, delimiter, specialize):
+        import gc
+        import weakref
+
+        class Operand(object):
+            pass
+        op = infix_operator(delimiter, lambda lhs, rhs: None, specialize=specialize)
+        operand = Operand()
+        ref = weakref.ref(operand)
+        if delimiter == '**':
+            op ** operand
+        else:
+            eval('operand {0}op'.format(delimiter), {'op': op, 'operand': operand})
+        del operand
+        gc.collect()
+        assert ref() is None
+
+    def test_example_operators_do_not_keep_operands_alive(self):
+        import gc
+        import weakref
+        from betwixt.examples import contains
+
+        class Haystack(list):
+            pass
+        haystack = Haystack([1, 2, 3])
+        ref = weakref.ref(haystack)
+        assert haystack |contains| 3
+        del haystack
+        gc.collect()
+        assert ref() is None
+
+    def test_nested_application(self):
+        minus = infix_operator('|', lambda lhs, rhs: lhs - rhs)
+        assert (10 |minus| (5 |minus| 1)) == 6
+        assert ((10 |minus| 5) |minus| 1) == 4
+
+    def test_nested_application_with_pow(self):
+        minus = infix_operator('**', lambda lhs, rhs: lhs - rhs)
+        assert (10 **minus** (5 **minus** 1)) == 6
+
+    def test_interleaved_partials(self):
+        minus = infix_operator('/', lambda lhs, rhs: lhs - rhs)
+        ten = 10 / minus
+        five = 5 / minus
+        assert (ten / 1) == 9
+        assert (five / 1) == 4
+        assert (ten / 2) == 8
+
+
+_COMPILED_SOURCE = '''
+from betwixt import infix_operator
+from betwixt.examples import contains, join
+
+@infix_operator('**')
+def minus(lhs, rhs):
+    return lhs - rhs
+
+plus = infix_operator('<<', lambda lhs, rhs: lhs + rhs)
+
+def run():
+    return (
+        [1, 2, 3] |contains| 2,
+        '/a' /join/ 'b' /join/ 'c',
+        10 **minus** 3,
+        1 <<plus>> 2 <<plus>> 3,
+    )
+'''
+
+
+class Test_compile_module(object):
+    """
+    Test rewriting of infix applications into direct calls.
+    """
+
+    def test_compiled_module_results(self):
+        namespace = {}
+        exec(compile_module(_COMPILED_SOURCE), namespace)
+        assert namespace['run']() == (True, '/a/b/c', 7, 6)
+
+    def test_no_infix_application_left(self):
+        import ast
+        from betwixt.compiler import rewrite
+        tree = rewrite(ast.parse(_COMPILED_SOURCE))
+        run = [stmt for stmt in tree.body
+               if isinstance(stmt, ast.FunctionDef) and stmt.name == 'run'][0]
+        assert not [node for node in ast.walk(run) if isinstance(node, ast.BinOp)]
+
+    def test_unknown_names_are_not_rewritten(self):
+        import ast
+        from betwixt.compiler import rewrite
+        tree = rewrite(ast.parse('x = a |b| c'))
+        assert [node for node in ast.walk(tree) if isinstance(node, ast.BinOp)]
+
+    def test_extra_operator_names(self):
+        namespace = {'minus': infix_operator('|', lambda lhs, rhs: lhs - rhs)}
+        exec(compile_module('x = 5 |minus| 3', operators=['minus']), namespace)
+        assert namespace['x'] == 2
+
+    def test_fallback_when_rebound(self):
+        namespace = {}
+        exec(compile_module(
+            "from betwixt import betwixt\n"
+            "op = betwixt('|', lambda lhs, rhs: lhs - rhs)\n"
+            "def run(lhs, rhs):\n"
+            "    return lhs |op| rhs\n"), namespace)
+        assert namespace['run'](5, 3) == 2
+        # not an operator any more: plain bitwise "or"
+        namespace['op'] = 4
+        assert namespace['run'](1, 2) == 7
+
+        class Subclass(BarDelimitedInfixOperator):
+            __slots__ = ()
+        namespace['op'] = Subclass(lambda lhs, rhs: lhs * rhs)
+        assert namespace['run'](5, 3) == 15
+        # subclasses of specialized classes, and operators with
+        # another delimiter, are not called directly either
+        times = infix_operator('|', lambda lhs, rhs: lhs * rhs, specialize=True)
+        Subclass = type('Subclass', (type(times),), {'__slots__': ()})
+        # stage methods call the function bound in the class
+        namespace['op'] = Subclass(lambda lhs, rhs: lhs - rhs)
+        assert namespace['run'](5, 3) == 15
+        namespace['op'] = infix_operator('/', lambda lhs, rhs: lhs * rhs, specialize=True)
+        with pytest.raises(TypeError):
+            namespace['run'](5, 3)
+
+    def test_import_hook(self, tmp_path, monkeypatch):
+        from betwixt.compiler import install_import_hook, uninstall_import_hook
+        (tmp_path / 'betwixt_compiled_mod.py').write_text(_COMPILED_SOURCE)
+        monkeypatch.syspath_prepend(str(tmp_path))
+        hook = install_import_hook('betwixt_compiled_*')
+        try:
+            import betwixt_compiled_mod
+        finally:
+            uninstall_import_hook(hook)
+        assert betwixt_compiled_mod.run() == (True, '/a/b/c', 7, 6)
+        assert betwixt_compiled_mod.__spec__.loader.__class__.__name__ == '_RewritingLoader'
+
+
+class Test_infix_operator_specialize(object):
+    """
+    Test operators created with ``specialize=True``.
+    """
+
+    def test_all_delimiters(self):
+        for delimiter, expr in [('**', "'foo.txt' **matches** '*.txt'"),
+                                ('*', "'foo.txt' *matches* '*.txt'"),
+                                ('/', "'foo.txt' /matches/ '*.txt'"),
+                                ('//', "'foo.txt' //matches// '*.txt'"),
+                                ('+', "'foo.txt' +matches+ '*.txt'"),
+                                ('<<', "'foo.txt' <<matches>> '*.txt'"),
+                                ('^', "'foo.txt' ^matches^ '*.txt'"),
+                                ('|', "'foo.txt' |matches| '*.txt'")]:
+            matches = infix_operator(delimiter, fnmatch, specialize=True)
+            assert eval(expr, {'matches': matches})
+            assert not eval(expr.replace('txt', 'png', 1), {'matches': matches})
+
+    def test_operand_order(self):
+        for delimiter, expr in [('**', "10 **minus** 3"),
+                                ('/', "10 /minus/ 3"),
+                                ('|', "10 |minus| 3")]:
+            minus = infix_operator(delimiter, lambda lhs, rhs: lhs - rhs,
+                                   specialize=True)
+            assert eval(expr, {'minus': minus}) == 7
+
+    def test_decorator(self):
+        @infix_operator('|', specialize=True)
+        def minus(lhs, rhs):
+            return lhs - rhs
+        assert (10 |minus| (5 |minus| 1)) == 6
+
+    def test_dedicated_classes(self):
+        minus1 = infix_operator('|', lambda lhs, rhs: lhs - rhs, specialize=True)
+        minus2 = infix_operator('|', lambda lhs, rhs: lhs - rhs, specialize=True)
+        assert isinstance(minus1, BarDelimitedInfixOperator)
+        assert type(minus1) is not BarDelimitedInfixOperator
+        assert type(minus1) is not type(minus2)
+        assert not hasattr(minus1, '__dict__')
+        assert not hasattr(10 | minus1, '__dict__')
+
+    def test_compiled(self):
+        namespace = {'minus': infix_operator('|', lambda lhs, rhs: lhs - rhs,
+                                             specialize=True)}
+        exec(compile_module('x = 5 |minus| 3', operators=['minus']), namespace)
+        assert namespace['x'] == 2
+
+    def test_classes_not_kept_alive(self):
+        import gc
+        import weakref
+        refs = []
+        for _ in range(100):
+            minus = infix_operator('|', lambda lhs, rhs: lhs - rhs, specialize=True)
+            assert (5 |minus| 3) == 2
+            refs.append(weakref.ref(type(minus)))
+            plus = infix_operator('|', lambda lhs, rhs: lhs + rhs)
+            plus.register(int, int)(lambda lhs, rhs: lhs + rhs)
+            assert (5 |plus| 3) == 8
+            refs.append(weakref.ref(type(plus)))
+        del minus, plus
+        gc.collect()
+        assert not [ref for ref in refs if ref() is not None]
+
+    def test_unknown_option(self):
+        with pytest.raises(TypeError):
+            infix_operator('|', fnmatch, no_such_option=True)
+
+
+class Test_infix_operator_vectorize(object):
+    """
+    Test NumPy support and operators created with ``vectorize=...``.
+    """
+
+    def test_scalars(self):
+        matches = infix_operator('/', fnmatch, vectorize=True)
+        assert ('foo.txt' /matches/ '*.txt')
+        assert not ('foo.txt' /matches/ '*.png')
+
+    def test_defer_to_operator(self):
+        np = pytest.importorskip('numpy')
+        kind = infix_operator('|', lambda lhs, rhs: type(lhs).__name__)
+        assert (np.arange(3) |kind| 1) == 'ndarray'
+        kind = infix_operator('**', lambda lhs, rhs: type(lhs).__name__)
+        assert (np.arange(3) **kind** 1) == 'ndarray'
+
+    def test_frompyfunc(self):
+        np = pytest.importorskip('numpy')
+        minus = infix_operator('/', lambda lhs, rhs: lhs - rhs, vectorize=True)
+        assert list(np.arange(3) /minus/ 1) == [-1, 0, 1]
+        assert list(10 /minus/ np.arange(3)) == [10, 9, 8]
+        assert (10 /minus/ 1) == 9
+
+    def test_ufunc(self):
+        np = pytest.importorskip('numpy')
+
+        @infix_operator('|', vectorize=np.subtract)
+        def minus(lhs, rhs):
+            return lhs - rhs
+        result = np.arange(3) |minus| np.arange(3)
+        assert result.dtype.kind == 'i'
+        assert list(result) == [0, 0, 0]
+
+    def test_examples(self):
+        np = pytest.importorskip('numpy')
+        from betwixt.examples import matches, matching
+        names = np.array(['foo.txt', 'bar.png', 'baz.txt'])
+        assert list(names /matches/ '*.txt') == [True, False, True]
+        assert list('foo.txt' /matches/ np.array(['*.txt', '*.png'])) == [True, False]
+        assert list(names /matching/ '*.txt') == ['foo.txt', 'baz.txt']
+        assert (['foo.txt', 'bar.png'] /matching/ '*.txt') == ['foo.txt']
+
+
+class Test_lazy_evaluation(object):
+    """
+    Test operators created with ``lazy=True``.
+    """
+
+    @staticmethod
+    def _counting_operator(delimiter, pure):
+        calls = []
+
+        def plus(lhs, rhs):
+            calls.append((lhs, rhs))
+            return lhs + rhs
+        return infix_operator(delimiter, plus, lazy=True, pure=pure), calls
+
+    def test_deferred(self):
+        plus, calls = self._counting_operator('|', pure=False)
+        expr = 1 |plus| 2
+        assert not calls
+        assert evaluate(expr) == 3
+        assert calls == [(1, 2)]
+
+    def test_vars(self):
+        plus, _ = self._counting_operator('<<', pure=True)
+        expr = Var('x') <<plus>> Var('y') <<plus>> 1
+        assert evaluate(expr, {'x': 1, 'y': 2}) == 4
+        assert evaluate(expr, {'x': 10, 'y': 20}) == 31
+
+    def test_common_subexpressions(self):
+        plus, calls = self._counting_operator('|', pure=True)
+        exprs = [(Var('x') |plus| 1) |plus| (Var('x') |plus| 1),
+                 (Var('x') |plus| 1) |plus| 3]
+        assert evaluate_many(exprs, {'x': 1}) == [4, 5]
+        # ``x + 1`` computed only once
+        assert len(calls) == 3
+
+    def test_impure_not_deduplicated(self):
+        plus, calls = self._counting_operator('|', pure=False)
+        exprs = [(Var('x') |plus| 1), (Var('x') |plus| 1)]
+        assert evaluate_many(exprs, {'x': 1}) == [2, 2]
+        assert len(calls) == 2
+
+    def test_constant_folding(self):
+        plus, calls = self._counting_operator('|', pure=True)
+        expr = Var('x') |plus| ((1 |plus| 2) |plus| 3)
+        assert evaluate(expr, {'x': 0}) == 6
+        assert len(calls) == 3
+        assert evaluate(expr, {'x': 10}) == 16
+        # only the application depending on ``x`` was computed again
+        assert len(calls) == 4
+
+    def test_operand_types_are_distinguished(self):
+        same = infix_operator('|', lambda lhs, rhs: type(lhs).__name__,
+                              lazy=True, pure=True)
+        assert evaluate_many([1 |same| 0, True |same| 0, 1.0 |same| 0]) == ['int', 'bool', 'float']
+
+    def test_unhashable_operands(self):
+        contains = infix_operator('|', lambda lhs, rhs: rhs in lhs, lazy=True, pure=True)
+        assert evaluate_many([[1, 2] |contains| 1, [3] |contains| 1]) == [True, False]
+
+    def test_deep_expression(self):
+        plus, _ = self._counting_operator('|', pure=False)
+        expr = 0
+        for _ in range(5000):
+            expr = expr |plus| 1
+        assert evaluate(expr) == 5000
+
+    def test_executor(self):
+        from concurrent.futures import ThreadPoolExecutor
+        plus, calls = self._counting_operator('|', pure=True)
+        exprs = [Var('x') |plus| n for n in range(10)]
+        with ThreadPoolExecutor(4) as executor:
+            assert evaluate_many(exprs, {'x': 1}, executor) == list(range(1, 11))
+        assert len(calls) == 10
+
+    def test_non_expressions(self):
+        assert evaluate_many([1, Var('x')], {'x': 2}) == [1, 2]
+
+
+class TestPipeline(object):
+    """
+    Test `then` pipelines built from `START`.
+    """
+
+    def test_empty_pipeline(self):
+        from betwixt.examples import START
+        assert START(42) == 42
+        assert START.stages == ()
+
+    def test_stages(self):
+        from betwixt.examples import START, then
+        pipeline = START <<then>> abs <<then>> str <<then>> len
+        assert pipeline.stages == (abs, str, len)
+        assert [pipeline(n) for n in (-1, 10, -100)] == [1, 2, 3]
+
+    def test_pipeline_is_immutable(self):
+        from betwixt.examples import START, then
+        base = START <<then>> abs
+        longer = base <<then>> str
+        assert base.stages == (abs,)
+        assert longer.stages == (abs, str)
+        assert base(-1) == 1
+        assert longer(-1) == '1'
+
+    def test_append_pipeline(self):
+        from betwixt.examples import START, then
+        pipeline = (START <<then>> abs) <<then>> (START <<then>> str <<then>> len)
+        assert pipeline.stages == (abs, str, len)
+
+    def test_pipeline_as_then_stage(self):
+        from betwixt.examples import START, then
+        pipeline = START <<then>> abs <<then>> str
+        assert (-5 <<then>> pipeline <<then>> len) == 1
+
+    def test_long_pipeline(self):
+        from betwixt.examples import START, then
+        pipeline = START
+        for _ in range(1000):
+            pipeline = pipeline <<then>> (lambda x: x + 1)
+        assert pipeline(0) == 1000
+
+    def test_without_infix_syntax(self):
+        from betwixt.examples import START, then, each, where, batched, tmap
+        for pipeline in [then._op(then._op(START, abs), str),
+                         then.right(str)(then.right(abs)(START)),
+                         then.map([START <<then>> abs], [str])[0]]:
+            assert pipeline.stages == (abs, str)
+            assert pipeline(-12) == '12'
+        pipeline = batched._op(where._op(each._op(START, abs), bool), 2)
+        assert list(pipeline([0, -1, 2, -3])) == [[1, 2], [3]]
+        pipeline = tmap._op(START, abs)
+        assert list(pipeline([-1, 2])) == [1, 2]
+
+    def test_other_operators(self):
+        from betwixt.examples import START, then
+        plus = infix_operator('<<', lambda lhs, rhs: lhs + rhs)
+        namespace = {'START': START, 'then': then, 'plus': plus}
+        source = "pipeline = START <<then>> abs <<then>> plus.right(1)\n"
+        for code in [source, compile_module(source, operators=['then', 'plus'])]:
+            exec(code, namespace)
+            assert namespace['pipeline'](-1) == 2
+        # without a section, the pipeline is an operand like any other,
+        # whether the module is compiled or not
+        source = "pipeline = START <<then>> abs <<plus>> 1\n"
+        for code in [source, compile_module(source, operators=['then', 'plus'])]:
+            with pytest.raises(TypeError):
+                exec(code, namespace)
+
+    def test_compiled_module(self):
+        namespace = {}
+        exec(compile_module(
+            "from betwixt.examples import START, then, each, where\n"
+            "pipeline = START <<then>> abs <<then>> str <<then>> len\n"
+            "evens = START <<where>> (lambda n: n % 2 == 0) <<each>> str\n"
+            ), namespace)
+        assert namespace['pipeline'].stages == (abs, str, len)
+        assert namespace['pipeline'](-123) == 3
+        assert list(namespace['evens'](range(5))) == ['0', '2', '4']
+
+
+class TestStreamingStages(object):
+
+    def test_each_is_lazy(self):
+        from betwixt.examples import each
+        seen = []
+        def record(x):
+            seen.append(x)
+            return x * 2
+        result = [1, 2, 3] <<each>> record
+        assert seen == []
+        assert next(result) == 2
+        assert seen == [1]
+
+    def test_where(self):
+        from betwixt.examples import where
+        assert list(range(6) <<where>> (lambda n: n % 2)) == [1, 3, 5]
+
+    def test_batched(self):
+        from betwixt.examples import batched
+        assert list(range(5) <<batched>> 2) == [[0, 1], [2, 3], [4]]
+        assert list([] <<batched>> 2) == []
+
+    def test_batched_rejects_nonpositive_size(self):
+        from betwixt.examples import batched
+        with pytest.raises(ValueError):
+            [1, 2] <<batched>> 0
+
+    def test_chain_on_infinite_source(self):
+        import itertools
+        from betwixt.examples import batched, each, where
+        chunks = (itertools.count()
+                  <<each>> (lambda n: n * n)
+                  <<where>> (lambda n: n % 2 == 0)
+                  <<batched>> 3)
+        assert next(chunks) == [0, 4, 16]
+        assert next(chunks) == [36, 64, 100]
+
+    def test_streaming_pipeline(self):
+        from betwixt.examples import START, batched, each, then, where
+        pipeline = (START
+                    <<each>> str.strip
+                    <<where>> bool
+                    <<batched>> 2
+                    <<then>> list)
+        assert pipeline([' a', '', 'b ', 'c']) == [['a', 'b'], ['c']]
+        assert pipeline(['x']) == [['x']]
+
+
+class TestParallelMap(object):
+
+    def test_tmap(self):
+        from betwixt.examples import tmap
+        assert list(range(-50, 50) <<tmap>> abs) == [abs(n) for n in range(-50, 50)]
+
+    def test_pmap(self):
+        from betwixt.examples import pmap
+        assert list(range(-50, 50) <<pmap>> abs) == [abs(n) for n in range(-50, 50)]
+
+    def test_unordered(self):
+        from betwixt.examples import parallel_map
+        umap = parallel_map('thread', workers=4, chunksize=3, ordered=False)
+        assert sorted(range(100) <<umap>> (lambda n: n * 2)) == list(range(0, 200, 2))
+
+    def test_shared_pool(self):
+        from betwixt.examples import _shared_pool, parallel_map
+        op1 = parallel_map('thread', workers=3)
+        op2 = parallel_map('thread', workers=3, chunksize=5)
+        list([1] <<op1>> abs)
+        list([1] <<op2>> abs)
+        assert _shared_pool('thread', 3) is _shared_pool('thread', 3)
+
+    def test_given_executor(self):
+        import concurrent.futures
+        from betwixt.examples import parallel_map
+        with concurrent.futures.ThreadPoolExecutor(2) as executor:
+            xmap = parallel_map(executor, chunksize=2)
+            assert list('abc' <<xmap>> str.upper) == ['A', 'B', 'C']
+
+    def test_bounded_window_on_endless_source(self):
+        import itertools
+        from betwixt.examples import parallel_map
+        consumed = []
+        def source():
+            for n in itertools.count():
+                consumed.append(n)
+                yield n
+        xmap = parallel_map('thread', workers=2, chunksize=5)
+        results = source() <<xmap>> abs
+        assert next(results) == 0
+        results.close()
+        # at most 2 * workers chunks, plus the one submitted after the first
+        assert len(consumed) <= 5 * 5 + 1
+
+    def test_exception_propagates(self):
+        from betwixt.examples import tmap
+        with pytest.raises(ZeroDivisionError):
+            list([1, 0] <<tmap>> (lambda n: 1 // n))
+
+    def test_invalid_arguments(self):
+        from betwixt.examples import parallel_map
+        with pytest.raises(ValueError):
+            parallel_map(chunksize=0)
+        with pytest.raises(ValueError):
+            parallel_map('fibers')
+        with pytest.raises(ValueError):
+            parallel_map(workers=0)
+
+
+class Test_infix_operator_cache(object):
+
+    @staticmethod
+    def counting(calls):
+        def concat(lhs, rhs):
+            calls.append((lhs, rhs))
+            return lhs + rhs
+        return concat
+
+    def test_lru(self):
+        calls = []
+        op = infix_operator('//', self.counting(calls), cache=2)
+        assert ['a' //op// 'b', 'a' //op// 'c', 'a' //op// 'b'] == ['ab', 'ac', 'ab']
+        assert len(calls) == 2
+        'a' //op// 'd'  # evicts ('a', 'c')
+        'a' //op// 'c'
+        assert len(calls) == 4
+        assert op.cache_info() == (1, 4, 2, 2)
+
+    def test_options_without_cache(self):
+        for options in [dict(cache_ttl=10), dict(cache_key='identity'),
+                        dict(cache=False, cache_key='value')]:
+            with pytest.raises(ValueError):
+                infix_operator('+', self.counting([]), **options)
+            with pytest.raises(ValueError):
+                infix_operator('+', **options)
+
+    def test_unbounded_and_typed(self):
+        calls = []
+        op = infix_operator('+', self.counting(calls), cache=True)
+        assert (1 +op+ 1) == 2
+        assert (1.0 +op+ 1) == 2.0
+        assert len(calls) == 2
+        assert op.cache_info().maxsize is None
+
+    def test_ttl(self, monkeypatch):
+        import betwixt.cache
+        now = [1000.0]
+        monkeypatch.setattr(betwixt.cache, '_timer', lambda: now[0])
+        calls = []
+        op = infix_operator('|', self.counting(calls), cache=10, cache_ttl=5)
+        1 |op| 2
+        now[0] += 4
+        1 |op| 2
+        assert len(calls) == 1
+        now[0] += 2
+        1 |op| 2
+        assert len(calls) == 2
+        assert op.cache_info() == (1, 2, 10, 1)
+
+    def test_identity_key(self):
+        calls = []
+        op = infix_operator('*', self.counting(calls), cache=True, cache_key='identity')
+        left = [1]
+        assert (left *op* [2]) == [1, 2]
+        right = [3]
+        left *op* right
+        left *op* right
+        assert len(calls) == 2
+        # equal but distinct objects are not a hit
+        [1] *op* [3]
+        assert len(calls) == 3
+
+    def test_unhashable_by_value(self):
+        op = infix_operator('|', self.counting([]), cache=True, cache_ttl=60)
+        with pytest.raises(TypeError):
+            [1] |op| [2]
+
+    def test_cache_clear(self):
+        calls = []
+        op = infix_operator('|', self.counting(calls), cache=10)
+        1 |op| 2
+        op.cache_clear()
+        assert op.cache_info() == (0, 0, 10, 0)
+        1 |op| 2
+        assert len(calls) == 2
+
+    def test_decorator_and_specialize(self):
+        calls = []
+        @infix_operator('**', cache=True, specialize=True)
+        def power(lhs, rhs):
+            calls.append((lhs, rhs))
+            return lhs ** rhs
+        assert (2 **power** 3) == 8
+        assert (2 **power** 3) == 8
+        assert calls == [(2, 3)]
+        assert power.cache_info().hits == 1
+
+    def test_not_cached(self):
+        op = infix_operator('|', lambda lhs, rhs: lhs)
+        with pytest.raises(TypeError):
+            op.cache_info()
+
+    def test_invalid_options(self):
+        with pytest.raises(ValueError):
+            infix_operator('|', lambda lhs, rhs: lhs, cache=-1)
+        with pytest.raises(ValueError):
+            infix_operator('|', lambda lhs, rhs: lhs, cache=True, cache_key='hash')
+
+
+class TestGlobs(object):
+
+    PATTERNS = ['*.py', 'src/*.c', 'Makefile', '*.[ch]', 'doc/*', '*a*b*[xy]', '??']
+
+    def test_same_as_fnmatch(self):
+        import fnmatch
+        from betwixt.examples import Globs
+        globs = Globs(self.PATTERNS)
+        names = ['a.py', 'src/a.c', 'Makefile', 'x.h', 'doc/index.rst',
+                 'qaqbqy', 'ab', 'README', '', 'src/.c', 'src/a.py']
+        for name in names:
+            expected = next((p for p in self.PATTERNS
+                             if fnmatch.fnmatchcase(name, p)), None)
+            assert globs.match(name) == expected
+
+    def test_first_pattern_wins(self):
+        from betwixt.examples import Globs
+        assert Globs(['*.c', 'src/*']).match('src/main.c') == '*.c'
+        assert Globs(['src/*', '*.c']).match('src/main.c') == 'src/*'
+        assert Globs(['*.[ch]', '*.c']).match('main.c') == '*.[ch]'
+        assert Globs(['*.c', '*.[ch]']).match_index('main.c') == 0
+
+    def test_matches_and_matching(self):
+        from betwixt.examples import Globs, matches, matching
+        globs = Globs(self.PATTERNS)
+        assert 'setup.py' /matches/ globs
+        assert not ('README' /matches/ globs)
+        assert (['setup.py', 'README', 'src/x.c'] /matching/ globs
+                == ['setup.py', 'src/x.c'])
+
+    def test_numpy(self):
+        np = pytest.importorskip('numpy')
+        from betwixt.examples import Globs, matches, matching
+        names = np.array(['a.py', 'b.txt', 'Makefile'])
+        globs = Globs(['*.py', 'Makefile'])
+        assert list(names /matches/ globs) == [True, False, True]
+        assert list(names /matching/ globs) == ['a.py', 'Makefile']
+
+    def test_empty(self):
+        from betwixt.examples import Globs
+        assert Globs([]).match('anything') is None
+
+
+class TestMatchingDirectoryTree(object):
+
+    FILES = [
+        'setup.py',
+        'src/main.c',
+        'src/util/strings.c',
+        'src/util/strings.h',
+        'src/util/deep/er/x.c',
+        'docs/index.rst',
+        'build/obj/main.o',
+    ]
+
+    @pytest.fixture
+    def tree(self, tmp_path):
+        for name in self.FILES:
+            path = tmp_path.joinpath(*name.split('/'))
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(u'')
+        return tmp_path
+
+    @staticmethod
+    def relative(paths, top):
+        return sorted(os.path.relpath(str(p), str(top)).replace(os.sep, '/')
+                      for p in paths)
+
+    @pytest.mark.skipif(sys.version_info < (3, 8),
+                        reason="`PurePath.__truediv__` does not return"
+                        " `NotImplemented` before Python 3.8")
+    def test_pathlib_root(self, tree):
+        from betwixt.examples import matching
+        result = tree /matching/ 'src/*.c'
+        assert not isinstance(result, list)
+        result = list(result)
+        assert all(isinstance(path, type(tree)) for path in result)
+        assert self.relative(result, tree) == ['src/main.c']
+
+    def test_double_star(self, tree):
+        from betwixt.examples import Root, matching
+        assert (self.relative(Root(str(tree)) /matching/ 'src/**/*.c', tree)
+                == ['src/main.c', 'src/util/deep/er/x.c', 'src/util/strings.c'])
+        assert (self.relative(Root(str(tree)) /matching/ '**/strings.*', tree)
+                == ['src/util/strings.c', 'src/util/strings.h'])
+
+    def test_directories_match(self, tree):
+        from betwixt.examples import Root, matching
+        assert self.relative(Root(tree) /matching/ '*', tree) == [
+            'build', 'docs', 'setup.py', 'src']
+
+    def test_pruning(self, tree, monkeypatch):
+        import betwixt.examples
+        from betwixt.examples import Root, matching
+        visited = []
+        scan_dir = betwixt.examples._scan_dir
+        def recording_scan_dir(path, *rest):
+            visited.append(os.path.relpath(path, str(tree)))
+            return scan_dir(path, *rest)
+        monkeypatch.setattr(betwixt.examples, '_scan_dir', recording_scan_dir)
+        list(Root(tree) /matching/ 'src/util/*.h')
+        assert sorted(visited) == ['.', 'src', os.path.join('src', 'util')]
+
+    def test_parallel(self, tree):
+        from betwixt.examples import Root, matching
+        assert (self.relative(Root(tree, workers=3) /matching/ '**/*.[ch]', tree)
+                == ['src/main.c', 'src/util/deep/er/x.c',
+                    'src/util/strings.c', 'src/util/strings.h'])
+
+    def test_without_scandir(self, tree, monkeypatch):
+        import betwixt.examples
+        from betwixt.examples import Root, matching
+        expected = self.relative(Root(str(tree)) /matching/ '**/*.[ch]', tree)
+        monkeypatch.setattr(betwixt.examples, '_scandir',
+                            betwixt.examples._listdir_entries)
+        os.symlink(str(tree / 'src'), str(tree / 'docs' / 'loop'))
+        assert self.relative(Root(str(tree)) /matching/ '**/*.[ch]', tree) == expected
+
+    def test_globs(self, tree):
+        from betwixt.examples import Globs, Root, matching
+        globs = Globs(['*.py', 'build/*'])
+        assert self.relative(Root(tree) /matching/ globs, tree) == [
+            'build/obj', 'setup.py']
+
+    def test_globs_same_as_patterns(self, tree):
+        from betwixt.examples import Globs, Root, matching
+        patterns = ['*', '*.c', 'src/*', '**/*.h', 'src/**', 'build/*/*.o', '*/*/x.c']
+        for pattern in patterns:
+            assert (self.relative(Root(tree) /matching/ Globs([pattern]), tree)
+                    == self.relative(Root(tree) /matching/ pattern, tree))
+        expected = sorted(set(path for pattern in patterns
+                              for path in self.relative(Root(tree) /matching/ pattern, tree)))
+        assert self.relative(Root(tree) /matching/ Globs(patterns), tree) == expected
+
+    def test_globs_pruning(self, tree, monkeypatch):
+        import betwixt.examples
+        from betwixt.examples import Globs, Root, matching
+        visited = []
+        scan_dir = betwixt.examples._scan_dir
+        def recording_scan_dir(path, *rest):
+            visited.append(os.path.relpath(path, str(tree)))
+            return scan_dir(path, *rest)
+        monkeypatch.setattr(betwixt.examples, '_scan_dir', recording_scan_dir)
+        list(Root(tree) /matching/ Globs(['*.py', 'docs/*']))
+        assert sorted(visited) == ['.', 'docs']
+
+
+class TestIndexedContains(object):
+
+    def test_index(self):
+        from betwixt.examples import Index, contains
+        index = Index([1, 'a', [2, 3], float('nan')])
+        assert index |contains| 1
+        assert index |contains| 1.0
+        assert index |contains| [2, 3]
+        assert not (index |contains| [4])
+        assert not (index |contains| 'b')
+        assert len(index) == 4
+
+    def test_index_is_a_snapshot(self):
+        from betwixt.examples import Index
+        items = [1, 2]
+        index = Index(items)
+        items.append(3)
+        assert 3 not in index
+
+    def test_tuple_index_is_cached(self):
+        from betwixt.examples import _index_of, contains_indexed
+        items = tuple(range(1000))
+        assert items |contains_indexed| 999
+        assert not (items |contains_indexed| 1000)
+        assert _index_of(items) is _index_of(items)
+        assert _index_of(tuple(range(1000))) is not _index_of(items)
+
+    def test_other_containers(self):
+        from betwixt.examples import contains_indexed
+        items = [1, 2]
+        assert not (items |contains_indexed| 3)
+        items.append(3)
+        assert items |contains_indexed| 3
+        assert 'foobar' |contains_indexed| 'oba'
+
+    @pytest.fixture
+    def empty_cache(self, monkeypatch):
+        import betwixt.examples
+        monkeypatch.setattr(betwixt.examples, '_indexes', {})
+        monkeypatch.setattr(betwixt.examples, '_indexes_ring', [])
+        monkeypatch.setattr(betwixt.examples, '_indexes_hand', 0)
+        return betwixt.examples._indexes
+
+    def test_used_index_is_kept(self, empty_cache):
+        from betwixt.examples import _INDEXES_MAXSIZE, _index_of
+        items = tuple(range(10))
+        index = _index_of(items)
+        others = [tuple(range(n)) for n in range(1, _INDEXES_MAXSIZE + 1)]
+        for other in others:
+            _index_of(other)
+            assert _index_of(items) is index
+        # unused entries are evicted first
+        assert id(others[0]) not in empty_cache
+        assert len(empty_cache) == _INDEXES_MAXSIZE
+
+    def test_new_index_is_kept(self, empty_cache):
+        from betwixt.examples import _INDEXES_MAXSIZE, _index_of
+        others = [tuple(range(n)) for n in range(_INDEXES_MAXSIZE)]
+        for other in others:
+            _index_of(other)
+            _index_of(other)
+        items = tuple(range(10))
+        index = _index_of(items)
+        assert _index_of(items) is index
+        assert len(empty_cache) == _INDEXES_MAXSIZE
+
+
+class TestNeedleSets(object):
+
+    def test_any_of(self):
+        from betwixt.examples import AnyOf, contains
+        assert 'connection timeout' |contains| AnyOf(['reset', 'timeout'])
+        assert not ('all good' |contains| AnyOf(['reset', 'timeout']))
+        assert not ('anything' |contains| AnyOf([]))
+
+    def test_all_of_with_nested_needles(self):
+        from betwixt.examples import AllOf, contains
+        # 'ab' and 'b' both start inside 'abc', shadowed by longer needles
+        assert 'abc' |contains| AllOf(['abc', 'ab', 'b', 'bc'])
+        assert not ('abc' |contains| AllOf(['abc', 'cd']))
+        assert 'anything' |contains| AllOf([])
+
+    def test_found(self):
+        from betwixt.examples import AnyOf
+        needles = AnyOf(['he', 'she', 'his', 'hers'])
+        assert needles.found('ushers') == set(['he', 'she', 'hers'])
+
+    def test_special_characters(self):
+        from betwixt.examples import AnyOf, contains
+        assert 'a+b=c' |contains| AnyOf(['+b', '(x'])
+        assert 'line1\nline2' |contains| AnyOf(['1\nl'])
+
+    def test_bytes_haystacks(self):
+        import mmap
+        from betwixt.examples import AllOf, AnyOf, contains
+        data = b'GET /index.html HTTP/1.1'
+        needles = AllOf([b'GET', b'HTTP/1.1'])
+        assert data |contains| needles
+        assert bytearray(data) |contains| needles
+        assert memoryview(data) |contains| needles
+        assert not (memoryview(data) |contains| AnyOf([b'POST', b'PUT']))
+        buf = mmap.mmap(-1, len(data))
+        buf.write(data)
+        assert buf |contains| AnyOf([b'index'])
+        assert AnyOf([b'/', b'z']).found(memoryview(data)) == set([b'/'])
+
+    def test_containers(self):
+        from betwixt.examples import AllOf, AnyOf, Index, contains
+        needles = AnyOf(['a'])
+        for haystack in [['a', 'b'], ('a', 'b'), set(['a']), frozenset(['a']),
+                         {'a': 1}, Index(['a', 'b']), iter(['a'])]:
+            assert not (haystack |contains| needles)
+            assert not contains.right(AllOf(['a']))(haystack)
+        assert [needles] |contains| needles
+        assert contains.right(needles)('abc')
+        assert contains.right(AnyOf([b'a']))(memoryview(b'abc'))
+
+    def test_mixed_needles(self):
+        from betwixt.examples import AnyOf
+        with pytest.raises(TypeError):
+            AnyOf(['a', b'b'])
+
+
+class TestLazySplit(object):
+
+    def test_str(self):
+        from betwixt.examples import isplit_at
+        parts = 'a::b::c' //isplit_at// '::'
+        assert not isinstance(parts, list)
+        assert list(parts) == ['a', 'b', 'c']
+        assert list('abc' //isplit_at// ',') == ['abc']
+        assert list(',' //isplit_at// ',') == ['', '']
+
+    def test_same_as_split(self):
+        from betwixt.examples import isplit_at
+        for text in ['', 'x', 'xx', 'axbxxc', 'xax']:
+            for sep in ['x', 'xx']:
+                assert list(text //isplit_at// sep) == text.split(sep)
+
+    def test_bytes_like_give_memoryviews(self):
+        from betwixt.examples import isplit_at
+        data = bytearray(b'one\ntwo\nthree')
+        parts = list(data //isplit_at// b'\n')
+        assert all(isinstance(part, memoryview) for part in parts)
+        assert [bytes(part) for part in parts] == [b'one', b'two', b'three']
+        # slices share memory with the original buffer
+        data[0:3] = b'ONE'
+        assert bytes(parts[0]) == b'ONE'
+        view = memoryview(b'a--b--c')[1:]
+        assert [bytes(part) for part in view //isplit_at// b'--'] == [b'', b'b', b'c']
+
+    def test_mmap(self):
+        import mmap
+        from betwixt.examples import isplit_at
+        data = mmap.mmap(-1, 10)
+        data.write(b'ab\ncd\n\nef')
+        assert ([bytes(part) for part in data //isplit_at// b'\n']
+                == [b'ab', b'cd', b'', b'ef\x00'])
+
+    def test_regex_and_maxsplit(self):
+        import re
+        from betwixt.examples import Separator, isplit_at
+        assert list('a1b22c' //isplit_at// re.compile(r'\d+')) == ['a', 'b', 'c']
+        assert list('a,b,c' //isplit_at// Separator(',', 1)) == ['a', 'b,c']
+        assert list('a,b,c' //isplit_at// Separator(',', 0)) == ['a,b,c']
+        assert ([bytes(part) for part in
+                 b'a1b2c3d' //isplit_at// Separator(re.compile(b'[0-9]'), 2)]
+                == [b'a', b'b', b'c3d'])
+
+    def test_empty_separator(self):
+        from betwixt.examples import isplit_at
+        with pytest.raises(ValueError):
+            list('abc' //isplit_at// '')
+
+
+class TestStreamingJoin(object):
+
+    def test_text_file(self):
+        import io
+        from betwixt.examples import Sink, joining
+        out = io.StringIO()
+        assert (Sink(out, '\n') *joining* (str(n) for n in range(3))) == 5
+        assert out.getvalue() == '0\n1\n2'
+
+    def test_binary_file_with_buffers(self, tmp_path):
+        from betwixt.examples import Sink, joining
+        path = tmp_path / 'out.csv'
+        with open(str(path), 'wb') as out:
+            Sink(out, b',') *joining* [b'a', memoryview(b'bc'), bytearray(b'd')]
+        assert path.read_bytes() == b'a,bc,d'
+
+    def test_fd_and_batching(self, tmp_path, monkeypatch):
+        import betwixt.examples
+        from betwixt.examples import Sink, joining
+        monkeypatch.setattr(betwixt.examples, '_IOV_MAX', 4)
+        path = tmp_path / 'out.ndjson'
+        items = [('{"n": %d}' % n).encode('ascii') for n in range(10)]
+        fd = os.open(str(path), os.O_WRONLY | os.O_CREAT)
+        try:
+            written = Sink(fd, b'\n') *joining* iter(items)
+        finally:
+            os.close(fd)
+        assert path.read_bytes() == b'\n'.join(items)
+        assert written == len(b'\n'.join(items))
+
+    def test_short_writes(self, monkeypatch):
+        from betwixt.examples import _fd_writer
+        chunks = []
+        monkeypatch.setattr(os, 'writev', lambda fd, bufs: 3)
+        monkeypatch.setattr(os, 'write',
+                            lambda fd, buf: chunks.append(bytes(buf[:2])) or min(2, len(buf)))
+        _fd_writer(99)([b'ab', b'cde', b'f'])
+        # 3 bytes went out with `writev`, the rest with `write`
+        assert b''.join(chunks) == b'def'
+
+    def test_bytearray_presized(self):
+        from betwixt.examples import Sink, joining
+        buf = bytearray(b'>')
+        assert (Sink(buf, b'--') *joining* [b'a', b'bb', b'c']) == 8
+        assert buf == bytearray(b'>a--bb--c')
+        assert (Sink(buf, b'|') *joining* (x for x in [b'x', b'y'])) == 3
+        assert buf == bytearray(b'>a--bb--cx|y')
+        assert (Sink(buf, b'|') *joining* []) == 0
+
+    def test_empty(self):
+        import io
+        from betwixt.examples import Sink, joining
+        out = io.StringIO()
+        assert (Sink(out, ',') *joining* []) == 0
+        assert out.getvalue() == ''
+
+
+class TestStats(object):
+
+    @pytest.fixture(autouse=True)
+    def clean_stats(self):
+        import betwixt
+        betwixt.reset_stats()
+        yield
+        betwixt.disable_stats()
+        betwixt.reset_stats()
+
+    def test_counts_and_latency(self):
+        import betwixt
+        def joined(lhs, rhs):
+            return lhs + rhs
+        op = infix_operator('+', joined)
+        betwixt.enable_stats()
+        for n in range(10):
+            'a' +op+ str(n)
+        with pytest.raises(TypeError):
+            'a' +op+ 1
+        entry = betwixt.stats()['+{0}+'.format(joined.__qualname__)]
+        assert entry['calls'] == 11
+        assert entry['errors'] == 1
+        assert entry['total_seconds'] > 0
+        assert 0 < entry['p50_seconds'] <= entry['p99_seconds']
+
+    def test_off_restores_original(self):
+        import betwixt
+        func = min
+        op = infix_operator('|', func, specialize=True)
+        cls = op.__class__
+        betwixt.enable_stats()
+        assert op.__class__ is not cls
+        assert (1 |op| 2) == 1
+        betwixt.disable_stats()
+        assert op.__class__ is cls
+        assert op._op is func
+        1 |op| 2
+        assert betwixt.stats()['|min|']['calls'] == 1
+
+    def test_new_operators_while_enabled(self):
+        import betwixt
+        betwixt.enable_stats()
+        @infix_operator('**', specialize=True)
+        def power(lhs, rhs):
+            return lhs ** rhs
+        assert (2 **power** 10) == 1024
+        name = '**{0}**'.format(power._op.__wrapped__.__qualname__)
+        assert betwixt.stats()[name]['calls'] == 1
+
+    def test_last_partial_not_reused_across_switch(self):
+        import betwixt
+        op = infix_operator('^', max)
+        lhs = 0
+        lhs ^op^ 1
+        betwixt.enable_stats()
+        lhs ^op^ 2
+        assert betwixt.stats()['^max^']['calls'] == 1
+
+    def test_prometheus(self):
+        import betwixt
+        op = infix_operator('//', divmod)
+        betwixt.enable_stats()
+        7 //op// 2
+        text = betwixt.stats('prometheus')
+        assert '# TYPE betwixt_operator_latency_seconds histogram' in text
+        assert 'betwixt_operator_calls_total{operator="divmod",delimiter="//"} 1' in text
+        assert ('betwixt_operator_latency_seconds_bucket'
+                '{operator="divmod",delimiter="//",le="+Inf"} 1') in text
+        with pytest.raises(ValueError):
+            betwixt.stats('xml')
+
+    def test_operator_names(self):
+        import betwixt
+        from betwixt.examples import contains, pmap, then, tmap
+        betwixt.enable_stats()
+        [1, 2] <<tmap>> abs
+        [1, 2] <<pmap>> abs
+        [1, 2] <<pmap>> abs
+        1 <<then>> abs
+        'abc' |contains| 'b'
+        plus = infix_operator('+', lambda lhs, rhs: lhs + rhs, name='test.plus')
+        minus = infix_operator('+', lambda lhs, rhs: lhs - rhs)
+        1 +plus+ 1
+        1 +minus+ 1
+        stats = betwixt.stats()
+        assert stats['<<betwixt.examples.tmap>>']['calls'] == 1
+        assert stats['<<betwixt.examples.pmap>>']['calls'] == 2
+        assert stats['<<betwixt.examples.then>>']['name'] == 'betwixt.examples.then'
+        assert stats['|betwixt.examples.contains|']['calls'] == 1
+        assert stats['+test.plus+']['calls'] == 1
+        assert stats['+{0}+'.format(minus._func.__qualname__)]['calls'] == 1
+
+    def test_environment_variable(self):
+        import subprocess
+        import sys
+        import betwixt
+        code = ("import betwixt\n"
+                "op = betwixt.infix_operator('|', max)\n"
+                "1 |op| 2\n"
+                "print(betwixt.stats()['|max|']['calls'])\n")
+        env = dict(os.environ, BETWIXT_STATS='1')
+        env['PYTHONPATH'] = os.pathsep.join(
+            [os.path.dirname(os.path.dirname(betwixt.__file__))]
+            + env.get('PYTHONPATH', '').split(os.pathsep))
+        output = subprocess.check_output([sys.executable, '-c', code], env=env)
+        assert output.strip() == b'1'
+
+
+class TestImportTime(object):
+
+    # modules which take a long time to import, and that importing
+    # `betwixt` or `betwixt.examples` should not pull in
+    SLOW_MODULES = set([
+        'ast', 'asyncio', 'concurrent.futures', 'fnmatch', 'inspect',
+        'multiprocessing', 'numpy', 'pathlib', 're', 'threading', 'weakref',
+    ])
+
+    @staticmethod
+    def importtime(statement):
+        """
+        Return mapping of imported modules to cumulative import time (in us).
+        """
+        import subprocess
+        import sys
+        import betwixt
+        env = dict(os.environ)
+        env.pop('BETWIXT_STATS', None)
+        env['PYTHONPATH'] = os.pathsep.join(
+            [os.path.dirname(os.path.dirname(betwixt.__file__))]
+            + env.get('PYTHONPATH', '').split(os.pathsep))
+        proc = subprocess.Popen(
+            [sys.executable, '-X', 'importtime', '-c', statement],
+            env=env, stderr=subprocess.PIPE, universal_newlines=True)
+        _, stderr = proc.communicate()
+        assert proc.returncode == 0, stderr
+        result = {}
+        for line in stderr.splitlines():
+            if not line.startswith('import time:') or '|' not in line:
+                continue
+            _, cumulative, name = line[len('import time:'):].split('|')
+            if cumulative.strip().isdigit():
+                result[name.strip()] = int(cumulative)
+        return result
+
+    @pytest.mark.parametrize('module', ['betwixt', 'betwixt.examples'])
+    def test_no_slow_imports(self, module):
+        baseline = set(self.importtime('pass'))
+        imported = self.importtime('import ' + module)
+        assert module in imported
+        assert not ((set(imported) - baseline) & self.SLOW_MODULES)
+
+
+class TestThreads(object):
+
+    NTHREADS = 8
+    NITEMS = 2000
+
+    @pytest.fixture(autouse=True)
+    def switch_often(self):
+        # make threads interleave between the two stages of applications
+        import sys
+        interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        yield
+        sys.setswitchinterval(interval)
+
+    def apply_concurrently(self, func):
+        import threading
+        results = [None] * self.NTHREADS
+
+        def run(n):
+            results[n] = [func(n, m) for m in range(self.NITEMS)]
+        threads = [threading.Thread(target=run, args=(n,))
+                   for n in range(self.NTHREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return results
+
+    @pytest.mark.parametrize('options', [
+        {}, {'specialize': True}, {'cache': 100}, {'cache': True, 'cache_key': 'identity'},
+    ])
+    @pytest.mark.parametrize('delimiter', sorted(['**', '*', '/', '//', '+', '<<', '^', '|']))
+    def test_concurrent_applications(self, delimiter, options):
+        op = infix_operator(delimiter, divmod, **options)
+        apply = eval('lambda x, y: x {0}op{1} y'.format(
+            delimiter, '>>' if delimiter == '<<' else delimiter), {'op': op})
+        results = self.apply_concurrently(lambda n, m: apply(n + 1000, m + 1))
+        assert results == [[divmod(n + 1000, m + 1) for m in range(self.NITEMS)]
+                           for n in range(self.NTHREADS)]
+
+    def test_concurrent_stats(self):
+        import betwixt
+        op = infix_operator('|', max)
+        betwixt.enable_stats()
+        try:
+            self.apply_concurrently(lambda n, m: n |op| m)
+            assert betwixt.stats()['|max|']['calls'] == self.NTHREADS * self.NITEMS
+            betwixt.reset_stats()
+            assert betwixt.stats()['|max|']['calls'] == 0
+        finally:
+            betwixt.disable_stats()
+            betwixt.reset_stats()
+
+    def test_sharded_cache(self):
+        from betwixt.cache import _make_cached
+        cached = _make_cached(divmod, maxsize=10, shards=4)
+        for n in range(100):
+            assert cached(n, 7) == divmod(n, 7)
+        assert cached(99, 7) == divmod(99, 7)
+        info = cached.cache_info()
+        assert (info.hits, info.misses, info.maxsize) == (1, 100, 10)
+        assert 0 < info.currsize <= 10
+        cached.cache_clear()
+        assert cached.cache_info() == (0, 0, 10, 0)
+        unbounded = _make_cached(divmod, shards=4)
+        self.apply_concurrently(lambda n, m: unbounded(m, 7))
+        info = unbounded.cache_info()
+        assert info.currsize == self.NITEMS
+        assert info.hits + info.misses == self.NTHREADS * self.NITEMS
+        with pytest.raises(ValueError):
+            _make_cached(divmod, shards=0)
+
+    def test_free_threaded_build(self):
+        # pretend the GIL is disabled when `betwixt` is imported
+        import subprocess
+        import sys
+        import betwixt
+        code = ("import sys\n"
+                "sys._is_gil_enabled = lambda: False\n"
+                "import betwixt\n"
+                "assert betwixt._FREE_THREADED\n"
+                "for delimiter in ['**', '/', '|']:\n"
+                "    for options in [{}, {'specialize': True}]:\n"
+                "        op = betwixt.infix_operator(delimiter, divmod, **options)\n"
+                "        first = 'op ** x' if delimiter == '**' else 'x {0} op'\n"
+                "        stage = eval('lambda x: ' + first.format(delimiter), {'op': op})\n"
+                "        assert stage(7) is not stage(7)\n"
+                "        apply = eval('lambda x, y: x {0}op{0} y'.format(delimiter), {'op': op})\n"
+                "        assert apply(7, 2) == divmod(7, 2)\n"
+                "op = betwixt.infix_operator('|', divmod, cache=100)\n"
+                "assert [7 |op| 2, 7 |op| 2] == [(3, 1), (3, 1)]\n"
+                "assert op.cache_info() == (1, 1, 100, 1)\n")
+        env = dict(os.environ)
+        env['PYTHONPATH'] = os.pathsep.join(
+            [os.path.dirname(os.path.dirname(betwixt.__file__))]
+            + env.get('PYTHONPATH', '').split(os.pathsep))
+        subprocess.check_call([sys.executable, '-c', code], env=env)
+
+
+class TestSections(object):
+
+    DELIMITERS = ['**', '*', '/', '//', '+', '<<', '^', '|']
+
+    @staticmethod
+    def apply(op, delimiter, lhs, rhs):
+        return eval('lhs {0}op{1} rhs'.format(
+            delimiter, '>>' if delimiter == '<<' else delimiter),
+            {'op': op, 'lhs': lhs, 'rhs': rhs})
+
+    @pytest.mark.parametrize('specialize', [False, True])
+    @pytest.mark.parametrize('delimiter', DELIMITERS)
+    def test_left_and_right(self, delimiter, specialize):
+        op = infix_operator(delimiter, divmod, specialize=specialize)
+        expected = self.apply(op, delimiter, 7, 2)
+        assert expected == divmod(7, 2)
+        assert op.left(7)(2) == expected
+        assert op.right(2)(7) == expected
+        assert list(map(op.left(7), [2, 3])) == [divmod(7, 2), divmod(7, 3)]
+        assert list(map(op.right(2), [7, 8])) == [divmod(7, 2), divmod(8, 2)]
+
+    @pytest.mark.parametrize('specialize', [False, True])
+    @pytest.mark.parametrize('delimiter', DELIMITERS)
+    def test_partial_operations_are_callable(self, delimiter, specialize):
+        op = infix_operator(delimiter, divmod, specialize=specialize)
+        if delimiter == '**':
+            # the right operand is bound first
+            partial = op ** 2
+            assert partial(7) == divmod(7, 2)
+        else:
+            first = eval('lhs {0} op'.format(delimiter), {'op': op, 'lhs': 7})
+            assert first(2) == divmod(7, 2)
+            assert first(3) == divmod(7, 3)
+
+    def test_section_attributes(self):
+        from betwixt import Section
+        op = infix_operator('|', divmod)
+        section = op.right(2)
+        assert isinstance(section, Section)
+        assert ((section.operator, section.side, section.operand)
+                == (op, 'right', 2))
+        assert repr(section).startswith('<Section right of ')
+
+    def test_bind_hooks(self):
+        bound = []
+
+        def bind_right(rhs):
+            bound.append(rhs)
+            if rhs == 0:
+                return None
+            return lambda lhs: ('fast', lhs - rhs)
+        op = infix_operator('|', lambda lhs, rhs: lhs - rhs,
+                            bind_right=bind_right)
+        section = op.right(1)
+        assert [section(3), section(4)] == [('fast', 2), ('fast', 3)]
+        assert bound == [1]
+        # infix applications do not use the hook
+        assert (3 |op| 1) == 2
+        # no precomputed function for this operand
+        assert op.right(0)(3) == 3
+        # no hook for the left operand
+        assert op.left(3)(1) == 2
+
+    def test_bind_hooks_as_decorator_options(self):
+        @infix_operator('+', bind_left=lambda lhs: lhs.upper)
+        def upper(lhs, rhs):
+            return lhs.upper()
+        assert upper.left('abc')() == 'ABC'
+        assert ('abc' +upper+ None) == 'ABC'
+
+    def test_bind_hooks_not_allowed_on_lazy_operators(self):
+        with pytest.raises(ValueError):
+            infix_operator('|', divmod, lazy=True, bind_left=lambda lhs: None)
+
+    def test_matches_section(self):
+        from betwixt.examples import Globs, matches
+        names = ['foo.txt', 'bar.png', 'baz.TXT', 'x.txt.gz']
+        for pattern in ['*.txt', Globs(['*.txt', 'bar.*'])]:
+            section = matches.right(pattern)
+            assert [section(name) for name in names] \
+                == [name /matches/ pattern for name in names]
+        # bytes patterns are not compiled, but still work
+        assert matches.right(b'*.txt')(b'foo.txt')
+
+    def test_matches_section_on_arrays(self):
+        np = pytest.importorskip('numpy')
+        from betwixt.examples import matches
+        names = np.array(['foo.txt', 'bar.png'])
+        assert list(matches.right('*.txt')(names)) == [True, False]
+
+    def test_contains_sections(self):
+        from betwixt.examples import AnyOf, Index, contains, contains_indexed
+        errors = contains.right(AnyOf(['error', 'fatal']))
+        assert (list(map(errors, ['ok', 'fatal: no disk', 'error']))
+                == [False, True, True])
+        items = tuple(range(1000))
+        section = contains_indexed.left(items)
+        assert section(999) and not section(1000)
+        assert contains_indexed.left(Index([1, 2]))(2)
+        live = [1, 2]
+        section = contains_indexed.left(live)
+        live.append(3)
+        assert section(3)
+
+
+class TestBulkApplication(object):
+
+    @pytest.mark.parametrize('specialize', [False, True])
+    @pytest.mark.parametrize('delimiter', TestSections.DELIMITERS)
+    def test_map_starmap_outer(self, delimiter, specialize):
+        op = infix_operator(delimiter, divmod, specialize=specialize)
+        lhs = [7, 8, 9]
+        rhs = [2, 3]
+        apply = TestSections.apply
+        assert op.map(lhs, rhs) == [apply(op, delimiter, 7, 2), apply(op, delimiter, 8, 3)]
+        assert op.starmap(zip(lhs, rhs)) == op.map(lhs, rhs)
+        assert op.outer(lhs, iter(rhs)) == [
+            [apply(op, delimiter, x, y) for y in rhs] for x in lhs]
+
+    def test_batch(self):
+        calls = []
+        op = infix_operator('|', divmod)
+
+        @op.batch
+        def kernel(lhs, rhs):
+            calls.append((list(lhs), list(rhs)))
+            return [divmod(x, y) for x, y in zip(lhs, rhs)]
+        assert kernel is op._batch
+        assert op.map([7, 8, 9], (y for y in [2, 3])) == [(3, 1), (2, 2)]
+        assert op.starmap([(7, 2)]) == [(3, 1)]
+        assert op.outer([7, 8], [2, 3]) == [[(3, 1), (2, 1)], [(4, 0), (2, 2)]]
+        assert op.outer([7, 8], []) == [[], []]
+        assert calls == [
+            ([7, 8], [2, 3]),
+            ([7], [2]),
+            ([7, 7, 8, 8], [2, 3, 2, 3]),
+        ]
+        # infix applications use the function
+        assert (7 |op| 2) == (3, 1)
+        assert len(calls) == 3
+        op.batch(None)
+        assert op.map([7], [2]) == [(3, 1)]
+        assert len(calls) == 3
+
+    def test_batch_result_length(self):
+        op = infix_operator('|', divmod)
+        op.batch(lambda lhs, rhs: [])
+        with pytest.raises(ValueError):
+            op.map([1], [2])
+
+    def test_matches_batch(self):
+        from betwixt.examples import Globs, matches
+        names = ['foo.txt', 'bar.png']
+        patterns = ['*.txt', Globs(['b*']), 'foo.*']
+        assert matches.outer(names, patterns) \
+            == [[name /matches/ pattern for pattern in patterns] for name in names]
+        assert matches.map(names, patterns) == [True, True]
+        assert matches.starmap([(b'x.txt', b'*.txt')]) == [True]
+
+
+class TestTypeDispatch(object):
+
+    @staticmethod
+    def make_op(delimiter='|', **options):
+        op = infix_operator(delimiter, lambda lhs, rhs: 'default', **options)
+        op.register(int, object, lambda lhs, rhs: 'int')
+        op.register(bool, object, lambda lhs, rhs: 'bool')
+        op.register(int, str, lambda lhs, rhs: 'int,str')
+        return op
+
+    @pytest.mark.parametrize('specialize', [False, True])
+    @pytest.mark.parametrize('delimiter', TestSections.DELIMITERS)
+    def test_dispatch(self, delimiter, specialize):
+        op = self.make_op(delimiter, specialize=specialize)
+        apply = TestSections.apply
+        assert apply(op, delimiter, 1, 2.0) == 'int'
+        assert apply(op, delimiter, True, 2.0) == 'bool'
+        assert apply(op, delimiter, 1, 'x') == 'int,str'
+        assert apply(op, delimiter, 'x', 1) == 'default'
+        assert op._op(1, 'x') == 'int,str'
+        # the first application of each pair of classes fills the cache
+        assert apply(op, delimiter, 1, 'x') == 'int,str'
+
+    def test_sections_and_bulk_application(self):
+        op = self.make_op()
+        assert op.left(1)('x') == 'int,str'
+        assert op.right('x')(1.0) == 'default'
+        assert op.map([1, True], ['x', None]) == ['int,str', 'bool']
+
+    def test_register_as_decorator(self):
+        op = self.make_op()
+
+        @op.register(float, object)
+        def on_float(lhs, rhs):
+            return 'float'
+        assert on_float(1, 2) == 'float'
+        assert op.dispatch(float, int) is on_float
+        assert (1.0 |op| 1) == 'float'
+
+    def test_registration_invalidates_cache(self):
+        op = infix_operator('|', lambda lhs, rhs: 'default')
+        op.register(int, object, lambda lhs, rhs: 'int')
+        assert (True |op| 'x') == 'int'
+        op.register(bool, object, lambda lhs, rhs: 'bool')
+        assert (True |op| 'x') == 'bool'
+
+    def test_ambiguous(self):
+        op = infix_operator('|', lambda lhs, rhs: 'default')
+        op.register(int, object, lambda lhs, rhs: 'int')
+        op.register(object, int, lambda lhs, rhs: 'int')
+        with pytest.raises(TypeError) as excinfo:
+            1 |op| 2
+        assert excinfo.value.__context__ is None
+        assert (1 |op| 'x') == 'int'
+
+    def test_abstract_base_classes(self):
+        try:
+            from collections.abc import Sized
+        except ImportError:
+            from collections import Sized
+        op = infix_operator('|', lambda lhs, rhs: 'default')
+        op.register(Sized, object, lambda lhs, rhs: 'sized')
+        op.register(list, object, lambda lhs, rhs: 'list')
+        assert ([] |op| 1) == 'list'
+        assert ({} |op| 1) == 'sized'
+        assert (1 |op| 1) == 'default'
+
+    def test_dispatch_without_registrations(self):
+        op = infix_operator('|', divmod)
+        assert op.dispatch(int, int) is divmod
+
+    def test_register_while_collecting_stats(self):
+        import betwixt
+        op = infix_operator('|', max, specialize=True)
+        betwixt.enable_stats()
+        try:
+            op.register(str, str, min)
+            assert ('a' |op| 'b') == 'a'
+            assert (1 |op| 2) == 2
+            assert betwixt.stats()['|max|']['calls'] == 2
+        finally:
+            betwixt.disable_stats()
+            betwixt.reset_stats()
+        assert ('a' |op| 'b') == 'a'
+
+    def test_examples(self):
+        import io
+        from betwixt.examples import AllOf, AnyOf, Sink, contains, joining
+        assert {1, 2} |contains| 1
+        assert not ((1, 2) |contains| 3)
+        assert 'foobar' |contains| 'oba'
+        assert b'foobar' |contains| b'oba'
+        assert {'a': 1} |contains| 'a'
+        assert 'foobar' |contains| AnyOf(['x', 'bar'])
+        assert not ('foobar' |contains| AllOf(['x', 'bar']))
+        assert bytearray(b'foobar') |contains| b'oba'
+        assert (b'-' *joining* [b'a', b'b']) == b'a-b'
+        assert (bytearray(b'-') *joining* [b'a', b'b']) == bytearray(b'a-b')
+        out = io.StringIO()
+        assert (Sink(out, u'-') *joining* [u'a', u'b']) == 3
+        assert out.getvalue() == u'a-b'
+
+
+class TestPickling(object):
+
+    PROTOCOLS = list(range(__import__('pickle').HIGHEST_PROTOCOL + 1))
+
+    @staticmethod
+    def roundtrip(obj, protocol=None):
+        import pickle
+        return pickle.loads(pickle.dumps(obj, protocol))
+
+    @pytest.mark.parametrize('protocol', PROTOCOLS)
+    def test_module_level_operators_by_reference(self, protocol):
+        from betwixt import examples
+        for name in ['contains', 'contains_indexed', 'joining', 'matches',
+                     'matching', 'join', 'concat', 'then', 'pmap', 'tmap']:
+            op = getattr(examples, name)
+            assert self.roundtrip(op, protocol) is op
+
+    @pytest.mark.parametrize('specialize', [False, True])
+    @pytest.mark.parametrize('delimiter', TestSections.DELIMITERS)
+    def test_operators_and_partial_operations_by_value(self, delimiter, specialize):
+        op = infix_operator(delimiter, divmod, specialize=specialize)
+        copy = self.roundtrip(op)
+        assert copy is not op
+        assert TestSections.apply(copy, delimiter, 7, 2) == divmod(7, 2)
+        assert hasattr(type(copy), '_specialized_from') == specialize
+        if delimiter == '**':
+            partial = op ** 2
+        else:
+            partial = eval('7 {0}op'.format(delimiter), {'op': op})
+        copy = self.roundtrip(partial)
+        assert type(copy).__bases__ == type(partial).__bases__
+        assert copy(7 if delimiter == '**' else 2) == divmod(7, 2)
+
+    @pytest.mark.parametrize('options', [
+        dict(specialize=True),
+        dict(cache=True),
+        dict(cache=2, cache_ttl=60, cache_key='identity'),
+        dict(lazy=True, pure=True),
+        dict(associative=True),
+        dict(vectorize=True, specialize=True),
+        dict(bind_right=__import__('betwixt.examples').examples._contains_section),
+    ])
+    def test_options_by_value(self, options):
+        op = infix_operator('|', max, **options)
+        copy = self.roundtrip(op)
+        assert copy is not op
+        assert copy._options == op._options
+        assert evaluate(7 |copy| 2) == 7
+        assert evaluate(2 |copy| 7 |copy| 3) == 7
+        assert evaluate(self.roundtrip(7 |op)(2)) == 7
+        assert evaluate(copy.right(7)(2)) == 7
+        if 'cache' in options:
+            assert copy.cache_info().misses == 3
+
+    @pytest.mark.parametrize('options', [
+        None, dict(), dict(specialize=True), dict(cache=True)])
+    def test_registered_implementations_by_value(self, options):
+        def make():
+            if options is None:
+                return BarDelimitedInfixOperator(max)
+            return infix_operator('|', max, **options)
+        op = make()
+        op.register(str, str, min)
+        op.register(object, object, divmod)
+        copy = self.roundtrip(op)
+        assert ('a' |copy| 'b') == 'a'
+        assert (7 |copy| 2) == divmod(7, 2)
+        assert self.roundtrip('a' |op)('b') == 'a'
+        op = make()
+        op.register(str, str, min)
+        copy = self.roundtrip(op)
+        assert (7 |copy| 2) == 7
+        assert type(copy).__bases__ == type(op).__bases__
+
+    def test_batch_by_value(self):
+        import functools
+        op = infix_operator('|', divmod)
+        op.batch(functools.partial(map, divmod))
+        copy = self.roundtrip(op)
+        assert copy._batch.func is map
+        assert copy.map([7, 8], [2, 3]) == [divmod(7, 2), divmod(8, 3)]
+
+    def test_loop_variable_is_not_a_name(self, monkeypatch):
+        import pickle
+        import sys
+        import types
+        module = types.ModuleType('betwixt_pickled_ops')
+        monkeypatch.setitem(sys.modules, module.__name__, module)
+        exec(
+            "import pickle\n"
+            "from betwixt import infix_operator\n"
+            "def first(lhs, rhs):\n"
+            "    return lhs\n"
+            "def second(lhs, rhs):\n"
+            "    return rhs\n"
+            "ops = {'first': infix_operator('|', first),\n"
+            "       'second': infix_operator('|', second)}\n"
+            "for name, op in sorted(ops.items()):\n"
+            "    pickle.dumps(op)\n", module.__dict__)
+        assert module.op is module.ops['second']
+        copy = pickle.loads(pickle.dumps(module.ops['first']))
+        assert copy is not module.op
+        assert (1 |copy| 2) == 1
+
+    def test_decorated_function_name(self):
+        from betwixt import _operator_name
+        from betwixt.examples import contains
+        assert _operator_name(contains) == 'betwixt.examples.contains'
+        assert self.roundtrip(contains) is contains
+
+    def test_named_operator(self):
+        op = infix_operator('|', lambda lhs, rhs: lhs + rhs, name='test_betwixt.plus')
+        assert self.roundtrip(op) is op
+        assert self.roundtrip(1 |op)(2) == 3
+        with pytest.raises(ValueError):
+            infix_operator('|', divmod, name='plus')
+
+    def test_instrumented_operator(self):
+        import betwixt
+        op = infix_operator('|', divmod, specialize=True)
+        betwixt.enable_stats()
+        try:
+            assert (7 |self.roundtrip(op)| 2) == divmod(7, 2)
+        finally:
+            betwixt.disable_stats()
+            betwixt.reset_stats()
+
+    def test_partial_operations_of_dispatching_operators(self):
+        from betwixt.examples import contains
+        partial = self.roundtrip('haystack' |contains)
+        assert partial('hay')
+        assert not partial('needle')
+
+    def test_partial_operation_of_changed_operator(self):
+        op = infix_operator('|', max)
+        partial = 1 |op
+        op.register(str, str, min)
+        with pytest.raises(TypeError):
+            self.roundtrip(partial)
+
+    def test_sections(self):
+        from betwixt.examples import contains_indexed, matches
+        section = self.roundtrip(matches.right('*.txt'))
+        assert section.operator is matches
+        assert list(filter(section, ['a.txt', 'b.png'])) == ['a.txt']
+        section = self.roundtrip(contains_indexed.left((1, 2, 3)))
+        assert (section.side, section.operand) == ('left', (1, 2, 3))
+        assert section(2) and not section(4)
+
+    def test_partial_operation_classes(self):
+        for cls in [BarDelimitedInfixOperator, SlashDelimitedInfixOperator]:
+            assert self.roundtrip(cls._PartialOperation) is cls._PartialOperation
+
+    def test_process_pool(self):
+        from betwixt.examples import contains, matches, pmap
+        names = ['a.txt', 'b.png', 'c.txt']
+        assert list(names <<pmap>> matches.right('*.txt')) == [True, False, True]
+        assert list(['a', 'x'] <<pmap>> ('abc' |contains)) == [True, False]
+
+
+class TestAssociativeChains(object):
+
+    @staticmethod
+    def counting(func, calls):
+        def counted(*operands):
+            calls.append(operands)
+            return func(*operands)
+        return counted
+
+    @pytest.mark.parametrize('delimiter', TestSections.DELIMITERS)
+    def test_single_call(self, delimiter):
+        calls = []
+        op = infix_operator(delimiter, self.counting(lambda *xs: '-'.join(xs), calls),
+                            associative=True)
+        apply = TestSections.apply
+        result = apply(op, delimiter, apply(op, delimiter, apply(op, delimiter, 'a', 'b'), 'c'), 'd')
+        assert calls == []
+        assert result == 'a-b-c-d'
+        assert calls == [('a', 'b', 'c', 'd')]
+        # computed once
+        assert str(result) == 'a-b-c-d'
+        assert len(calls) == 1
+
+    def test_kernel(self):
+        pairs, chains = [], []
+        op = infix_operator('+', self.counting(lambda lhs, rhs: lhs + rhs, pairs),
+                            associative=self.counting(lambda *xs: ''.join(xs), chains))
+        assert ('a' +op+ 'b' +op+ 'c') == 'abc'
+        assert ('a' +op+ 'b') == 'ab'
+        assert pairs == [('a', 'b')]
+        assert chains == [('a', 'b', 'c')]
+
+    def test_grouping(self):
+        calls = []
+        op = infix_operator('/', self.counting(os.path.join, calls), associative=True)
+        assert ('a' /op/ ('b' /op/ 'c') /op/ 'd') == os.path.join('a', 'b', 'c', 'd')
+        assert calls == [('a', 'b', 'c', 'd')]
+
+    def test_shared_prefix(self):
+        calls = []
+        op = infix_operator('/', self.counting(os.path.join, calls), associative=True)
+        prefix = 'a' /op/ 'b'
+        first = prefix /op/ 'c'
+        second = prefix /op/ 'd'
+        assert (first, second) == (os.path.join('a', 'b', 'c'), os.path.join('a', 'b', 'd'))
+        assert calls == [('a', 'b', 'c'), ('a', 'b', 'd')]
+        # a computed chain is used as a single operand
+        assert prefix == os.path.join('a', 'b')
+        assert (prefix /op/ 'e') == os.path.join('a', 'b', 'e')
+        assert calls[-2:] == [('a', 'b'), (os.path.join('a', 'b'), 'e')]
+
+    def test_other_operators(self):
+        from betwixt.chain import Chain
+        join = infix_operator('/', os.path.join, associative=True)
+        cat = infix_operator('+', lambda *xs: ''.join(xs), associative=True)
+        result = ('a' /join/ 'b') +cat+ 'c'
+        assert result == os.path.join('a', 'b') + 'c'
+        contains = infix_operator('|', lambda lhs, rhs: rhs in lhs)
+        assert ('a' /join/ 'b') |contains| 'b'
+        assert type('a' /join/ 'b') is Chain
+
+    def test_stand_in_for_result(self):
+        import pickle
+        from betwixt.chain import materialize
+        join = infix_operator('/', os.path.join, associative=True)
+        path = 'a' /join/ 'b'
+        expected = os.path.join('a', 'b')
+        assert isinstance(path, str)
+        assert path == expected and expected == path
+        assert hash(path) == hash(expected)
+        assert {expected: 1}[path] == 1
+        assert (str(path), repr(path), len(path)) == (expected, repr(expected), len(expected))
+        assert '{0:>5}'.format(path) == '{0:>5}'.format(expected)
+        assert path + 'c' == expected + 'c'
+        assert 'c' + path == 'c' + expected
+        assert path.upper() == expected.upper()
+        assert list(path) == list(expected)
+        assert 'b' in path and path[0] == 'a'
+        assert os.fspath(path) == expected
+        assert type(pickle.loads(pickle.dumps(path))) is str
+        assert type(materialize(path)) is str
+        assert materialize(1) == 1
+
+    def test_long_chain(self):
+        join = infix_operator('/', os.path.join, associative=True)
+        path = 'root'
+        for _ in range(10000):
+            path = path /join/ 'x'
+        assert len(path) == len('root') + 2 * 10000
+
+    def test_errors_when_used(self):
+        join = infix_operator('/', os.path.join, associative=True)
+        path = 'a' /join/ 1
+        with pytest.raises(TypeError):
+            str(path)
+
+    def test_invalid_options(self):
+        with pytest.raises(ValueError):
+            infix_operator('|', max, associative=True, lazy=True)
+        with pytest.raises(ValueError):
+            infix_operator('|', max, associative=True, cache=10)
+
+    def test_examples_join_is_eager(self):
+        import json
+        import re
+        from betwixt.examples import join, matches, matching
+        path = '/tmp' /join/ 'a.txt'
+        assert type(path) is str
+        assert ('/a' /join/ 'b' /join/ 'c' /join/ 'd') == os.path.join('/a', 'b', 'c', 'd')
+        assert ('/tmp' /join/ 'a.txt') /matches/ '*.txt'
+        assert matches.right('*.txt')(path)
+        assert matches.outer([path], ['*.txt', '*.png']) == [[True, False]]
+        assert [path] /matching/ '*.txt' == [path]
+        assert re.match('/tmp', path)
+        assert ','.join([path]) == path
+        assert json.loads(json.dumps(path)) == path
+        with pytest.raises(TypeError):
+            '/a' /join/ 5
+
+    def test_examples_concat(self):
+        from betwixt.chain import Chain, materialize
+        from betwixt.examples import concat
+        result = 'a' +concat+ 'b' +concat+ 'c'
+        assert type(result) is Chain
+        assert materialize(result) == 'abc'
+        assert materialize(b'a' +concat+ b'b' +concat+ b'c') == b'abc'
+        assert materialize((1,) +concat+ (2,) +concat+ (3,)) == (1, 2, 3)
+        assert materialize([1] +concat+ [2] +concat+ [3, 4]) == [1, 2, 3, 4]
+        # other and mixed types fall back to ``+``
+        class MyList(list):
+            pass
+        assert materialize([1] +concat+ [2] +concat+ MyList([3])) == [1, 2, 3]
+        assert materialize(1 +concat+ 2 +concat+ 3) == 6